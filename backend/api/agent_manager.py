@@ -1,61 +1,412 @@
+"""
+Registry of the workflow agents.
+
+Routers used to build and compile every agent at import time, so starting the
+app (and every test that imported it) paid for LangGraph, the Groq client and
+all seven graphs before serving a single request. Agents are now registered by
+name with a factory and built on first use; ``AGENT_WARMUP`` ("all" or a comma
+separated list of names) opts into building them in the background at startup.
+
+Every router and the job queue dispatch through the same registry, so it is
+also the one place that bounds concurrent runs per agent
+(``AGENT_MAX_CONCURRENCY`` / ``AGENT_CONCURRENCY="blog=2,x-post=6"``) and
+tracks per-agent health. Agents share the LLM clients from ``llm.clients``;
+token usage inside a lease is attributed to the agent's name (``llm.usage``).
+"""
+
+import asyncio
 import logging
+import math
+import os
+import threading
+import time
 import uuid
-from typing import Any, Dict, Optional
-from langchain_core.messages import HumanMessage
-# Import your agents
-from blog.agent_blog_workflow import BlogWorkflowAgent
-# from content.content_agent import ContentCreationAgent
-# from news.news_agent import NewsroomAgent
-# from multipurpose.multipurpose_agent import MultipurposeBot
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Iterator, List, Optional
+
+from llm.usage import usage_scope
+
+AgentFactory = Callable[[], Any]
+
+DEFAULT_MAX_CONCURRENCY = 4
+# Vision captioning and the four-branch repurposer fan out several upstream calls per run.
+DEFAULT_LIMITS = {"visual-post": 2, "repurposer": 2}
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 30.0
+BUILD_RETRY_SECONDS = 30.0
+DEGRADED_AFTER_FAILURES = 3
+# Same ceiling as the admission layer's Retry-After (common.admission).
+DEFAULT_RUN_SECONDS = 10.0
+MAX_RETRY_AFTER_SECONDS = 120
+
+
+class AgentUnavailableError(RuntimeError):
+    """Raised when an agent cannot be built (missing keys, model load errors...).
+
+    ``retry_after`` (seconds) is set when the caller can expect the agent back
+    soon; routers send it as the ``Retry-After`` header of their 503.
+    """
+
+    def __init__(self, message: str, retry_after: Optional[int] = None) -> None:
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class AgentBusyError(AgentUnavailableError):
+    """Raised when no concurrency slot frees up within the queue timeout."""
+
+
+def retry_headers(exc: AgentUnavailableError) -> Optional[Dict[str, str]]:
+    """``Retry-After`` header for a 503 built from ``exc`` (None when unknown)."""
+    if exc.retry_after is None:
+        return None
+    return {"Retry-After": str(exc.retry_after)}
+
+
+# ---------------------------------------------------------------------------
+# Factories (imports deferred so registering an agent stays free)
+# ---------------------------------------------------------------------------
+def _compiled(agent: Any) -> Any:
+    agent.compile()
+    return agent
+
+
+def _build_blog() -> Any:
+    from blog.agent_blog_workflow import BlogWorkflowAgent
+
+    return _compiled(BlogWorkflowAgent())
+
+
+def _build_news() -> Any:
+    from news.agent_news_workflow import NewsArticleWorkflowAgent
+
+    return _compiled(NewsArticleWorkflowAgent())
+
+
+def _build_youtube_script() -> Any:
+    from youtube.agent_youtube_script import YoutubeScriptAgent
+
+    return _compiled(YoutubeScriptAgent())
+
+
+def _build_youtube_blog() -> Any:
+    from youtubeBlog.agent import YouTubeBlogAgent
+
+    return YouTubeBlogAgent()
+
+
+def _build_repurposer() -> Any:
+    from contentRepurposer.agent_content_repurposer_workflow import ContentRepurposerAgent
+
+    return ContentRepurposerAgent()
+
+
+def _build_visual_post() -> Any:
+    from visualPostGenerator.agent_visual_content_workflow import VisualContentAgent
+
+    return VisualContentAgent()
+
+
+def _build_x_post() -> Any:
+    from x_post.agent import XPostAgent
+    from x_post.idea_cache import trending_idea_cache
+
+    return XPostAgent(idea_cache=trending_idea_cache)
+
+
+DEFAULT_AGENTS: Dict[str, AgentFactory] = {
+    "blog": _build_blog,
+    "news": _build_news,
+    "youtube-script": _build_youtube_script,
+    "youtube-blog": _build_youtube_blog,
+    "repurposer": _build_repurposer,
+    "visual-post": _build_visual_post,
+    "x-post": _build_x_post,
+}
+
+
+@dataclass
+class AgentHealth:
+    """Per-agent load and failure state reported by ``/health/agents``."""
+
+    status: str = "not_loaded"  # not_loaded | loading | ready | degraded | unavailable
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    in_flight: int = 0
+    waiting: int = 0
+    completed: int = 0
+    failed: int = 0
+    rejected: int = 0
+    consecutive_failures: int = 0
+    build_seconds: Optional[float] = None
+    avg_run_seconds: float = DEFAULT_RUN_SECONDS
+    last_error: Optional[str] = None
+    last_error_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+def _env_limits(setting: str) -> Dict[str, int]:
+    """Parse ``AGENT_CONCURRENCY`` ("blog=2,x-post=6") into per-agent limits."""
+    limits: Dict[str, int] = {}
+    for item in setting.split(","):
+        name, _, value = item.partition("=")
+        if name.strip() and value.strip().isdigit():
+            limits[name.strip()] = max(1, int(value))
+    return limits
 
 
 class AgentManager:
-    """Manages all AI agents and orchestrates their interactions."""
+    """Builds agents lazily, hands out the shared instance and bounds concurrent runs.
+
+    Callers run a workflow inside ``lease(name)`` (or ``alease`` from async
+    code), which waits for one of the agent's ``max_concurrency`` slots and
+    records the outcome in the agent's health state.
+    """
 
-    def __init__(self):
+    def __init__(
+        self,
+        factories: Optional[Dict[str, AgentFactory]] = None,
+        limits: Optional[Dict[str, int]] = None,
+        queue_timeout: Optional[float] = None,
+    ):
         self.logger = logging.getLogger("AgentManager")
-        self.agents = {}
-        self._initialized = False
+        self.default_limit = int(os.getenv("AGENT_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+        self.limits = {
+            **DEFAULT_LIMITS,
+            **_env_limits(os.getenv("AGENT_CONCURRENCY", "")),
+            **(limits or {}),
+        }
+        self.queue_timeout = (
+            queue_timeout
+            if queue_timeout is not None
+            else float(os.getenv("AGENT_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS))
+        )
+        self.factories: Dict[str, AgentFactory] = {}
+        self.agents: Dict[str, Any] = {}
+        self.health_state: Dict[str, AgentHealth] = {}
+        self._slots: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+        self._agent_locks: Dict[str, threading.Lock] = {}
+        self._warmup_thread: Optional[threading.Thread] = None
+        for name, factory in (factories or {}).items():
+            self.register(name, factory)
 
-    async def initialize(self):
-        """Compile and prepare all agents"""
-        if self._initialized:
-            self.logger.info("Agents already initialized.")
-            return
+    # ------------------------------------------------------------------ #
+    # Registry
+    # ------------------------------------------------------------------ #
+    def register(
+        self, name: str, factory: AgentFactory, max_concurrency: Optional[int] = None
+    ) -> None:
+        limit = max_concurrency or self.limits.get(name, self.default_limit)
+        with self._lock:
+            self.factories[name] = factory
+            self.agents.pop(name, None)
+            self.health_state[name] = AgentHealth(max_concurrency=limit)
+            self._slots[name] = threading.BoundedSemaphore(limit)
+
+    @property
+    def names(self) -> List[str]:
+        return list(self.factories)
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.agents
+
+    def get(self, name: str) -> Any:
+        """Return the agent registered as ``name``, building it on first use.
+
+        After a failed build, further calls fail fast for ``BUILD_RETRY_SECONDS``
+        instead of retrying a broken factory on every request.
+        """
+        agent = self.agents.get(name)
+        if agent is not None:
+            return agent
+
+        with self._lock:
+            factory = self.factories.get(name)
+            if factory is None:
+                raise ValueError(f"Unknown agent type: {name}")
+            agent_lock = self._agent_locks.setdefault(name, threading.Lock())
+        health = self.health_state[name]
+
+        # Concurrent first requests wait for a single build.
+        with agent_lock:
+            agent = self.agents.get(name)
+            if agent is not None:
+                return agent
+            if (
+                health.status == "unavailable"
+                and health.last_error_at is not None
+                and time.time() - health.last_error_at < BUILD_RETRY_SECONDS
+            ):
+                raise AgentUnavailableError(
+                    f"The '{name}' workflow is not available: {health.last_error}",
+                    retry_after=math.ceil(
+                        BUILD_RETRY_SECONDS - (time.time() - health.last_error_at)
+                    ),
+                )
+
+            self.logger.info(f"Initializing '{name}' agent...")
+            health.status = "loading"
+            started = time.perf_counter()
+            try:
+                agent = factory()
+            except Exception as e:
+                self.logger.error(f"Failed to initialize '{name}' agent: {e}")
+                health.status = "unavailable"
+                health.last_error = str(e)
+                health.last_error_at = time.time()
+                raise AgentUnavailableError(
+                    f"The '{name}' workflow is not available: {e}",
+                    retry_after=math.ceil(BUILD_RETRY_SECONDS),
+                ) from e
+            health.build_seconds = round(time.perf_counter() - started, 3)
+            health.status = "ready"
+            self.agents[name] = agent
+            self.logger.info(f"'{name}' agent ready!")
+            return agent
+
+    # Backwards-compatible alias
+    get_agent = get
+
+    # ------------------------------------------------------------------ #
+    # Dispatch
+    # ------------------------------------------------------------------ #
+    def retry_after(self, name: str) -> int:
+        """Seconds until a slot is likely free: average run time scaled by the backlog."""
+        health = self.health_state[name]
+        with self._lock:
+            backlog = (health.in_flight + health.waiting) / max(health.max_concurrency, 1)
+            seconds = health.avg_run_seconds * max(backlog, 1)
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(seconds)))
+
+    def _acquire(self, name: str) -> None:
+        health = self.health_state[name]
+        with self._lock:
+            health.waiting += 1
+        try:
+            acquired = self._slots[name].acquire(timeout=self.queue_timeout)
+        finally:
+            with self._lock:
+                health.waiting -= 1
+        if not acquired:
+            with self._lock:
+                health.rejected += 1
+            raise AgentBusyError(
+                f"The '{name}' workflow is at capacity "
+                f"({health.max_concurrency} concurrent runs). Try again shortly.",
+                retry_after=self.retry_after(name),
+            )
+        with self._lock:
+            health.in_flight += 1
+
+    def _release(
+        self, name: str, error: Optional[BaseException], seconds: Optional[float] = None
+    ) -> None:
+        health = self.health_state[name]
+        with self._lock:
+            health.in_flight -= 1
+            if seconds is not None:
+                health.avg_run_seconds = round(0.8 * health.avg_run_seconds + 0.2 * seconds, 3)
+            if error is None:
+                health.completed += 1
+                health.consecutive_failures = 0
+                if health.status == "degraded":
+                    health.status = "ready"
+            else:
+                health.failed += 1
+                health.consecutive_failures += 1
+                health.last_error = str(error)
+                health.last_error_at = time.time()
+                if health.consecutive_failures >= DEGRADED_AFTER_FAILURES:
+                    health.status = "degraded"
+        self._slots[name].release()
+
+    @contextmanager
+    def lease(self, name: str) -> Iterator[Any]:
+        """Run one workflow call against ``name`` within its concurrency limit."""
+        agent = self.get(name)
+        self._acquire(name)
+        started = time.monotonic()
+        error: Optional[BaseException] = None
         try:
-            self.agents = {
-                # "multipurpose": MultipurposeBot(),
-                # "content": ContentCreationAgent(),
-                "blog_workflow": BlogWorkflowAgent(),
-                # "newsroom": NewsroomAgent(),
-            }
-
-            for name, agent in self.agents.items():
-                self.logger.info(f"Compiling graph for '{name}' agent...")
-                agent.compile()
-                self.logger.info(f"'{name}' agent ready!")
-
-            self._initialized = True
-            self.logger.info("All agents initialized successfully!")
-        except Exception as e:
-            self.logger.error(f"Initialization failed: {str(e)}")
+            with usage_scope(workflow=name):
+                yield agent
+        except BaseException as e:
+            error = e
             raise
+        finally:
+            self._release(name, error, time.monotonic() - started)
 
-    def get_agent(self, agent_type: str):
-        agent = self.agents.get(agent_type)
-        if not agent:
-            raise ValueError(f"Unknown agent type: {agent_type}")
-        return agent
+    @asynccontextmanager
+    async def alease(self, name: str) -> AsyncIterator[Any]:
+        """``lease`` for async callers; waiting for a slot does not block the event loop."""
+        agent = await asyncio.to_thread(self.get, name)
+        await asyncio.to_thread(self._acquire, name)
+        started = time.monotonic()
+        error: Optional[BaseException] = None
+        try:
+            with usage_scope(workflow=name):
+                yield agent
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self._release(name, error, time.monotonic() - started)
+
+    # ------------------------------------------------------------------ #
+    # Health
+    # ------------------------------------------------------------------ #
+    def health(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {name: state.to_dict() for name, state in self.health_state.items()}
+
+    # ------------------------------------------------------------------ #
+    # Warm-up
+    # ------------------------------------------------------------------ #
+    def warm_up(self, names: Optional[Iterable[str]] = None) -> Dict[str, bool]:
+        """Build the given agents (all by default); returns name -> success."""
+        ready: Dict[str, bool] = {}
+        for name in names or self.names:
+            try:
+                self.get(name)
+                ready[name] = True
+            except (AgentUnavailableError, ValueError) as e:
+                self.logger.warning(f"Warm-up skipped '{name}': {e}")
+                ready[name] = False
+        return ready
 
+    def start_warmup(self, setting: Optional[str] = None) -> None:
+        """Warm agents in a background thread when ``AGENT_WARMUP`` asks for it."""
+        setting = (setting if setting is not None else os.getenv("AGENT_WARMUP", "")).strip()
+        if not setting or setting.lower() in {"0", "false", "none", "off"}:
+            return
+        if setting.lower() == "all":
+            names = self.names
+        else:
+            names = [name.strip() for name in setting.split(",") if name.strip()]
+        if self._warmup_thread is not None:
+            return
+        self._warmup_thread = threading.Thread(
+            target=self.warm_up, args=(names,), name="agent-warmup", daemon=True
+        )
+        self._warmup_thread.start()
+        self.logger.info(f"Warming up agents in the background: {', '.join(names)}")
+
+    # ------------------------------------------------------------------ #
+    # Messaging
+    # ------------------------------------------------------------------ #
     async def process_message(
         self,
         message: str,
-        agent_type: str = "multipurpose",
+        agent_type: str = "blog",
         thread_id: Optional[str] = None,
         **kwargs,
     ) -> Dict[str, Any]:
         """Send message to the specified agent and get response."""
-        agent = self.get_agent(agent_type)
+        from langchain_core.messages import HumanMessage
+
+        agent = self.get(agent_type)
         thread_id = thread_id or str(uuid.uuid4())
         self.logger.info(f"[Incoming] ({agent_type}) → {message}")
 
@@ -67,4 +418,4 @@ class AgentManager:
 
 
 # Global instance (importable anywhere)
-agent_manager = AgentManager()
+agent_manager = AgentManager(DEFAULT_AGENTS)
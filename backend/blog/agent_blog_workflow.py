@@ -1,5 +1,11 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, Optional
 from langgraph.graph import StateGraph
+
+from common.checkpoint import get_checkpointer, resolve_thread_id, run_checkpointed
+from common.deadline import DeadlineExceeded
+from common.graph import ProgressCallback
+from llm import degraded_run
 from .blog_workflow_model import BlogState, build_blog_graph
 
 
@@ -13,7 +19,12 @@ class BlogWorkflowAgent:
         """Build the LangGraph workflow."""
         self.graph = build_blog_graph()
 
-    async def ainvoke(self, input_data: Dict[str, Any], thread_id: str = None):
+    async def ainvoke(
+        self,
+        input_data: Dict[str, Any],
+        thread_id: str = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
         print("=== ainvoke received input_data ===")
         print(input_data)
 
@@ -31,8 +42,14 @@ class BlogWorkflowAgent:
 
             # ⚙️ Run the LangGraph workflow
             graph = self.graph or build_blog_graph()
-            app = graph.compile()
-            result = app.invoke(state)
+            app = graph.compile(checkpointer=get_checkpointer())
+            thread_id = thread_id or resolve_thread_id(input_data)
+            # Degraded mode (slow upstream) is decided once for the whole run
+            with degraded_run() as degraded:
+                # Off the event loop, so the server keeps serving (and noticing disconnects)
+                result = await asyncio.to_thread(
+                    run_checkpointed, app, state, thread_id, on_progress=on_progress
+                )
 
             formatted_output = ""
             if "social_assets" in result and result["social_assets"]:
@@ -43,12 +60,15 @@ class BlogWorkflowAgent:
 
                 return {
                     "status": "success",
+                    "degraded": degraded,
                     "data": {
                     "formatted_blog": formatted_output.strip(),  # ready for frontend
                     "raw_result": result  # optional: full workflow output
                     }
                 }
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"Error in BlogWorkflowAgent: {e}")
             return {
@@ -1,21 +1,43 @@
 from typing import Dict, Any
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel, Field
-from groq import Groq
 from dotenv import load_dotenv
 
+from llm import (
+    FAST_MODEL,
+    FULL_MODEL,
+    JUDGE_ROLE,
+    CascadeStep,
+    LazyClient,
+    all_of,
+    hedged_create,
+    require_verdict,
+    route,
+    run_cascade,
+    skip_optional,
+    word_range,
+)
+
+from .brand_profile_store import get_brand_profile_store
+
 load_dotenv()
 
 # -------------------------------
 # Initialize Groq client
 # -------------------------------
-client = Groq()  # Uses GROQ_API_KEY from environment
-research_client = Groq()  # Smaller agent for research (llama-3.1-8b-instant)
-
-def generate(prompt: str, max_tokens=512, temperature=0.7) -> str:
-    """Use Groq API to generate text from prompt."""
-    completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
+client = LazyClient()  # Uses GROQ_API_KEY from environment, created on first call
+research_client = LazyClient()  # Smaller agent for research (llama-3.1-8b-instant)
+
+def generate(prompt: str, max_tokens=512, temperature=0.7, critical=True, hedge=False) -> str:
+    """Use Groq API to generate text from prompt.
+
+    Non-critical calls move to the fast model with fewer tokens in degraded mode.
+    ``hedge`` sends a duplicate request when the call runs into the latency tail.
+    """
+    model, max_tokens = route(FULL_MODEL, max_tokens, critical=critical)
+    create = (lambda **kw: hedged_create(client, **kw)) if hedge else client.chat.completions.create
+    completion = create(
+        model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=temperature,
         max_completion_tokens=max_tokens,
@@ -26,8 +48,9 @@ def generate(prompt: str, max_tokens=512, temperature=0.7) -> str:
 
 def generate_research(prompt: str, max_tokens=512, temperature=0.7) -> str:
     """Secondary agent for topic research."""
+    model, max_tokens = route(FAST_MODEL, max_tokens)
     completion = research_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
+        model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=temperature,
         max_completion_tokens=max_tokens,
@@ -36,6 +59,25 @@ def generate_research(prompt: str, max_tokens=512, temperature=0.7) -> str:
     )
     return completion.choices[0].message.content.strip()
 
+
+def generate_cascade(step: CascadeStep, prompt: str, max_tokens=512, temperature=0.7) -> str:
+    """Fast model first; escalate to the 70B model when ``step``'s validator rejects it."""
+    return run_cascade(
+        client,
+        step,
+        [{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+
+# Compliance reports only need a verdict and a few observations: 8B first.
+COMPLIANCE_CASCADE = CascadeStep(
+    "blog.compliance_review",
+    all_of(require_verdict("APPROVED", "REVISION_NEEDED"), word_range(15, 600)),
+    models=(JUDGE_ROLE, FULL_MODEL),
+)
+
 # -------------------------------
 # State Schema
 # -------------------------------
@@ -62,12 +104,12 @@ class BlogState(BaseModel):
 # Nodes
 # -------------------------------
 
-def brand_context_research(state: BlogState) -> Dict[str, Any]:
-    """Step 1: Research brand history and tone context."""
+def research_brand(brand_name: str, brand_voice: str = "") -> str:
+    """LLM brand research. Results are cached in the brand profile store."""
     prompt = f"""
 You are a Brand Analyst.
 
-Research and summarize the brand **{state.brand_name}**.
+Research and summarize the brand **{brand_name}**.
 
 Return sections:
 - Brand Voice Summary
@@ -76,7 +118,19 @@ Return sections:
 - Tone & Audience Insights
 - Alignment Recommendations
 """
-    return {"brand_history": generate(prompt, 512)}
+    return generate(prompt, 512)
+
+
+def brand_context_research(state: BlogState) -> Dict[str, Any]:
+    """Step 1: Load brand history and tone context from the brand profile store.
+
+    The LLM research only runs when no fresh profile exists for this brand
+    name and brand voice.
+    """
+    profile = get_brand_profile_store().get_or_create(
+        state.brand_name, state.brand_voice, research_brand
+    )
+    return {"brand_history": profile.profile}
 
 
 def topic_research(state: BlogState) -> Dict[str, Any]:
@@ -119,11 +173,15 @@ Guidelines:
 - Use Markdown formatting with headings.
 - Structure: Introduction, 3 core sections, and a conclusion.
 """
-    return {"blog_draft": generate(prompt, 1024)}
+    return {"blog_draft": generate(prompt, 1024, hedge=True)}
 
 
 def compliance_review(state: BlogState) -> Dict[str, Any]:
     """Step 4: Check compliance for tone, factual accuracy, and brand alignment."""
+    if skip_optional("blog compliance review"):
+        # No report means revision_step has nothing to act on.
+        return {"compliance_report": None}
+
     prompt = f"""
 You are the Brand Compliance Reviewer.
 
@@ -141,13 +199,15 @@ Return a report (in plain English) that includes:
 - Key observations
 - If revisions needed, list what to improve
 """
-    return {"compliance_report": generate(prompt, 512)}
+    return {"compliance_report": generate_cascade(COMPLIANCE_CASCADE, prompt, 512)}
 
 
 def revision_step(state: BlogState) -> Dict[str, Any]:
     """Step 5: Revise the blog if compliance suggests improvement."""
     if not state.compliance_report or "APPROVED" in state.compliance_report.upper():
         return {"revision_notes": "No revision required."}
+    if skip_optional("blog revision"):
+        return {"revision_notes": "Revision skipped: request deadline close."}
 
     prompt = f"""
 You are an Editor revising a blog based on compliance feedback.
@@ -186,7 +246,7 @@ Create a post for **{platform}** (~{word_count} words) that:
 - Is consistent with the brand's values and history
 - Feels native to that platform
 """
-        generated_text = generate(prompt, 512)
+        generated_text = generate(prompt, 512, critical=False)
         # Key is modality name, value is generated text
         assets[platform] = generated_text
 
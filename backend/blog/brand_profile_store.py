@@ -0,0 +1,175 @@
+"""
+Persistent brand profiles for the blog workflow.
+
+``brand_context_research`` summarises the same handful of brands over and
+over. Profiles are stored in SQLite, keyed by a normalised brand name plus a
+hash of the brand voice, and reused until they are older than the freshness
+window (``BRAND_PROFILE_TTL_DAYS``). Profiles can be refreshed explicitly or
+warmed up in the background when a brand voice is saved.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+from common.deadline import outside_request
+from common.metrics import record_cache
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "brand_profiles.sqlite3"
+DEFAULT_TTL_DAYS = 30.0
+WARM_UP_WORKERS = 2
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS brand_profiles (
+    profile_key TEXT PRIMARY KEY,
+    brand_name TEXT NOT NULL,
+    voice_hash TEXT NOT NULL,
+    profile TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    refreshed_at REAL NOT NULL
+);
+"""
+
+
+def normalize_brand_name(brand_name: str) -> str:
+    """Case, whitespace and punctuation-insensitive brand name."""
+    cleaned = re.sub(r"[^\w\s]", " ", brand_name or "").lower()
+    return " ".join(cleaned.split())
+
+
+def hash_brand_voice(brand_voice: str) -> str:
+    normalized = " ".join((brand_voice or "").lower().split())
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest()[:16]
+
+
+def profile_key(brand_name: str, brand_voice: str) -> str:
+    name_hash = hashlib.sha256(normalize_brand_name(brand_name).encode("utf-8")).hexdigest()[:16]
+    return f"{name_hash}:{hash_brand_voice(brand_voice)}"
+
+
+@dataclass
+class BrandProfile:
+    key: str
+    brand_name: str
+    profile: str
+    created_at: float
+    refreshed_at: float
+
+    def age_seconds(self, now: Optional[float] = None) -> float:
+        return (now or time.time()) - self.refreshed_at
+
+    def to_dict(self) -> Dict[str, object]:
+        return {
+            "key": self.key,
+            "brand_name": self.brand_name,
+            "profile": self.profile,
+            "created_at": self.created_at,
+            "refreshed_at": self.refreshed_at,
+        }
+
+
+class BrandProfileStore:
+    """SQLite-backed cache of brand research keyed by brand name and voice."""
+
+    def __init__(self, path: Optional[str] = None, ttl_days: Optional[float] = None) -> None:
+        self.path = Path(path or os.getenv("BRAND_PROFILE_DB_PATH") or DEFAULT_DB_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = 86400 * (
+            ttl_days if ttl_days is not None
+            else float(os.getenv("BRAND_PROFILE_TTL_DAYS", DEFAULT_TTL_DAYS))
+        )
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def get(self, brand_name: str, brand_voice: str) -> Optional[BrandProfile]:
+        key = profile_key(brand_name, brand_voice)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT profile_key, brand_name, profile, created_at, refreshed_at"
+                " FROM brand_profiles WHERE profile_key = ?",
+                (key,),
+            ).fetchone()
+        return BrandProfile(*row) if row else None
+
+    def is_fresh(self, profile: BrandProfile) -> bool:
+        return profile.age_seconds() < self.ttl_seconds
+
+    def save(self, brand_name: str, brand_voice: str, profile: str) -> BrandProfile:
+        key = profile_key(brand_name, brand_voice)
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO brand_profiles (profile_key, brand_name, voice_hash, profile,"
+                " created_at, refreshed_at) VALUES (?, ?, ?, ?, ?, ?)"
+                " ON CONFLICT(profile_key) DO UPDATE SET profile = excluded.profile,"
+                " refreshed_at = excluded.refreshed_at",
+                (key, brand_name, hash_brand_voice(brand_voice), profile, now, now),
+            )
+        return self.get(brand_name, brand_voice)
+
+    def get_or_create(
+        self,
+        brand_name: str,
+        brand_voice: str,
+        research: Callable[[str, str], str],
+        *,
+        force_refresh: bool = False,
+    ) -> BrandProfile:
+        """Return a fresh stored profile, running ``research`` only when needed.
+
+        Concurrent callers for the same brand wait on a per-key lock so the
+        research call runs once.
+        """
+        key = profile_key(brand_name, brand_voice)
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        with key_lock:
+            existing = self.get(brand_name, brand_voice)
+            if existing and not force_refresh and self.is_fresh(existing):
+                record_cache("blog.brand_profiles", hits=1)
+                return existing
+            record_cache("blog.brand_profiles", misses=1)
+            return self.save(brand_name, brand_voice, research(brand_name, brand_voice))
+
+    def warm_up(self, brand_name: str, brand_voice: str, research: Callable[[str, str], str]) -> Future:
+        """Run ``get_or_create`` in the background, outside the calling request's context."""
+        task = outside_request(self.get_or_create)
+        return _warm_up_executor().submit(task, brand_name, brand_voice, research)
+
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _warm_up_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=WARM_UP_WORKERS, thread_name_prefix="brand-warm-up")
+    return _executor
+
+
+_store: Optional[BrandProfileStore] = None
+_store_lock = threading.Lock()
+
+
+def get_brand_profile_store() -> BrandProfileStore:
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BrandProfileStore()
+    return _store
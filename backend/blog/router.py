@@ -1,10 +1,12 @@
-import uuid
-
 from fastapi import APIRouter, HTTPException, Request
 from pydantic import BaseModel
 
-from .agent_blog_workflow import BlogWorkflowAgent
-from .blog_workflow_model import generate
+from api.agent_manager import AgentUnavailableError, agent_manager, retry_headers
+from common.deadline import DeadlineExceeded
+from common.threads import resolve_thread_id
+from llm import CascadeStep, all_of, degraded_run, forbid, full_quality, word_range
+
+from .brand_profile_store import get_brand_profile_store
 
 # -------------------------------
 # Normalize frontend input
@@ -40,8 +42,12 @@ def normalize_input(payload: dict) -> dict:
 
 router = APIRouter(tags=["Blog"])
 
-agent = BlogWorkflowAgent()
-agent.compile()
+
+# A single paragraph of 20-160 words without meta commentary; 8B first.
+IMAGE_PROMPT_CASCADE = CascadeStep(
+    "blog.image_prompt",
+    all_of(word_range(20, 160), forbid("prompt:", "here is", "here's")),
+)
 
 
 class ImagePromptRequest(BaseModel):
@@ -52,6 +58,37 @@ class ImagePromptRequest(BaseModel):
     audience: str = ""
 
 
+class BrandProfileRequest(BaseModel):
+    brand_name: str = ""
+    brand_voice: str = ""
+
+
+async def run_blog_workflow(payload: dict, on_progress=None) -> dict:
+    """Normalize a frontend payload and run the blog workflow (shared with the job queue)."""
+    # Reusing a threadId resumes a failed run from its checkpoint
+    thread_id = resolve_thread_id(payload)
+    payload["threadId"] = thread_id
+
+    normalized_payload = normalize_input(payload)
+    normalized_payload["threadId"] = payload["threadId"]
+    print("Normalized payload:", normalized_payload)  # Debug log
+
+    async with agent_manager.alease("blog") as agent:
+        result = await agent.ainvoke(
+            normalized_payload, thread_id=thread_id, on_progress=on_progress
+        )
+
+    return {
+        "status": "success",
+        "threadId": thread_id,
+        "degraded": result.get("degraded", False),
+        "generated_blog": result.get("data", {}).get(
+            "formatted_blog", "No draft generated"
+        ),
+        "received_data": normalized_payload,
+    }
+
+
 @router.post("/generate-blog")
 async def generate_blog(request: Request):
     """Receives frontend JSON, normalizes it, and runs the blog workflow."""
@@ -59,24 +96,12 @@ async def generate_blog(request: Request):
         payload = await request.json()
         print("Received payload:", payload)  # Debug log
 
-        thread_id = str(uuid.uuid4())
-        payload["threadId"] = thread_id
-
-        normalized_payload = normalize_input(payload)
-        normalized_payload["threadId"] = payload["threadId"]
-        print("Normalized payload:", normalized_payload)  # Debug log
-
-        result = await agent.ainvoke(normalized_payload)
-
-        return {
-            "status": "success",
-            "threadId": thread_id,
-            "generated_blog": result.get("data", {}).get(
-                "formatted_blog", "No draft generated"
-            ),
-            "received_data": normalized_payload,
-        }
+        return await run_blog_workflow(payload)
 
+    except AgentUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_headers(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -84,6 +109,8 @@ async def generate_blog(request: Request):
 @router.post("/image-prompt")
 def craft_image_prompt(payload: ImagePromptRequest):
     """Use the Groq LLM to craft an SDXL-friendly prompt from the blog context."""
+    from .blog_workflow_model import generate_cascade
+
     try:
         template = f"""
         You are a creative director crafting prompts for SDXL image generation.
@@ -103,7 +130,48 @@ def craft_image_prompt(payload: ImagePromptRequest):
         Write a single paragraph prompt describing the imagery, camera details, mood, lighting, and colors.
         Do not exceed 120 words. Avoid mentioning 'prompt' or referencing the instructions.
     """
-        prompt_text = generate(template, max_tokens=256, temperature=0.6)
-        return {"image_prompt": prompt_text.strip()}
+        with degraded_run() as degraded:
+            prompt_text = generate_cascade(
+                IMAGE_PROMPT_CASCADE, template, max_tokens=256, temperature=0.6
+            )
+        return {"image_prompt": prompt_text.strip(), "degraded": degraded}
+    except Exception as exc:
+        raise HTTPException(status_code=500, detail=str(exc))
+
+
+def _research_brand_in_background(brand_name: str, brand_voice: str) -> str:
+    from .blog_workflow_model import research_brand
+
+    # No request waits on the warm-up, so keep the full model for the stored profile.
+    with full_quality():
+        return research_brand(brand_name, brand_voice)
+
+
+@router.post("/brand-profiles", status_code=202)
+def save_brand_voice(payload: BrandProfileRequest):
+    """Warm the brand profile when a brand voice is saved, so the next blog run skips research."""
+    name = payload.brand_name or payload.brand_voice
+    store = get_brand_profile_store()
+    existing = store.get(name, payload.brand_voice)
+    if existing and store.is_fresh(existing):
+        return {"status": "ready", "profile": existing.to_dict()}
+
+    store.warm_up(name, payload.brand_voice, _research_brand_in_background)
+    return {"status": "warming"}
+
+
+@router.post("/brand-profiles/refresh")
+def refresh_brand_profile(payload: BrandProfileRequest):
+    """Force a new brand research run and replace the stored profile."""
+    from .blog_workflow_model import research_brand
+
+    try:
+        profile = get_brand_profile_store().get_or_create(
+            payload.brand_name or payload.brand_voice,
+            payload.brand_voice,
+            research_brand,
+            force_refresh=True,
+        )
+        return {"status": "success", "profile": profile.to_dict()}
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
@@ -0,0 +1,248 @@
+"""
+Admission control for the workflow endpoints.
+
+Without a limit, a burst of ``/generate-blog`` requests filled the threadpool
+and the upstream connection pool until every request timed out together.
+Each governed endpoint now gets a number of concurrent slots and a bounded
+wait queue:
+
+* a request that finds the queue full is rejected at once with ``429``;
+* a request that waits longer than the queue timeout gets ``503``;
+* both carry ``Retry-After``, estimated from the endpoint's recent run time.
+
+A global in-flight cap, kept below the threadpool size, leaves threads for
+everything else. ``/``, ``/ping`` and ``/health*`` are never queued.
+
+``ADMISSION_LIMITS="/generate-blog=4:8,/x-post/ideas=8:16"`` overrides the
+per-endpoint ``concurrency:queue`` defaults. ``ADMISSION_MAX_INFLIGHT`` and
+``ADMISSION_QUEUE_TIMEOUT_SECONDS`` tune the global cap and the wait.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_LIMITS: Dict[str, Tuple[int, int]] = {
+    "/generate-blog": (4, 8),
+    "/generate-news-article": (4, 8),
+    "/generate-youtube-script": (4, 8),
+    "/youtube-blog": (4, 8),
+    "/repurpose-article": (2, 8),
+    "/repurpose-article/stream": (2, 8),
+    "/generate-visual-post": (2, 4),
+    "/x-post/generate": (4, 8),
+    "/x-post/generate/stream": (4, 8),
+    "/x-post/ideas": (8, 16),
+    "/image-prompt": (8, 16),
+    "/brand-profiles/refresh": (2, 4),
+}
+EXEMPT_PATHS = ("/", "/ping", "/health", "/metrics")
+EXEMPT_PREFIXES = ("/health/",)
+
+# Stay below the default AnyIO threadpool (40 threads) used by sync endpoints.
+DEFAULT_MAX_INFLIGHT = 24
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 10.0
+DEFAULT_RUN_SECONDS = 10.0
+MAX_RETRY_AFTER_SECONDS = 120
+
+
+def parse_limits(setting: str) -> Dict[str, Tuple[int, int]]:
+    """Parse ``"/path=concurrency:queue,..."``; a missing queue size means no queue."""
+    limits: Dict[str, Tuple[int, int]] = {}
+    for item in setting.split(","):
+        path, _, value = item.strip().partition("=")
+        concurrency, _, queue = value.partition(":")
+        if path and concurrency.strip().isdigit():
+            limits[path.rstrip("/") or "/"] = (
+                max(1, int(concurrency)),
+                int(queue) if queue.strip().isdigit() else 0,
+            )
+    return limits
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class EndpointLimiter:
+    """Concurrency slots plus a bounded wait queue for one endpoint."""
+
+    def __init__(self, name: str, max_concurrent: int, max_queue: int) -> None:
+        self.name = name
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.rejected_429 = 0
+        self.rejected_503 = 0
+        # Moving average of run time, used to estimate Retry-After.
+        self.avg_seconds = DEFAULT_RUN_SECONDS
+
+    def retry_after(self) -> int:
+        backlog = (self.waiting + self.in_flight) / self.max_concurrent
+        return max(1, min(MAX_RETRY_AFTER_SECONDS, math.ceil(self.avg_seconds * max(backlog, 1))))
+
+    async def acquire(self, timeout: float) -> None:
+        if self._semaphore.locked():
+            if self.waiting >= self.max_queue:
+                self.rejected_429 += 1
+                raise Rejected(
+                    429,
+                    f"Too many queued requests for {self.name}; try again later.",
+                    self.retry_after(),
+                )
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout)
+            except asyncio.TimeoutError:
+                self.rejected_503 += 1
+                raise Rejected(
+                    503,
+                    f"{self.name} is at capacity; try again later.",
+                    self.retry_after(),
+                ) from None
+            finally:
+                self.waiting -= 1
+        else:
+            await self._semaphore.acquire()
+        self.in_flight += 1
+        self.admitted += 1
+
+    def release(self, seconds: Optional[float] = None) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+        if seconds is not None:
+            self.avg_seconds = 0.8 * self.avg_seconds + 0.2 * seconds
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "max_concurrent": self.max_concurrent,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "admitted": self.admitted,
+            "rejected_429": self.rejected_429,
+            "rejected_503": self.rejected_503,
+            "avg_seconds": round(self.avg_seconds, 3),
+        }
+
+
+class AdmissionController:
+    """Per-endpoint limiters plus a global in-flight cap."""
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, Tuple[int, int]]] = None,
+        max_inflight: Optional[int] = None,
+        queue_timeout: Optional[float] = None,
+    ) -> None:
+        limits = limits if limits is not None else {
+            **DEFAULT_LIMITS,
+            **parse_limits(os.getenv("ADMISSION_LIMITS", "")),
+        }
+        max_inflight = max_inflight or int(os.getenv("ADMISSION_MAX_INFLIGHT", DEFAULT_MAX_INFLIGHT))
+        self.queue_timeout = (
+            queue_timeout
+            if queue_timeout is not None
+            else float(os.getenv("ADMISSION_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS))
+        )
+        self.endpoints = {
+            path: EndpointLimiter(path, concurrency, queue)
+            for path, (concurrency, queue) in limits.items()
+        }
+        self.total = EndpointLimiter("the server", max_inflight, max_inflight * 2)
+
+    @staticmethod
+    def is_exempt(path: str) -> bool:
+        return path in EXEMPT_PATHS or path.startswith(EXEMPT_PREFIXES)
+
+    def limiter_for(self, path: str) -> Optional[EndpointLimiter]:
+        path = path.rstrip("/") or "/"
+        if self.is_exempt(path):
+            return None
+        return self.endpoints.get(path)
+
+    async def admit(self, limiter: EndpointLimiter) -> None:
+        """Take an endpoint slot, then a global one, within one queue timeout."""
+        deadline = time.monotonic() + self.queue_timeout
+        await limiter.acquire(self.queue_timeout)
+        try:
+            await self.total.acquire(max(0.0, deadline - time.monotonic()))
+        except Rejected:
+            limiter.release()
+            raise
+
+    def release(self, limiter: EndpointLimiter, seconds: float) -> None:
+        self.total.release()
+        limiter.release(seconds)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "queue_timeout_seconds": self.queue_timeout,
+            "total": self.total.snapshot(),
+            "endpoints": {path: limiter.snapshot() for path, limiter in self.endpoints.items()},
+        }
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware applying ``AdmissionController`` to incoming HTTP requests.
+
+    The slot is held until the response body has been sent, so streaming
+    endpoints count against their limit for the whole stream.
+    """
+
+    def __init__(self, app, controller: Optional[AdmissionController] = None) -> None:
+        self.app = app
+        self.controller = controller or admission_controller
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http" or scope["method"] == "OPTIONS":
+            await self.app(scope, receive, send)
+            return
+        limiter = self.controller.limiter_for(scope["path"])
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        try:
+            await self.controller.admit(limiter)
+        except Rejected as rejection:
+            await _send_rejection(send, rejection)
+            return
+
+        started = time.monotonic()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release(limiter, time.monotonic() - started)
+
+
+async def _send_rejection(send, rejection: Rejected) -> None:
+    body = json.dumps({"detail": rejection.detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(rejection.retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+# Shared controller used by main.py and reported by /health/admission
+admission_controller = AdmissionController()
@@ -0,0 +1,384 @@
+"""
+Durable LangGraph checkpointing.
+
+Every workflow graph is compiled with a SQLite-backed checkpointer keyed by
+the request's ``threadId``. When a node fails (for example a 429 from Groq
+in ``repurpose_social_assets``), retrying with the same ``threadId`` resumes
+from the last completed node instead of paying for the whole run again.
+
+Only ``langgraph-checkpoint`` is installed, so the saver is implemented here
+on top of ``BaseCheckpointSaver``. Checkpoints and pending writes are stored
+with the saver's default ``JsonPlusSerializer``, which encodes values with
+ormsgpack.
+
+States can be large (the visual post workflow carries a base64 image), so
+only the latest checkpoint of each thread is kept, and threads untouched
+for ``CHECKPOINT_TTL_HOURS`` (default 72) are deleted.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional, Sequence, Tuple
+
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+)
+
+from .graph import ProgressCallback, UpdateCallback, run_graph
+from .threads import resolve_thread_id  # noqa: F401  (re-exported for existing callers)
+from .threads import reusing_finished_runs
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "checkpoints.sqlite3"
+DEFAULT_TTL_HOURS = 72.0
+PRUNE_INTERVAL_SECONDS = 3600.0
+# Progress step reported when a finished thread's stored result is returned.
+STORED_RESULT_STEP = "stored_result"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS checkpoints (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    parent_checkpoint_id TEXT,
+    type TEXT,
+    checkpoint BLOB,
+    metadata_type TEXT,
+    metadata BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id)
+);
+CREATE TABLE IF NOT EXISTS writes (
+    thread_id TEXT NOT NULL,
+    checkpoint_ns TEXT NOT NULL DEFAULT '',
+    checkpoint_id TEXT NOT NULL,
+    task_id TEXT NOT NULL,
+    task_path TEXT NOT NULL DEFAULT '',
+    idx INTEGER NOT NULL,
+    channel TEXT NOT NULL,
+    type TEXT,
+    value BLOB,
+    PRIMARY KEY (thread_id, checkpoint_ns, checkpoint_id, task_id, idx)
+);
+CREATE TABLE IF NOT EXISTS threads (
+    thread_id TEXT PRIMARY KEY,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver):
+    """Synchronous, thread-safe SQLite checkpointer for LangGraph."""
+
+    def __init__(
+        self, path: Optional[str] = None, *, serde: Any = None, ttl_hours: Optional[float] = None
+    ) -> None:
+        super().__init__(serde=serde)
+        self.path = Path(path or os.getenv("CHECKPOINT_DB_PATH") or DEFAULT_DB_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = 3600 * (
+            ttl_hours if ttl_hours is not None else float(os.getenv("CHECKPOINT_TTL_HOURS", DEFAULT_TTL_HOURS))
+        )
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        with self._conn:
+            # Databases written before thread tracking start their TTL now.
+            self._conn.execute(
+                "INSERT OR IGNORE INTO threads (thread_id, updated_at)"
+                " SELECT DISTINCT thread_id, ? FROM checkpoints",
+                (time.time(),),
+            )
+        self.prune()
+
+    # ------------------------------------------------------------------ #
+    # Reads
+    # ------------------------------------------------------------------ #
+    def get_tuple(self, config: Dict[str, Any]) -> Optional[CheckpointTuple]:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_id = configurable.get("checkpoint_id")
+
+        with self._lock:
+            if checkpoint_id:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+                    " FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = self._conn.execute(
+                    "SELECT checkpoint_id, parent_checkpoint_id, type, checkpoint, metadata_type, metadata"
+                    " FROM checkpoints WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " ORDER BY checkpoint_id DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            if row is None:
+                return None
+            writes = self._conn.execute(
+                "SELECT task_id, channel, type, value FROM writes"
+                " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+                " ORDER BY task_id, idx",
+                (thread_id, checkpoint_ns, row[0]),
+            ).fetchall()
+
+        return self._to_tuple(thread_id, checkpoint_ns, row, writes)
+
+    def list(
+        self,
+        config: Optional[Dict[str, Any]],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[Dict[str, Any]] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        clauses, params = [], []
+        if config:
+            clauses.append("thread_id = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("checkpoint_ns = ?")
+                params.append(checkpoint_ns)
+        if before:
+            clauses.append("checkpoint_id < ?")
+            params.append(before["configurable"]["checkpoint_id"])
+
+        query = (
+            "SELECT thread_id, checkpoint_ns, checkpoint_id, parent_checkpoint_id,"
+            " type, checkpoint, metadata_type, metadata FROM checkpoints"
+        )
+        if clauses:
+            query += " WHERE " + " AND ".join(clauses)
+        query += " ORDER BY checkpoint_id DESC"
+
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+
+        yielded = 0
+        for thread_id, checkpoint_ns, *row in rows:
+            with self._lock:
+                writes = self._conn.execute(
+                    "SELECT task_id, channel, type, value FROM writes"
+                    " WHERE thread_id = ? AND checkpoint_ns = ? AND checkpoint_id = ?"
+                    " ORDER BY task_id, idx",
+                    (thread_id, checkpoint_ns, row[0]),
+                ).fetchall()
+            checkpoint_tuple = self._to_tuple(thread_id, checkpoint_ns, row, writes)
+            if filter and any(
+                checkpoint_tuple.metadata.get(key) != value for key, value in filter.items()
+            ):
+                continue
+            yield checkpoint_tuple
+            yielded += 1
+            if limit is not None and yielded >= limit:
+                return
+
+    # ------------------------------------------------------------------ #
+    # Writes
+    # ------------------------------------------------------------------ #
+    def put(
+        self,
+        config: Dict[str, Any],
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> Dict[str, Any]:
+        configurable = config["configurable"]
+        thread_id = configurable["thread_id"]
+        checkpoint_ns = configurable.get("checkpoint_ns", "")
+        checkpoint_type, checkpoint_blob = self.serde.dumps_typed(checkpoint)
+        metadata_type, metadata_blob = self.serde.dumps_typed(dict(metadata))
+
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO checkpoints (thread_id, checkpoint_ns, checkpoint_id,"
+                " parent_checkpoint_id, type, checkpoint, metadata_type, metadata)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    configurable.get("checkpoint_id"),
+                    checkpoint_type,
+                    checkpoint_blob,
+                    metadata_type,
+                    metadata_blob,
+                ),
+            )
+            # Resuming only needs the latest checkpoint and its pending writes;
+            # the writes of older ones are already folded into it.
+            for table in ("checkpoints", "writes"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE thread_id = ? AND checkpoint_ns = ?"
+                    " AND checkpoint_id < ?",
+                    (thread_id, checkpoint_ns, checkpoint["id"]),
+                )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO threads (thread_id, updated_at) VALUES (?, ?)",
+                (thread_id, time.time()),
+            )
+        if time.time() - self._last_prune > PRUNE_INTERVAL_SECONDS:
+            self.prune()
+        return {
+            "configurable": {
+                "thread_id": thread_id,
+                "checkpoint_ns": checkpoint_ns,
+                "checkpoint_id": checkpoint["id"],
+            }
+        }
+
+    def put_writes(
+        self,
+        config: Dict[str, Any],
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        configurable = config["configurable"]
+        # Special channels (errors, interrupts) overwrite; regular writes are kept once.
+        verb = (
+            "INSERT OR REPLACE"
+            if all(channel in WRITES_IDX_MAP for channel, _ in writes)
+            else "INSERT OR IGNORE"
+        )
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            value_type, value_blob = self.serde.dumps_typed(value)
+            rows.append(
+                (
+                    configurable["thread_id"],
+                    configurable.get("checkpoint_ns", ""),
+                    configurable["checkpoint_id"],
+                    task_id,
+                    task_path,
+                    WRITES_IDX_MAP.get(channel, idx),
+                    channel,
+                    value_type,
+                    value_blob,
+                )
+            )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"{verb} INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id,"
+                " task_path, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def delete_thread(self, thread_id: str) -> None:
+        with self._lock, self._conn:
+            for table in ("checkpoints", "writes", "threads"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id = ?", (thread_id,))
+
+    def prune(self, max_age_seconds: Optional[float] = None) -> int:
+        """Delete threads not written for ``max_age_seconds`` (the TTL); returns how many."""
+        max_age = self.ttl_seconds if max_age_seconds is None else max_age_seconds
+        cutoff = time.time() - max_age
+        with self._lock, self._conn:
+            self._last_prune = time.time()
+            stale = "SELECT thread_id FROM threads WHERE updated_at < ?"
+            for table in ("checkpoints", "writes"):
+                self._conn.execute(f"DELETE FROM {table} WHERE thread_id IN ({stale})", (cutoff,))
+            return self._conn.execute("DELETE FROM threads WHERE updated_at < ?", (cutoff,)).rowcount
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    # ------------------------------------------------------------------ #
+    def _to_tuple(
+        self, thread_id: str, checkpoint_ns: str, row: Sequence[Any], writes: Sequence[Any]
+    ) -> CheckpointTuple:
+        checkpoint_id, parent_id, checkpoint_type, checkpoint_blob, metadata_type, metadata_blob = row
+        return CheckpointTuple(
+            config={
+                "configurable": {
+                    "thread_id": thread_id,
+                    "checkpoint_ns": checkpoint_ns,
+                    "checkpoint_id": checkpoint_id,
+                }
+            },
+            checkpoint=self.serde.loads_typed((checkpoint_type, checkpoint_blob)),
+            metadata=self.serde.loads_typed((metadata_type, metadata_blob)),
+            parent_config=(
+                {
+                    "configurable": {
+                        "thread_id": thread_id,
+                        "checkpoint_ns": checkpoint_ns,
+                        "checkpoint_id": parent_id,
+                    }
+                }
+                if parent_id
+                else None
+            ),
+            pending_writes=[
+                (task_id, channel, self.serde.loads_typed((value_type, value_blob)))
+                for task_id, channel, value_type, value_blob in writes
+            ],
+        )
+
+
+_checkpointer: Optional[SqliteCheckpointSaver] = None
+_checkpointer_lock = threading.Lock()
+
+
+def get_checkpointer() -> SqliteCheckpointSaver:
+    """Process-wide checkpointer shared by every workflow graph."""
+    global _checkpointer
+    if _checkpointer is None:
+        with _checkpointer_lock:
+            if _checkpointer is None:
+                _checkpointer = SqliteCheckpointSaver()
+    return _checkpointer
+
+
+def _inputs_of(state: Any) -> Dict[str, Any]:
+    if hasattr(state, "model_dump"):
+        return state.model_dump(exclude_unset=True)
+    return {key: value for key, value in dict(state).items() if value is not None}
+
+
+def run_checkpointed(
+    app: Any,
+    state: Any,
+    thread_id: str,
+    on_progress: Optional[ProgressCallback] = None,
+    on_update: Optional[UpdateCallback] = None,
+    reuse_result: Optional[bool] = None,
+) -> Dict[str, Any]:
+    """Run a checkpointed graph, resuming a previous run of the thread if it failed.
+
+    * Same inputs, unfinished run: resume from the last completed node.
+    * Same inputs, finished run: start again, unless ``reuse_result`` (by
+      default ``common.threads.reuse_finished_runs``) asks for the stored
+      final state. Reuse is reported to ``on_progress`` as ``stored_result``.
+    * New thread or different inputs: start a fresh run.
+    """
+    if reuse_result is None:
+        reuse_result = reusing_finished_runs()
+    config = {"configurable": {"thread_id": thread_id}}
+    snapshot = app.get_state(config)
+
+    if snapshot.values:
+        previous = snapshot.values
+        same_inputs = all(previous.get(key) == value for key, value in _inputs_of(state).items())
+        if same_inputs and snapshot.next:
+            print(f"Resuming thread {thread_id} at {list(snapshot.next)}")
+            return run_graph(app, None, config, on_progress, on_update)
+        if same_inputs and reuse_result:
+            print(f"Thread {thread_id} already completed. Returning stored result.")
+            if on_progress is not None:
+                on_progress(STORED_RESULT_STEP)
+            return dict(previous)
+        app.checkpointer.delete_thread(thread_id)
+
+    return run_graph(app, state, config, on_progress, on_update)
@@ -0,0 +1,280 @@
+"""
+Request deadlines visible to every workflow node and LLM call.
+
+Nothing used to bound a workflow: the news graph could keep looping through
+compliance and revision, and the X-post loop could keep running rounds, long
+after the client had given up. ``DeadlineMiddleware`` now gives every request
+a deadline:
+
+* ``REQUEST_DEADLINE_SECONDS`` by default (180);
+* longer per-endpoint defaults where 180s is too short: longform YouTube
+  scripts and the SSE streams, whose runs are also cancelled when the client
+  disconnects (``REQUEST_DEADLINES="/youtube-blog=300"`` overrides them);
+* a client may ask for a different budget with ``X-Request-Timeout:
+  <seconds>``, up to ``REQUEST_DEADLINE_MAX_SECONDS`` or the endpoint's
+  default, whichever is larger.
+
+``/jobs`` is exempt: queued runs outlive the request that submitted them.
+
+The deadline is stored in a context variable. Starlette's threadpool and
+LangGraph's node threads copy it, and the repo's own worker pools wrap their
+tasks in ``in_request_context``, so code anywhere in the run can read it:
+
+* the shared LLM clients pass the remaining time as each call's ``timeout``,
+  and refuse to start a call once the deadline has passed;
+* ``time_short()`` lets optional steps (reviews, revisions, extra rounds)
+  give way when too little time is left;
+* when the client disconnects the deadline is cancelled, and no further
+  upstream call is started for that request.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+DEFAULT_DEADLINE_SECONDS = 180.0
+DEFAULT_MAX_DEADLINE_SECONDS = 600.0
+# Time an optional step must leave for the remaining required ones.
+DEFAULT_OPTIONAL_RESERVE_SECONDS = 30.0
+# Below this, an upstream call cannot finish; fail instead of starting it.
+MIN_CALL_SECONDS = 1.0
+TIMEOUT_HEADER = b"x-request-timeout"
+EXEMPT_PATHS = ("/", "/ping", "/health", "/metrics")
+EXEMPT_PREFIXES = ("/health/", "/jobs")
+# Endpoints whose runs routinely outlast the global default.
+DEFAULT_ENDPOINT_DEADLINES: Dict[str, float] = {
+    "/generate-youtube-script": 600.0,  # longform scripts draft and review per section
+    "/youtube-blog": 300.0,
+    "/repurpose-article/stream": 600.0,
+    "/x-post/generate/stream": 600.0,
+}
+
+
+class DeadlineExceeded(TimeoutError):
+    """Raised when a request has run out of time before an upstream call."""
+
+
+class RequestCancelled(DeadlineExceeded):
+    """Raised when the client went away; nobody will see the result."""
+
+
+class Deadline:
+    """Absolute deadline for one request, plus a cancellation flag."""
+
+    def __init__(self, seconds: float) -> None:
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+        self._cancelled = threading.Event()
+
+    def remaining(self) -> float:
+        return self.expires_at - time.monotonic()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def check(self, what: str = "request") -> None:
+        if self.cancelled:
+            raise RequestCancelled(f"Client disconnected; {what} cancelled.")
+        if self.remaining() <= 0:
+            raise DeadlineExceeded(f"Deadline of {self.seconds:.0f}s exceeded before {what}.")
+
+    def call_timeout(self, timeout: Optional[float] = None) -> float:
+        """Timeout for one upstream call: the remaining budget, capped by ``timeout``."""
+        self.check("the upstream call")
+        remaining = self.remaining()
+        if remaining < MIN_CALL_SECONDS:
+            raise DeadlineExceeded(
+                f"Only {remaining:.1f}s left of the {self.seconds:.0f}s deadline."
+            )
+        return min(timeout, remaining) if isinstance(timeout, (int, float)) else remaining
+
+
+_current: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar(
+    "request_deadline", default=None
+)
+
+
+# ---------------------------------------------------------------------------
+# Helpers used by agents, model modules and LLM clients
+# ---------------------------------------------------------------------------
+def current_deadline() -> Optional[Deadline]:
+    return _current.get()
+
+
+@contextmanager
+def deadline_scope(seconds: float) -> Iterator[Deadline]:
+    """Run the block under a deadline ``seconds`` from now (or the outer one, if sooner)."""
+    deadline = Deadline(seconds)
+    outer = _current.get()
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = _current.set(deadline)
+    try:
+        yield deadline
+    finally:
+        _current.reset(token)
+
+
+def check_deadline(what: str = "request") -> None:
+    deadline = _current.get()
+    if deadline is not None:
+        deadline.check(what)
+
+
+def in_request_context(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``fn`` for a worker pool so it sees the caller's deadline (and other context)."""
+    context = contextvars.copy_context()
+    return lambda *args: context.copy().run(fn, *args)
+
+
+def outside_request(fn: Callable[..., Any]) -> Callable[..., Any]:
+    """Wrap ``fn`` for work that outlives the request, such as background warm-ups.
+
+    It runs in a fresh context: no deadline (the request's one is cancelled once
+    the client disconnects), usage ledger or per-run flags.
+    """
+
+    def run(*args: Any) -> Any:
+        return contextvars.Context().run(_without_deadline, fn, *args)
+
+    return run
+
+
+def _without_deadline(fn: Callable[..., Any], *args: Any) -> Any:
+    _current.set(None)
+    return fn(*args)
+
+
+def time_short(reserve: Optional[float] = None) -> bool:
+    """True when an optional step should be skipped to protect the deadline."""
+    deadline = _current.get()
+    if deadline is None:
+        return False
+    if reserve is None:
+        reserve = float(os.getenv("DEADLINE_OPTIONAL_RESERVE_SECONDS", DEFAULT_OPTIONAL_RESERVE_SECONDS))
+    return deadline.cancelled or deadline.remaining() < reserve
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+def parse_deadlines(setting: str) -> Dict[str, float]:
+    """Parse ``"/path=seconds,..."`` into per-endpoint default deadlines."""
+    deadlines: Dict[str, float] = {}
+    for item in setting.split(","):
+        path, _, value = item.strip().partition("=")
+        try:
+            seconds = float(value)
+        except ValueError:
+            continue
+        if path and seconds > 0:
+            deadlines[path.rstrip("/") or "/"] = seconds
+    return deadlines
+
+
+def _requested_seconds(scope, endpoint_default: Optional[float] = None) -> float:
+    default = float(os.getenv("REQUEST_DEADLINE_SECONDS", DEFAULT_DEADLINE_SECONDS))
+    maximum = float(os.getenv("REQUEST_DEADLINE_MAX_SECONDS", DEFAULT_MAX_DEADLINE_SECONDS))
+    if endpoint_default is not None:
+        default = endpoint_default
+        maximum = max(maximum, endpoint_default)
+    for name, value in scope.get("headers", ()):
+        if name == TIMEOUT_HEADER:
+            try:
+                requested = float(value.decode("latin-1"))
+            except ValueError:
+                break
+            if requested > 0:
+                return min(requested, maximum)
+    return min(default, maximum)
+
+
+class DeadlineMiddleware:
+    """Attach a ``Deadline`` to each HTTP request and cancel it on client disconnect.
+
+    Once the app has read the request body, the middleware listens for
+    ``http.disconnect`` itself and replays it to the app if it asks. The
+    disconnect servers send after a complete response is not a cancellation:
+    background tasks that run after the response keep a live deadline.
+    """
+
+    def __init__(self, app, deadlines: Optional[Dict[str, float]] = None) -> None:
+        self.app = app
+        self.deadlines = (
+            deadlines
+            if deadlines is not None
+            else {
+                **DEFAULT_ENDPOINT_DEADLINES,
+                **parse_deadlines(os.getenv("REQUEST_DEADLINES", "")),
+            }
+        )
+
+    async def __call__(self, scope, receive, send) -> None:
+        path = scope.get("path", "")
+        if (
+            scope["type"] != "http"
+            or path in EXEMPT_PATHS
+            or path.startswith(EXEMPT_PREFIXES)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        deadline = Deadline(
+            _requested_seconds(scope, self.deadlines.get(path.rstrip("/") or "/"))
+        )
+        disconnected = asyncio.Event()
+        watcher: Optional[asyncio.Task] = None
+        responded = False
+
+        def client_gone() -> None:
+            # Servers also report http.disconnect once the response is complete;
+            # only a disconnect before that is an abort.
+            if not responded:
+                deadline.cancel()
+            disconnected.set()
+
+        async def watch_disconnect() -> None:
+            while True:
+                message = await receive()
+                if message["type"] == "http.disconnect":
+                    client_gone()
+                    return
+
+        async def wrapped_receive():
+            nonlocal watcher
+            if watcher is not None:
+                await disconnected.wait()
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                client_gone()
+            elif not message.get("more_body", False) and not responded:
+                watcher = asyncio.create_task(watch_disconnect())
+            return message
+
+        async def wrapped_send(message) -> None:
+            nonlocal responded
+            await send(message)
+            if message["type"] == "http.response.body" and not message.get("more_body", False):
+                # Background tasks run after this under the same context; keep their deadline.
+                responded = True
+                if watcher is not None:
+                    watcher.cancel()
+
+        token = _current.set(deadline)
+        try:
+            await self.app(scope, wrapped_receive, wrapped_send)
+        finally:
+            _current.reset(token)
+            if watcher is not None:
+                watcher.cancel()
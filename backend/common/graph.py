@@ -0,0 +1,86 @@
+"""Helpers for running compiled LangGraph workflows."""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Callable, Dict, Optional
+
+from .metrics import node_seconds
+
+ProgressCallback = Callable[[str], None]
+UpdateCallback = Callable[[str, Dict[str, Any]], None]
+
+_node_timer_class = None
+
+
+def _node_timer() -> Any:
+    """Callback handler timing each LangGraph node into ``workflow_node_duration_seconds``.
+
+    Defined on first use so importing this module does not load langchain_core.
+    """
+    global _node_timer_class
+    if _node_timer_class is None:
+        from langchain_core.callbacks import BaseCallbackHandler
+
+        from llm.usage import current_workflow
+
+        class NodeTimer(BaseCallbackHandler):
+            def __init__(self) -> None:
+                self.workflow = current_workflow()
+                self.started: Dict[Any, tuple] = {}
+
+            def on_chain_start(self, serialized, inputs, *, run_id, metadata=None, **kwargs):
+                node = (metadata or {}).get("langgraph_node")
+                # Only the node's own run, not the runnables nested inside it.
+                if node and kwargs.get("name") == node:
+                    self.started[run_id] = (node, time.perf_counter())
+
+            def _finish(self, run_id, outcome: str) -> None:
+                started = self.started.pop(run_id, None)
+                if started is not None:
+                    node, at = started
+                    node_seconds.observe(
+                        time.perf_counter() - at, workflow=self.workflow, node=node, outcome=outcome
+                    )
+
+            def on_chain_end(self, outputs, *, run_id, **kwargs):
+                self._finish(run_id, "ok")
+
+            def on_chain_error(self, error, *, run_id, **kwargs):
+                self._finish(run_id, "error")
+
+        _node_timer_class = NodeTimer
+    return _node_timer_class()
+
+
+def run_graph(
+    app: Any,
+    state: Any,
+    config: Optional[Dict[str, Any]] = None,
+    on_progress: Optional[ProgressCallback] = None,
+    on_update: Optional[UpdateCallback] = None,
+) -> Dict[str, Any]:
+    """Run a compiled graph and report each finished node to ``on_progress``.
+
+    Without a callback this is a plain ``invoke``. With one, the graph is
+    streamed so callers (e.g. the job queue) can surface node-level progress
+    while still receiving the final state. ``on_update`` additionally gets
+    the state fields each node wrote, as soon as that node finishes.
+    Node latencies are recorded in ``common.metrics``.
+    """
+    config = dict(config or {})
+    config["callbacks"] = [*(config.get("callbacks") or []), _node_timer()]
+    if on_progress is None and on_update is None:
+        return app.invoke(state, config)
+
+    final_state: Dict[str, Any] = {}
+    for mode, chunk in app.stream(state, config, stream_mode=["updates", "values"]):
+        if mode == "updates":
+            for node, update in chunk.items():
+                if on_progress is not None:
+                    on_progress(node)
+                if on_update is not None:
+                    on_update(node, update or {})
+        else:
+            final_state = chunk
+    return final_state
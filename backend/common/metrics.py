@@ -0,0 +1,425 @@
+"""
+Prometheus-style metrics without extra dependencies.
+
+Until now the only performance signal was ``print`` output. Counters, gauges
+and histograms defined here are served in the Prometheus text format by
+``GET /metrics``.
+
+Recording is cheap and safe from any thread. Each thread adds to its own
+shard of a metric, so the hot path takes no lock. Shards are summed when
+``/metrics`` is scraped, and shards of finished threads are folded into a
+retired total. Values that already live elsewhere (admission queues, agent
+leases, token usage...) are read at scrape time through ``Registry.callback``
+rather than being counted twice.
+
+The shared metrics below cover HTTP endpoints, LangGraph nodes, upstream
+calls (LLM models, Tavily, the caption endpoint, yt-dlp), cache lookups and
+upstream errors. ``EventLoopLagMonitor`` samples event-loop lag.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import math
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+LabelValues = Tuple[str, ...]
+Samples = Iterable[Tuple[LabelValues, float]]
+
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    pairs = ",".join(f'{name}="{_escape(value)}"' for name, value in zip(names, values))
+    return "{" + pairs + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Shards:
+    """Per-thread ``label values -> slots`` maps, merged when collected."""
+
+    def __init__(self, size: int) -> None:
+        self.size = size
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._shards: List[Tuple[threading.Thread, Dict[LabelValues, List[float]]]] = []
+        self._retired: Dict[LabelValues, List[float]] = {}
+
+    def slots(self, key: LabelValues) -> List[float]:
+        """This thread's slots for ``key``; only the owning thread writes them."""
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append((threading.current_thread(), shard))
+        slots = shard.get(key)
+        if slots is None:
+            slots = shard[key] = [0.0] * self.size
+        return slots
+
+    def collect(self) -> Dict[LabelValues, List[float]]:
+        with self._lock:
+            totals = {key: list(slots) for key, slots in self._retired.items()}
+            alive = []
+            for thread, shard in self._shards:
+                finished = not thread.is_alive()
+                for key, slots in list(shard.items()):
+                    merged = totals.setdefault(key, [0.0] * self.size)
+                    retired = self._retired.setdefault(key, [0.0] * self.size) if finished else None
+                    for index, value in enumerate(slots):
+                        merged[index] += value
+                        if retired is not None:
+                            retired[index] += value
+                if not finished:
+                    alive.append((thread, shard))
+            self._shards = alive
+        return totals
+
+
+class Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (), size: int = 1):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._shards = _Shards(size)
+
+    def _key(self, labels: Dict[str, object]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, slots in sorted(self._shards.collect().items()):
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(slots[0])}")
+        return lines
+
+
+class Counter(Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        self._shards.slots(self._key(labels))[0] += amount
+
+    def values(self) -> Dict[LabelValues, float]:
+        return {key: slots[0] for key, slots in self._shards.collect().items()}
+
+
+class Gauge(Metric):
+    """Up/down gauge (in-flight work); increments and decrements may come from different threads."""
+
+    kind = "gauge"
+
+    def inc(self, amount: float = 1.0, **labels: object) -> None:
+        self._shards.slots(self._key(labels))[0] += amount
+
+    def dec(self, amount: float = 1.0, **labels: object) -> None:
+        self._shards.slots(self._key(labels))[0] -= amount
+
+    @contextmanager
+    def track(self, **labels: object) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        self.buckets = tuple(sorted(buckets))
+        # One slot per bucket, one for +Inf, then the sum.
+        super().__init__(name, documentation, labelnames, size=len(self.buckets) + 2)
+
+    def observe(self, value: float, **labels: object) -> None:
+        slots = self._shards.slots(self._key(labels))
+        slots[bisect.bisect_left(self.buckets, value)] += 1
+        slots[-1] += value
+
+    @contextmanager
+    def time(self, **labels: object) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, slots in sorted(self._shards.collect().items()):
+            cumulative = 0.0
+            for bound, count in zip((*self.buckets, math.inf), slots):
+                cumulative += count
+                labels = _format_labels((*self.labelnames, "le"), (*key, _format_value(bound)))
+                lines.append(f"{self.name}_bucket{labels} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(slots[-1])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(cumulative)}")
+        return lines
+
+
+class _CallbackMetric:
+    """Metric whose samples are read from existing state at scrape time."""
+
+    def __init__(self, name, documentation, kind, labelnames, collect: Callable[[], Samples]):
+        self.name = name
+        self.documentation = documentation
+        self.kind = kind
+        self.labelnames = tuple(labelnames)
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        for key, value in self.collect():
+            if value is None:
+                continue
+            key = tuple(str(part) for part in key)
+            lines.append(f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}")
+        return lines
+
+
+class Registry:
+    def __init__(self) -> None:
+        self.logger = logging.getLogger("Metrics")
+        self._metrics: Dict[str, object] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None and not isinstance(metric, _CallbackMetric):
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def callback(
+        self,
+        name: str,
+        documentation: str,
+        collect: Callable[[], Samples],
+        *,
+        kind: str = "gauge",
+        labelnames: Sequence[str] = (),
+    ) -> None:
+        """Register (or replace) a metric computed by ``collect`` on every scrape."""
+        self._register(_CallbackMetric(name, documentation, kind, labelnames, collect))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines: List[str] = []
+        for metric in metrics:
+            try:
+                lines.extend(metric.render())
+            except Exception as exc:  # one broken collector must not hide the rest
+                self.logger.warning(f"Collecting {metric.name} failed: {exc}")
+        return "\n".join(lines) + "\n"
+
+
+# Global registry (importable anywhere)
+registry = Registry()
+
+
+# ---------------------------------------------------------------------------
+# Shared metrics
+# ---------------------------------------------------------------------------
+http_requests = registry.counter(
+    "http_requests_total", "HTTP requests by route and status.", ("method", "route", "status")
+)
+http_request_seconds = registry.histogram(
+    "http_request_duration_seconds", "HTTP request latency by route.", ("method", "route")
+)
+http_in_flight = registry.gauge("http_requests_in_flight", "HTTP requests being served.")
+node_seconds = registry.histogram(
+    "workflow_node_duration_seconds",
+    "LangGraph node latency by workflow and node.",
+    ("workflow", "node", "outcome"),
+)
+upstream_seconds = registry.histogram(
+    "upstream_request_duration_seconds",
+    "Upstream call latency (LLM models, Tavily, caption endpoint, yt-dlp).",
+    ("service", "target", "outcome"),
+)
+upstream_in_flight = registry.gauge(
+    "upstream_requests_in_flight", "Upstream calls in progress.", ("service",)
+)
+upstream_errors = registry.counter(
+    "upstream_errors_total",
+    "Failed upstream calls by status (429 = rate limited, none = no HTTP status).",
+    ("service", "status"),
+)
+upstream_retries = registry.counter(
+    "upstream_retries_total", "Upstream calls retried or failed over.", ("service", "reason")
+)
+cache_lookups = registry.counter(
+    "cache_lookups_total", "Cache lookups by cache and result (hit/miss).", ("cache", "result")
+)
+event_loop_lag = registry.histogram(
+    "event_loop_lag_seconds", "Delay of the asyncio event loop behind its schedule.", (), LAG_BUCKETS
+)
+
+
+@contextmanager
+def time_upstream(service: str, target: str = "") -> Iterator[None]:
+    """Time one upstream call; failures are counted with their HTTP status if any."""
+    started = time.perf_counter()
+    upstream_in_flight.inc(service=service)
+    outcome = "ok"
+    try:
+        yield
+    except Exception as exc:
+        outcome = "error"
+        record_upstream_error(service, exc)
+        raise
+    finally:
+        upstream_in_flight.dec(service=service)
+        upstream_seconds.observe(
+            time.perf_counter() - started, service=service, target=target, outcome=outcome
+        )
+
+
+def record_upstream_error(service: str, exc: BaseException) -> None:
+    status = getattr(exc, "status_code", None) or getattr(
+        getattr(exc, "response", None), "status_code", None
+    )
+    upstream_errors.inc(service=service, status=status or "none")
+
+
+def record_cache(cache: str, hits: int = 0, misses: int = 0) -> None:
+    if hits:
+        cache_lookups.inc(hits, cache=cache, result="hit")
+    if misses:
+        cache_lookups.inc(misses, cache=cache, result="miss")
+
+
+def _cache_hit_ratios() -> Samples:
+    counts: Dict[str, Dict[str, float]] = {}
+    for (cache, result), value in cache_lookups.values().items():
+        counts.setdefault(cache, {})[result] = value
+    for cache, results in sorted(counts.items()):
+        total = results.get("hit", 0) + results.get("miss", 0)
+        yield (cache,), (results.get("hit", 0) / total) if total else None
+
+
+registry.callback(
+    "cache_hit_ratio", "Hits over lookups since startup, per cache.", _cache_hit_ratios,
+    labelnames=("cache",),
+)
+
+
+# ---------------------------------------------------------------------------
+# Event-loop lag
+# ---------------------------------------------------------------------------
+class EventLoopLagMonitor:
+    """Sleeps ``interval`` seconds in a loop and records how late it wakes up."""
+
+    def __init__(self, interval: float = 0.5) -> None:
+        self.interval = interval
+        self.last_lag = 0.0
+        self._task: Optional[asyncio.Task] = None
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.last_lag = max(0.0, loop.time() - expected)
+            event_loop_lag.observe(self.last_lag)
+
+    def start(self) -> None:
+        """Start sampling on the running event loop."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+
+# Global instance (importable anywhere)
+loop_lag_monitor = EventLoopLagMonitor()
+
+registry.callback(
+    "event_loop_lag_last_seconds",
+    "Most recent event-loop lag sample.",
+    lambda: [((), loop_lag_monitor.last_lag)],
+)
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+class MetricsMiddleware:
+    """Count and time HTTP requests per route template (not raw path)."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_with_status(message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        http_in_flight.inc()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            http_in_flight.dec()
+            # FastAPI stores the matched route in the scope; unmatched paths share one label.
+            route = getattr(scope.get("route"), "path", None) or "unmatched"
+            method = scope.get("method", "")
+            http_requests.inc(method=method, route=route, status=status)
+            http_request_seconds.observe(time.perf_counter() - started, method=method, route=route)
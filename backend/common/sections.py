@@ -0,0 +1,136 @@
+"""
+Section-level helpers for revising long drafts.
+
+Reviewers usually flag one or two paragraphs, yet the revision nodes used to
+regenerate the whole article or script. These helpers split a draft into
+sections (Markdown headings or script markers such as ``[SCENE CHANGE]``),
+work out which sections a review points at, rewrite only those sections
+concurrently and splice the untouched text back in its original form.
+"""
+
+from __future__ import annotations
+
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Sequence, Set, Tuple
+
+from .deadline import in_request_context
+
+HEADING_PATTERN = re.compile(r"^\s{0,3}#{1,6}\s+\S")
+SCRIPT_MARKER_PATTERN = re.compile(
+    r"^\s*(?:\*\*)?(?:\[(?:SCENE CHANGE|HOOK|INTRO|BODY|OUTRO|CTA)[^\]]*\]"
+    r"|(?:HOOK|INTRO|BODY|OUTRO|CTA)[^\n:*]{0,40}(?::|\*\*))"
+)
+SECTION_REFERENCE_PATTERN = re.compile(
+    r"\bsections?\s*(?:to revise)?\s*[:#]?\s*(\d+(?:\s*(?:,\s*and|,|and|&)\s*\d+)*)",
+    re.IGNORECASE,
+)
+QUOTED_TEXT_PATTERN = re.compile(r"[\"“]([^\"”]{12,})[\"”]")
+
+MAX_REVISION_WORKERS = 4
+
+
+@dataclass
+class Section:
+    index: int
+    heading: str
+    text: str
+
+    @property
+    def word_count(self) -> int:
+        return len(self.text.split())
+
+
+def _is_boundary(line: str) -> bool:
+    return bool(HEADING_PATTERN.match(line) or SCRIPT_MARKER_PATTERN.match(line))
+
+
+def split_sections(draft: str) -> List[Section]:
+    """Split a draft at headings and script markers, keeping the raw text intact."""
+    sections: List[Section] = []
+    buffer: List[str] = []
+    heading = ""
+
+    for line in draft.splitlines(keepends=True):
+        if _is_boundary(line) and "".join(buffer).strip():
+            sections.append(Section(index=len(sections) + 1, heading=heading, text="".join(buffer)))
+            buffer = []
+        if _is_boundary(line) and not "".join(buffer).strip():
+            heading = line.strip()
+        buffer.append(line)
+
+    if buffer:
+        sections.append(Section(index=len(sections) + 1, heading=heading, text="".join(buffer)))
+    return sections
+
+
+def join_sections(sections: Sequence[Section]) -> str:
+    return "".join(section.text for section in sections).strip()
+
+
+def label_sections(sections: Sequence[Section]) -> str:
+    """Render sections with ``[SECTION n]`` labels so reviewers can reference them."""
+    return "\n\n".join(f"[SECTION {section.index}]\n{section.text.strip()}" for section in sections)
+
+
+def outline(sections: Sequence[Section]) -> str:
+    """Short outline used as shared context when rewriting a single section."""
+    return "\n".join(
+        f"{section.index}. {section.heading or section.text.strip().splitlines()[0][:80]}"
+        for section in sections
+        if section.text.strip()
+    )
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.split()).lower()
+
+
+def find_flagged_sections(sections: Sequence[Section], review: str) -> Set[int]:
+    """Return indices of the sections a review refers to.
+
+    Sections are matched by explicit ``Section 2`` style references and by
+    quoted sentences that appear verbatim in a section.
+    """
+    valid = {section.index for section in sections}
+    flagged: Set[int] = set()
+
+    for match in SECTION_REFERENCE_PATTERN.finditer(review or ""):
+        flagged.update(int(number) for number in re.findall(r"\d+", match.group(1)))
+
+    for quoted in QUOTED_TEXT_PATTERN.findall(review or ""):
+        needle = _normalize(quoted)
+        for section in sections:
+            if needle in _normalize(section.text):
+                flagged.add(section.index)
+
+    return flagged & valid
+
+
+def revise_sections(
+    sections: Sequence[Section],
+    flagged: Set[int],
+    rewrite: Callable[[Section], str],
+    max_workers: int = MAX_REVISION_WORKERS,
+) -> Tuple[str, List[int]]:
+    """Rewrite the flagged sections concurrently and splice the draft back together."""
+    targets = [section for section in sections if section.index in flagged]
+    if not targets:
+        return join_sections(sections), []
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(targets))) as pool:
+        rewritten = dict(zip((s.index for s in targets), pool.map(in_request_context(rewrite), targets)))
+
+    spliced = []
+    for section in sections:
+        if section.index in rewritten and rewritten[section.index].strip():
+            spliced.append(Section(section.index, section.heading, rewritten[section.index].strip() + "\n\n"))
+        else:
+            spliced.append(section)
+    return join_sections(spliced), sorted(rewritten)
+
+
+def section_token_budget(section: Section, floor: int = 256, ceiling: int = 2048) -> int:
+    """Size the rewrite budget to the section instead of the whole document."""
+    return max(floor, min(ceiling, section.word_count * 2))
@@ -0,0 +1,105 @@
+"""Server-Sent Events helpers for streaming workflow progress to the frontend."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+import json
+import threading
+import uuid
+from typing import Any, AsyncIterator, Callable, Dict, Optional, Tuple
+
+from fastapi import Request
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+StreamedRun = Callable[[EventCallback, threading.Event], Dict[str, Any]]
+
+SSE_MEDIA_TYPE = "text/event-stream"
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+KEEPALIVE_SECONDS = 15.0
+
+
+def format_sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class CancelRegistry:
+    """Cancel flags for in-flight streamed runs, addressable by run id."""
+
+    def __init__(self) -> None:
+        self._events: Dict[str, threading.Event] = {}
+        self._lock = threading.Lock()
+
+    def open(self) -> Tuple[str, threading.Event]:
+        run_id = uuid.uuid4().hex
+        cancel = threading.Event()
+        with self._lock:
+            self._events[run_id] = cancel
+        return run_id, cancel
+
+    def cancel(self, run_id: str) -> bool:
+        with self._lock:
+            cancel = self._events.get(run_id)
+        if cancel is None:
+            return False
+        cancel.set()
+        return True
+
+    def close(self, run_id: str) -> None:
+        with self._lock:
+            self._events.pop(run_id, None)
+
+
+# Global instance (importable anywhere)
+cancel_registry = CancelRegistry()
+
+
+async def stream_run(request: Request, run: StreamedRun) -> AsyncIterator[str]:
+    """Run ``run(emit, cancel)`` in a worker thread and yield its events as SSE.
+
+    The first event is ``started`` with the run id (used by the cancel
+    endpoints), followed by whatever the run emits, then ``result`` with its
+    return value or ``error``. The cancel flag is set when the client
+    disconnects so the run stops before its next upstream call.
+    """
+    loop = asyncio.get_running_loop()
+    queue: "asyncio.Queue[Optional[Tuple[str, Any]]]" = asyncio.Queue()
+    run_id, cancel = cancel_registry.open()
+
+    def put(item: Optional[Tuple[str, Any]]) -> None:
+        try:
+            loop.call_soon_threadsafe(queue.put_nowait, item)
+        except RuntimeError:
+            # Event loop already closed (server shutting down); nobody is listening.
+            cancel.set()
+
+    def emit(event: str, data: Dict[str, Any]) -> None:
+        put((event, data))
+
+    def target() -> None:
+        try:
+            emit("result", run(emit, cancel))
+        except Exception as exc:
+            emit("error", {"message": str(getattr(exc, "detail", None) or exc)})
+        finally:
+            put(None)
+
+    yield format_sse("started", {"runId": run_id})
+    # Copy the context so the run sees the request deadline (see common.deadline).
+    loop.run_in_executor(None, contextvars.copy_context().run, target)
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(queue.get(), KEEPALIVE_SECONDS)
+            except asyncio.TimeoutError:
+                if await request.is_disconnected():
+                    break
+                yield ": keep-alive\n\n"
+                continue
+            if item is None:
+                break
+            yield format_sse(*item)
+    finally:
+        # No-op when the run already finished; stops it when the client went away.
+        cancel.set()
+        cancel_registry.close(run_id)
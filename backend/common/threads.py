@@ -0,0 +1,47 @@
+"""Thread id handling shared by routers, the job queue and checkpointing.
+
+Kept separate from ``common.checkpoint`` so routers can resolve ids without
+importing LangGraph.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+# Value the frontend forms ship as a placeholder thread id.
+PLACEHOLDER_THREAD_PREFIX = "e.g."
+
+
+def resolve_thread_id(payload: Dict[str, Any]) -> str:
+    """Use the client's ``threadId`` when it is a real id, otherwise mint one."""
+    thread_id = str(payload.get("threadId") or "").strip()
+    if not thread_id or thread_id.startswith(PLACEHOLDER_THREAD_PREFIX):
+        return str(uuid.uuid4())
+    return thread_id
+
+
+_reuse_results: contextvars.ContextVar[bool] = contextvars.ContextVar(
+    "reuse_finished_runs", default=False
+)
+
+
+@contextmanager
+def reuse_finished_runs() -> Iterator[None]:
+    """Let runs inside the block return the stored result of a finished thread.
+
+    Off by default: a client reusing a ``threadId`` with the same inputs gets
+    a fresh run. The job queue opts in, so a job re-run after a crash does not
+    pay for a workflow that had already completed.
+    """
+    token = _reuse_results.set(True)
+    try:
+        yield
+    finally:
+        _reuse_results.reset(token)
+
+
+def reusing_finished_runs() -> bool:
+    return _reuse_results.get()
@@ -0,0 +1,45 @@
+"""
+Shared pytest setup for the backend tests.
+
+Tests never reach Groq, Tavily or a real database: API keys get placeholder
+values, SQLite files go to a temporary directory, and LLM calls are answered
+by ``llm.FakeChatClient`` through the ``fake_llm`` fixture.
+"""
+
+import os
+import tempfile
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="backend-tests-")
+
+for _name, _value in {
+    "GROQ_API_KEY": "test",
+    "TAVILY_API_KEY": "test",
+    "X_IDEAS_PREWARM_INTERVAL_SECONDS": "0",
+    "CHECKPOINT_DB_PATH": os.path.join(_TMP, "checkpoints.db"),
+    "JOBS_DB_PATH": os.path.join(_TMP, "jobs.db"),
+    "REPURPOSER_CACHE_DB_PATH": os.path.join(_TMP, "repurposer.db"),
+    "BRAND_PROFILE_DB_PATH": os.path.join(_TMP, "brand_profiles.db"),
+}.items():
+    os.environ.setdefault(_name, _value)
+
+
+@pytest.fixture
+def fake_llm():
+    """Install a ``FakeChatClient`` as the shared LLM client for one test.
+
+    The returned client's ``responder`` may be replaced to script replies;
+    ``calls`` holds every request sent.
+    """
+    from llm import FakeChatClient, clients
+
+    saved = dict(clients._clients)
+    fake = FakeChatClient()
+    clients.set_client(fake)
+    try:
+        yield fake
+    finally:
+        with clients._clients_lock:
+            clients._clients.clear()
+            clients._clients.update(saved)
@@ -1,10 +1,16 @@
-from typing import Dict, Any
-from pydantic import BaseModel
+import threading
+from typing import Dict, Any, Optional
+
+from common.checkpoint import get_checkpointer, resolve_thread_id, run_checkpointed
+from common.deadline import DeadlineExceeded, RequestCancelled
+from common.graph import ProgressCallback, UpdateCallback
+from common.streaming import EventCallback
 from .content_repurposer_workflow_model import build_repurposer_graph, RepurposerState
+from .schemas import RepurposerInput
+
 
-# Pydantic model to validate the input from the frontend
-class RepurposerInput(BaseModel):
-    article_text: str
+# State fields streamed to the client as soon as their branch finishes
+BRANCH_OUTPUTS = ("summary", "social_posts", "faq_section", "entities")
 
 class ContentRepurposerAgent:
     """
@@ -16,14 +22,26 @@ class ContentRepurposerAgent:
         """
         Initializes the agent by building and compiling the LangGraph workflow.
         """
-        self.graph = build_repurposer_graph()
+        self.graph = build_repurposer_graph(checkpointer=get_checkpointer())
 
-    def invoke(self, data: RepurposerInput) -> Dict[str, Any]:
+    def invoke(
+        self,
+        data: RepurposerInput,
+        on_progress: Optional[ProgressCallback] = None,
+        on_event: Optional[EventCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
         """
         Runs the content repurposing workflow.
         
         Args:
             data: A RepurposerInput object containing the article_text.
+            on_progress: Optional callback receiving each finished node name.
+            on_event: Optional callback receiving each branch output
+                (summary, social_posts, faq_section, entities) as soon as it is ready.
+            cancel: Optional flag (set when a streaming client disconnects); the
+                run stops before the next node once it is set. The checkpoint
+                keeps finished nodes, so retrying the thread resumes from there.
             
         Returns:
             A dictionary formatted for the frontend, containing the
@@ -36,6 +54,7 @@ class ContentRepurposerAgent:
                 "article_text": data.article_text,
                 
                 # Set default Nones for all output fields
+                "digest": None,
                 "summary": None,
                 "social_posts": None,
                 "faq_section": None,
@@ -45,7 +64,19 @@ class ContentRepurposerAgent:
 
             # 2. Run the graph
             # The graph will run all parallel nodes and then the compile node
-            final_state = self.graph.invoke(initial_state)
+            thread_id = resolve_thread_id({"threadId": data.threadId})
+            on_update = self._branch_emitter(on_event) if on_event else None
+            if cancel is not None:
+                if cancel.is_set():
+                    raise RequestCancelled("Client disconnected; repurposer run cancelled.")
+                on_update = self._cancellable(on_update, cancel)
+            final_state = run_checkpointed(
+                self.graph,
+                initial_state,
+                thread_id,
+                on_progress=on_progress,
+                on_update=on_update,
+            )
 
             # 3. Extract the final package
             # This 'final_package' is assembled by the 'compile_package' node
@@ -59,6 +90,8 @@ class ContentRepurposerAgent:
             # The frontend (ContentRepurposerPage.tsx) expects: { repurposed_content: ... }
             return {"repurposed_content": result_package}
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"Error during content repurposing workflow: {e}")
             # Return an error structure that the frontend can handle
@@ -79,4 +112,40 @@ class ContentRepurposerAgent:
                         "topics": [],
                     },
                 },
-            }
\ No newline at end of file
+            }
+
+    @staticmethod
+    def _branch_emitter(on_event: EventCallback):
+        """Turn graph node updates into one event per finished branch output."""
+
+        def on_update(node: str, update: Dict[str, Any]) -> None:
+            if node == "digest_article":
+                digest = update.get("digest") or {}
+                on_event(
+                    "digest",
+                    {
+                        "paragraphs": digest.get("paragraphs", 0),
+                        "reused_paragraphs": digest.get("reused_paragraphs", 0),
+                    },
+                )
+            for field in BRANCH_OUTPUTS:
+                if field in update:
+                    on_event(field, {field: update[field]})
+
+        return on_update
+
+    @staticmethod
+    def _cancellable(
+        on_update: Optional[UpdateCallback], cancel: threading.Event
+    ) -> UpdateCallback:
+        """Raise between nodes once ``cancel`` is set, so no further node starts."""
+
+        def checked(node: str, update: Dict[str, Any]) -> None:
+            if on_update is not None:
+                on_update(node, update)
+            if cancel.is_set():
+                raise RequestCancelled(
+                    f"Client disconnected; repurposer run cancelled after '{node}'."
+                )
+
+        return checked
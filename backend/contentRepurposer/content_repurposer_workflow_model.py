@@ -1,16 +1,25 @@
-import json
-from typing import Dict, Any, List
+from typing import Callable, Dict, Any, List, Optional, Type, TypeVar
 from langgraph.graph import StateGraph, START, END
-from pydantic import BaseModel, Field
-from groq import Groq
+from pydantic import BaseModel, Field, field_validator
 from dotenv import load_dotenv
 
+from llm import LazyClient, StructuredOutputError, complete_json
+from .digest import (
+    ArticleDigest,
+    ChunkExtraction,
+    ParagraphDigest,
+    article_content_key,
+    build_digest,
+    render_digest,
+)
+from .repurposer_cache import get_repurposer_cache, output_key
+
 load_dotenv()
 
 # -------------------------------
 # Initialize Groq client
 # -------------------------------
-client = Groq()  # Uses GROQ_API_KEY from environment
+client = LazyClient()  # Uses GROQ_API_KEY from environment, created on first call
 
 
 def generate_fast_response(prompt: str, max_tokens=1024, temperature=0.2) -> str:
@@ -26,22 +35,48 @@ def generate_fast_response(prompt: str, max_tokens=1024, temperature=0.2) -> str
     return completion.choices[0].message.content.strip()
 
 
-def generate_json_response(prompt: str, max_tokens=1024, temperature=0.1) -> Dict:
-    """Uses the fast Groq model with JSON mode for structured output."""
-    completion = client.chat.completions.create(
+SchemaT = TypeVar("SchemaT", bound=BaseModel)
+
+
+def generate_json_response(
+    prompt: str, schema: Type[SchemaT], max_tokens=1024, temperature=0.1
+) -> SchemaT:
+    """Uses the fast Groq model with JSON mode, validated against ``schema``.
+
+    Raises ``StructuredOutputError`` if the reply cannot be repaired or re-requested
+    into a valid object.
+    """
+    return complete_json(
+        client,
         model="llama-3.1-8b-instant",
         messages=[{"role": "user", "content": prompt}],
+        schema=schema,
         temperature=temperature,
-        max_completion_tokens=max_tokens,
-        top_p=1,
-        stream=False,
-        response_format={"type": "json_object"},
+        max_tokens=max_tokens,
     )
-    try:
-        return json.loads(completion.choices[0].message.content.strip())
-    except json.JSONDecodeError:
-        print("Error: Failed to decode JSON from model response.")
-        return {}
+
+
+# -------------------------------
+# Structured Output Schemas
+# -------------------------------
+class SocialPosts(BaseModel):
+    twitter: str
+    linkedin: str
+    instagram: str
+
+    @field_validator("twitter", "linkedin", "instagram", mode="before")
+    @classmethod
+    def _unwrap_text(cls, value: Any) -> Any:
+        # The model sometimes returns {"text": "..."} instead of a plain string.
+        if isinstance(value, dict) and "text" in value:
+            return value["text"]
+        return value
+
+
+class ArticleEntities(BaseModel):
+    people: List[str] = Field(default_factory=list)
+    organizations: List[str] = Field(default_factory=list)
+    topics: List[str] = Field(default_factory=list)
 
 
 # -------------------------------
@@ -55,6 +90,11 @@ class RepurposerState(BaseModel):
     # 🧠 Input from frontend
     article_text: str
 
+    # 📝 Shared digest for long articles (None when the article is short enough)
+    digest: Dict[str, Any] | None = None
+    # 🔑 Fingerprint of what the branches read; keys their cached outputs
+    content_key: str | None = None
+
     # 🔄 Workflow-generated fields (the parallel outputs)
     summary: str | None = None
     social_posts: Dict[str, str] | None = None # <-- Expects Dict[str, str]
@@ -65,6 +105,82 @@ class RepurposerState(BaseModel):
     final_package: Dict[str, Any] | None = None
 
 
+# -------------------------------
+# Digest Stage
+# -------------------------------
+
+def extract_paragraphs(
+    paragraphs: List[str], index: int, total: int
+) -> List[Optional[ParagraphDigest]]:
+    """Map step: key sentences, outline and entity candidates for each paragraph of a chunk."""
+    numbered = "\n\n".join(f"[P{n}] {text}" for n, text in enumerate(paragraphs, start=1))
+    prompt = f"""
+You are preparing research notes from part {index + 1} of {total} of an article.
+The paragraphs are numbered [P1] to [P{len(paragraphs)}].
+Return a JSON object {{"paragraphs": [...]}} with one entry per paragraph, each with keys:
+1.  "id": the paragraph number (1 for [P1]).
+2.  "key_points": 1-2 key sentences from the paragraph, quoted or closely paraphrased.
+3.  "outline": a short section heading if the paragraph starts a new section, else [].
+4.  "people": person names mentioned.
+5.  "organizations": company, government, or group names mentioned.
+6.  "topics": 0-3 key topics or keywords.
+
+Use empty lists where nothing applies.
+
+ARTICLE PART:
+{numbered}
+"""
+    extraction = generate_json_response(prompt, ChunkExtraction, 512 + 160 * len(paragraphs))
+    by_id = {item.id: item for item in extraction.paragraphs}
+    # Paragraphs the model skipped come back as None and fall back to lead sentences.
+    return [
+        ParagraphDigest(**by_id[n].model_dump(exclude={"id"})) if n in by_id else None
+        for n in range(1, len(paragraphs) + 1)
+    ]
+
+
+def digest_article(state: RepurposerState) -> Dict[str, Any]:
+    """Node 0: Condenses long articles once so the parallel branches share the digest."""
+    print("--- 0. DIGESTING ARTICLE ---")
+    digest = build_digest(state.article_text, extract_paragraphs, cache=get_repurposer_cache())
+    key = article_content_key(state.article_text, digest)
+    if digest is None:
+        return {"digest": None, "content_key": key}
+    print(
+        f"Digest built from {digest.paragraphs} paragraph(s), {digest.reused_paragraphs} reused"
+        f" from cache, {digest.chunks} chunk call(s), ~{digest.article_tokens} tokens in."
+    )
+    return {"digest": digest.model_dump(), "content_key": key}
+
+
+def cached_branch(
+    branch: str, state: RepurposerState, prompt: str, compute: Callable[[], Any]
+) -> Any:
+    """Reuse a branch output when the content it reads is unchanged.
+
+    Runs resumed from a checkpoint written before ``content_key`` existed fall
+    back to keying on the prompt itself.
+    """
+    cache = get_repurposer_cache()
+    key = output_key(branch, state.content_key or prompt)
+    cached = cache.get_output(key)
+    if cached is not None:
+        print(f"Reusing cached {branch} (input unchanged).")
+        return cached
+    output = compute()
+    cache.save_output(key, branch, output)
+    return output
+
+
+def article_context(state: RepurposerState) -> str:
+    """What the branches read: the article itself, or its digest when it is long."""
+    if not state.digest:
+        return f"ARTICLE:\n{state.article_text}"
+    return "ARTICLE DIGEST (condensed from a longer article):\n" + render_digest(
+        ArticleDigest(**state.digest)
+    )
+
+
 # -------------------------------
 # Parallel Nodes
 # -------------------------------
@@ -76,10 +192,9 @@ def generate_summary(state: RepurposerState) -> Dict[str, Any]:
 You are a concise editor. Summarize the following article in one compelling paragraph (about 100-150 words).
 The summary should capture the main points and be suitable for a preview.
 
-ARTICLE:
-{state.article_text}
+{article_context(state)}
 """
-    summary = generate_fast_response(prompt, 512)
+    summary = cached_branch("summary", state, prompt, lambda: generate_fast_response(prompt, 512))
     return {"summary": summary}
 
 
@@ -105,33 +220,23 @@ Example format:
 2.  "linkedin" (string): A professional post (~100-150 words) for LinkedIn, focusing on the key insights and ending with a question.
 3.  "instagram" (string): An engaging Instagram caption (~50-100 words) that teases the content and includes 5 relevant hashtags.
 
-ARTICLE:
-{state.article_text}
+{article_context(state)}
 """
-    social_posts = generate_json_response(prompt, 1024)
+    # --- FIX 2: Validate the AI Output ---
+    # SocialPosts unwraps {"text": "..."} values; anything unrecoverable falls back.
+    try:
+        social_posts = cached_branch(
+            "social_posts",
+            state,
+            prompt,
+            lambda: generate_json_response(prompt, SocialPosts, 1024).model_dump(),
+        )
+    except StructuredOutputError as e:
+        print(f"Error: Social posts could not be parsed: {e}")
+        failed = "Failed to generate post."
+        return {"social_posts": {"twitter": failed, "linkedin": failed, "instagram": failed}}
 
-    # --- FIX 2: Add Helper to Clean AI Output ---
-    # This will safely extract the text, even if the AI
-    # still returns {"text": "..."} by mistake.
-    
-    def extract_text(post_data: Any) -> str:
-        """Helper to extract text, whether it's a string or a dict."""
-        if isinstance(post_data, str):
-            return post_data
-        if isinstance(post_data, dict) and "text" in post_data:
-            return post_data["text"]
-        
-        # Fallback if the key is missing or format is wrong
-        return "Failed to generate post."
-
-    # Use the helper to build the valid dictionary
-    valid_posts = {
-        "twitter": extract_text(social_posts.get("twitter")),
-        "linkedin": extract_text(social_posts.get("linkedin")),
-        "instagram": extract_text(social_posts.get("instagram")),
-    }
-    
-    return {"social_posts": valid_posts}
+    return {"social_posts": social_posts}
 
 
 def generate_faq_section(state: RepurposerState) -> Dict[str, Any]:
@@ -142,10 +247,9 @@ You are an SEO specialist. Read the following article and generate a 'Frequently
 It should contain 3-5 questions and their answers based *only* on the article's content.
 Format the output as simple Markdown (e.g., "**Q: Question?**\nA: Answer.").
 
-ARTICLE:
-{state.article_text}
+{article_context(state)}
 """
-    faq_section = generate_fast_response(prompt, 1024)
+    faq_section = cached_branch("faq_section", state, prompt, lambda: generate_fast_response(prompt, 1024))
     return {"faq_section": faq_section}
 
 
@@ -161,17 +265,29 @@ Return a JSON object with three keys:
 
 Return empty lists if none are found.
 
-ARTICLE:
-{state.article_text}
+{article_context(state)}
 """
-    entities = generate_json_response(prompt, 1024)
-    # Ensure the structure matches the frontend expectation
-    valid_entities = {
-        "people": entities.get("people", []),
-        "organizations": entities.get("organizations", []),
-        "topics": entities.get("topics", []),
-    }
-    return {"entities": valid_entities}
+    if state.digest:
+        # Long articles: the digest already carries entity candidates from every paragraph
+        prompt += f"""
+ENTITY CANDIDATES FOUND IN THE FULL ARTICLE (clean up, classify and deduplicate):
+- People: {", ".join(state.digest["people"]) or "None"}
+- Organizations: {", ".join(state.digest["organizations"]) or "None"}
+- Topics: {", ".join(state.digest["topics"]) or "None"}
+"""
+
+    # ArticleEntities guarantees the structure the frontend expects
+    try:
+        entities = cached_branch(
+            "entities",
+            state,
+            prompt,
+            lambda: generate_json_response(prompt, ArticleEntities, 1024).model_dump(),
+        )
+    except StructuredOutputError as e:
+        print(f"Error: Entities could not be parsed: {e}")
+        entities = ArticleEntities().model_dump()
+    return {"entities": entities}
 
 
 # -------------------------------
@@ -199,12 +315,13 @@ def compile_package(state: RepurposerState) -> Dict[str, Any]:
 # -------------------------------
 # Build the Graph
 # -------------------------------
-def build_repurposer_graph() -> StateGraph:
+def build_repurposer_graph(checkpointer=None) -> StateGraph:
     """Builds the parallel workflow for repurposing content."""
     
     graph = StateGraph(RepurposerState)
 
     # 1. Add all the nodes
+    graph.add_node("digest_article", digest_article)
     graph.add_node("generate_summary", generate_summary)
     graph.add_node("generate_social_posts", generate_social_posts)
     graph.add_node("generate_faq_section", generate_faq_section)
@@ -213,11 +330,12 @@ def build_repurposer_graph() -> StateGraph:
 
     # 2. Define the graph flow
     
-    # START node branches out to all 4 tasks, which run in parallel
-    graph.add_edge(START, "generate_summary")
-    graph.add_edge(START, "generate_social_posts")
-    graph.add_edge(START, "generate_faq_section")
-    graph.add_edge(START, "generate_entities")
+    # The digest runs once, then branches out to all 4 tasks, which run in parallel
+    graph.add_edge(START, "digest_article")
+    graph.add_edge("digest_article", "generate_summary")
+    graph.add_edge("digest_article", "generate_social_posts")
+    graph.add_edge("digest_article", "generate_faq_section")
+    graph.add_edge("digest_article", "generate_entities")
 
     # 3. Define the "join" point
     # We create a "join" edge that waits for all 4 parallel tasks
@@ -235,4 +353,4 @@ def build_repurposer_graph() -> StateGraph:
     # 4. The compile node is the last step
     graph.add_edge("compile_package", END)
 
-    return graph.compile()
\ No newline at end of file
+    return graph.compile(checkpointer=checkpointer)
\ No newline at end of file
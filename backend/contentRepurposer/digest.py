@@ -0,0 +1,266 @@
+"""
+Shared article digest for the repurposer's parallel branches.
+
+Summary, social posts, FAQ and entities used to receive the full article
+each, so long articles were paid for four times and could overflow the 8B
+context. The digest stage packs the article's paragraphs into token-budgeted
+chunks, extracts key sentences, an outline and entity candidates for every
+paragraph with one call per chunk in parallel (map), and merges them into one
+budgeted digest (reduce) that the branches consume instead. Paragraph digests
+are cached by content hash, so re-runs after an edit only re-extract the
+paragraphs that changed. Articles that already fit the budget skip the digest
+and are sent to the branches as-is.
+
+Either way ``article_content_key`` fingerprints what the branches will read,
+per paragraph for short articles and per digest entry for long ones, so
+branch outputs are cached on content rather than on prompt text.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
+
+from pydantic import BaseModel, Field
+
+from common.deadline import in_request_context
+from llm import StructuredOutputError
+
+from .repurposer_cache import RepurposerCache, content_key, paragraph_key
+
+# Rough chars-per-token ratio for English text on Llama tokenizers.
+CHARS_PER_TOKEN = 4
+# Articles up to this size go to the branches verbatim.
+DIGEST_TOKEN_BUDGET = int(os.getenv("REPURPOSER_DIGEST_TOKENS", 1200))
+# Size of each map chunk; keep well inside the fast model's per-request limit.
+CHUNK_TOKEN_BUDGET = int(os.getenv("REPURPOSER_CHUNK_TOKENS", 2500))
+MAP_WORKERS = 4
+MAX_ENTITIES = 20
+MAX_OUTLINE_ITEMS = 12
+
+PARAGRAPH_PATTERN = re.compile(r"\n\s*\n")
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z0-9\"'])")
+
+
+class ParagraphDigest(BaseModel):
+    """Map-step output for one paragraph."""
+
+    key_points: List[str] = Field(default_factory=list)
+    outline: List[str] = Field(default_factory=list)
+    people: List[str] = Field(default_factory=list)
+    organizations: List[str] = Field(default_factory=list)
+    topics: List[str] = Field(default_factory=list)
+
+
+class ExtractedParagraph(ParagraphDigest):
+    id: int
+
+
+class ChunkExtraction(BaseModel):
+    """Schema sent to the model: one entry per numbered paragraph in the chunk."""
+
+    paragraphs: List[ExtractedParagraph] = Field(default_factory=list)
+
+
+class ArticleDigest(ParagraphDigest):
+    """Reduced digest for the whole article."""
+
+    paragraphs: int = 0
+    reused_paragraphs: int = 0
+    chunks: int = 0
+    article_tokens: int = 0
+
+
+# Map step: (paragraphs, chunk index, chunk count) -> one digest (or None) per paragraph
+ExtractChunk = Callable[[List[str], int, int], List[Optional[ParagraphDigest]]]
+
+
+def estimate_tokens(text: str) -> int:
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _split_oversized(paragraph: str, max_tokens: int) -> List[str]:
+    """Break a paragraph that alone exceeds the chunk budget at sentence boundaries."""
+    pieces: List[str] = []
+    current = ""
+    for sentence in SENTENCE_PATTERN.split(paragraph):
+        if current and estimate_tokens(current + " " + sentence) > max_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = f"{current} {sentence}".strip()
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_paragraphs(text: str, max_tokens: int = CHUNK_TOKEN_BUDGET) -> List[str]:
+    """Paragraphs of ``text``, with any paragraph larger than a chunk split by sentence."""
+    paragraphs: List[str] = []
+    for paragraph in PARAGRAPH_PATTERN.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if estimate_tokens(paragraph) > max_tokens:
+            paragraphs.extend(_split_oversized(paragraph, max_tokens))
+        else:
+            paragraphs.append(paragraph)
+    return paragraphs
+
+
+def pack_chunks(paragraphs: List[str], max_tokens: int = CHUNK_TOKEN_BUDGET) -> List[List[int]]:
+    """Group consecutive paragraph indices into chunks of at most ``max_tokens``."""
+    chunks: List[List[int]] = []
+    current: List[int] = []
+    used = 0
+    for index, paragraph in enumerate(paragraphs):
+        size = estimate_tokens(paragraph)
+        if current and used + size > max_tokens:
+            chunks.append(current)
+            current, used = [], 0
+        current.append(index)
+        used += size
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+def _extractive_fallback(paragraph: str) -> ParagraphDigest:
+    """Lead sentence of the paragraph, used when the map call cannot be parsed."""
+    return ParagraphDigest(key_points=[SENTENCE_PATTERN.split(paragraph)[0]])
+
+
+def _dedupe(items: Iterable[str], limit: Optional[int] = None) -> List[str]:
+    seen = set()
+    unique: List[str] = []
+    for item in items:
+        key = " ".join(str(item).lower().split())
+        if key and key not in seen:
+            seen.add(key)
+            unique.append(str(item).strip())
+    return unique[:limit] if limit else unique
+
+
+def _select_key_points(digests: List[ParagraphDigest], budget: int) -> List[str]:
+    """Fill the budget round by round (every paragraph's 1st point, then 2nd, ...).
+
+    When a round does not fit, an evenly spaced subset of it is kept so the
+    digest still covers the whole article rather than just its opening.
+    """
+    chosen: Dict[tuple[int, int], str] = {}
+    remaining = budget
+    rounds = max((len(d.key_points) for d in digests), default=0)
+    for rank in range(rounds):
+        candidates = [
+            (index, digest.key_points[rank])
+            for index, digest in enumerate(digests)
+            if rank < len(digest.key_points)
+        ]
+        cost = sum(estimate_tokens(point) for _, point in candidates)
+        if cost > remaining:
+            keep = max(1, int(len(candidates) * remaining / cost))
+            stride = len(candidates) / keep
+            candidates = [candidates[int(n * stride)] for n in range(keep)]
+        for index, point in candidates:
+            if estimate_tokens(point) > remaining and chosen:
+                continue
+            chosen[(index, rank)] = point
+            remaining -= estimate_tokens(point)
+        if remaining <= 0:
+            break
+    return _dedupe(point for _, point in sorted(chosen.items()))
+
+
+def reduce_digests(
+    digests: List[ParagraphDigest],
+    article_tokens: int,
+    budget: int = DIGEST_TOKEN_BUDGET,
+) -> ArticleDigest:
+    """Merge paragraph digests in article order within the token budget."""
+    return ArticleDigest(
+        key_points=_select_key_points(digests, budget),
+        outline=_dedupe((item for d in digests for item in d.outline), MAX_OUTLINE_ITEMS),
+        people=_dedupe((item for d in digests for item in d.people), MAX_ENTITIES),
+        organizations=_dedupe(
+            (item for d in digests for item in d.organizations), MAX_ENTITIES
+        ),
+        topics=_dedupe((item for d in digests for item in d.topics), MAX_ENTITIES),
+        paragraphs=len(digests),
+        article_tokens=article_tokens,
+    )
+
+
+def build_digest(
+    article_text: str,
+    extract_chunk: ExtractChunk,
+    budget: int = DIGEST_TOKEN_BUDGET,
+    cache: Optional[RepurposerCache] = None,
+) -> Optional[ArticleDigest]:
+    """Digest the article, extracting only paragraphs missing from ``cache``.
+
+    Returns ``None`` when the article already fits ``budget``.
+    """
+    article_tokens = estimate_tokens(article_text)
+    if article_tokens <= budget:
+        return None
+
+    paragraphs = split_paragraphs(article_text)
+    keys = [paragraph_key(p) for p in paragraphs]
+    cached = cache.get_paragraphs(keys) if cache else {}
+    digests: List[Optional[ParagraphDigest]] = [
+        ParagraphDigest(**cached[key]) if key in cached else None for key in keys
+    ]
+
+    missing = [index for index, digest in enumerate(digests) if digest is None]
+    chunks = [
+        [missing[i] for i in chunk]
+        for chunk in pack_chunks([paragraphs[i] for i in missing])
+    ]
+
+    def map_chunk(item: tuple[int, List[int]]) -> List[Optional[ParagraphDigest]]:
+        number, indices = item
+        try:
+            return extract_chunk([paragraphs[i] for i in indices], number, len(chunks))
+        except StructuredOutputError as e:
+            print(f"Digest chunk {number + 1}/{len(chunks)} fell back to lead sentences: {e}")
+            return [None] * len(indices)
+
+    fresh: Dict[str, dict] = {}
+    if chunks:
+        with ThreadPoolExecutor(max_workers=min(MAP_WORKERS, len(chunks))) as pool:
+            results = list(pool.map(in_request_context(map_chunk), enumerate(chunks)))
+        for indices, extracted in zip(chunks, results):
+            for index, digest in zip(indices, extracted):
+                if digest is None:
+                    # Not cached, so the next run retries the extraction.
+                    digests[index] = _extractive_fallback(paragraphs[index])
+                else:
+                    digests[index] = digest
+                    fresh[keys[index]] = digest.model_dump()
+    if cache and fresh:
+        cache.save_paragraphs(fresh)
+
+    digest = reduce_digests(digests, article_tokens, budget)
+    digest.reused_paragraphs = len(paragraphs) - len(missing)
+    digest.chunks = len(chunks)
+    return digest
+
+
+def article_content_key(article_text: str, digest: Optional[ArticleDigest]) -> str:
+    """Cache key for branch outputs: the article's paragraphs, or its merged digest."""
+    if digest is None:
+        return content_key(split_paragraphs(article_text))
+    content = digest.model_dump(include=set(ParagraphDigest.model_fields))
+    return content_key(f"{field}: {item}" for field, items in content.items() for item in items)
+
+
+def render_digest(digest: ArticleDigest) -> str:
+    """Plain-text digest for branch prompts."""
+    parts = ["KEY POINTS (in article order):"]
+    parts += [f"- {point}" for point in digest.key_points]
+    if digest.outline:
+        parts.append("\nSECTION OUTLINE:")
+        parts += [f"{n}. {item}" for n, item in enumerate(digest.outline, start=1)]
+    return "\n".join(parts)
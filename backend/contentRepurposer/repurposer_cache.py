@@ -0,0 +1,167 @@
+"""
+Incremental re-runs for the content repurposer.
+
+Editors often tweak one paragraph and resubmit. Two SQLite-backed caches make
+that cheap:
+
+* per-paragraph digests, keyed by a hash of the normalised paragraph, so the
+  digest stage only re-extracts paragraphs that actually changed;
+* branch outputs (summary, socials, FAQ, entities), keyed by the content the
+  branch reads rather than its whole prompt: the paragraph hashes of a short
+  article, or the merged paragraph digests of a long one. An edit that leaves
+  every paragraph digest unchanged reuses the previous outputs.
+
+Normalisation ignores whitespace, case and typographic quote/dash variants,
+so those edits count as cosmetic.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from common.metrics import record_cache
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "repurposer_cache.sqlite3"
+DEFAULT_TTL_DAYS = 7.0
+# Bump when the extraction prompt or schema changes so stale digests are ignored.
+EXTRACTION_VERSION = "1"
+# Bump when a branch prompt changes so outputs keyed on unchanged content are ignored.
+OUTPUT_VERSION = "1"
+
+TYPOGRAPHY = str.maketrans(
+    {"\u2018": "'", "\u2019": "'", "\u201c": '"', "\u201d": '"', "\u2013": "-", "\u2014": "-"}
+)
+MARKDOWN_EMPHASIS_PATTERN = re.compile(r"[*_`]+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS paragraph_digests (
+    paragraph_key TEXT PRIMARY KEY,
+    digest TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS branch_outputs (
+    output_key TEXT PRIMARY KEY,
+    branch TEXT NOT NULL,
+    output TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Text with cosmetic differences (spacing, case, typography, emphasis) removed."""
+    text = unicodedata.normalize("NFKC", text).translate(TYPOGRAPHY)
+    text = MARKDOWN_EMPHASIS_PATTERN.sub("", text)
+    return " ".join(text.lower().split())
+
+
+def _hash(*parts: str) -> str:
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    return digest.hexdigest()[:32]
+
+
+def paragraph_key(paragraph: str) -> str:
+    return _hash(EXTRACTION_VERSION, normalize_text(paragraph))
+
+
+def content_key(parts: Iterable[str]) -> str:
+    """Fingerprint of what the branches read (paragraphs or digest entries, in order)."""
+    return _hash(*(normalize_text(part) for part in parts))
+
+
+def output_key(branch: str, content: str) -> str:
+    return _hash(OUTPUT_VERSION, branch, content)
+
+
+class RepurposerCache:
+    """SQLite store for paragraph digests and branch outputs."""
+
+    def __init__(self, path: Optional[str] = None, ttl_days: Optional[float] = None) -> None:
+        self.path = Path(path or os.getenv("REPURPOSER_CACHE_DB_PATH") or DEFAULT_DB_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl_seconds = 86400 * (
+            ttl_days if ttl_days is not None
+            else float(os.getenv("REPURPOSER_CACHE_TTL_DAYS", DEFAULT_TTL_DAYS))
+        )
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+
+    def _cutoff(self) -> float:
+        return time.time() - self.ttl_seconds
+
+    # ------------------------------------------------------------------ #
+    # Paragraph digests
+    # ------------------------------------------------------------------ #
+    def get_paragraphs(self, keys: List[str]) -> Dict[str, Dict[str, Any]]:
+        if not keys:
+            return {}
+        found: Dict[str, Dict[str, Any]] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # Stay under SQLite's bound-parameter limit on very long articles.
+            for start in range(0, len(unique), 500):
+                batch = unique[start : start + 500]
+                rows = self._conn.execute(
+                    "SELECT paragraph_key, digest FROM paragraph_digests"
+                    f" WHERE paragraph_key IN ({','.join('?' * len(batch))})"
+                    " AND created_at >= ?",
+                    (*batch, self._cutoff()),
+                ).fetchall()
+                found.update((key, json.loads(digest)) for key, digest in rows)
+        record_cache("repurposer.paragraphs", hits=len(found), misses=len(unique) - len(found))
+        return found
+
+    def save_paragraphs(self, digests: Dict[str, Dict[str, Any]]) -> None:
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO paragraph_digests (paragraph_key, digest, created_at)"
+                " VALUES (?, ?, ?)",
+                [(key, json.dumps(digest), now) for key, digest in digests.items()],
+            )
+
+    # ------------------------------------------------------------------ #
+    # Branch outputs
+    # ------------------------------------------------------------------ #
+    def get_output(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT output FROM branch_outputs WHERE output_key = ? AND created_at >= ?",
+                (key, self._cutoff()),
+            ).fetchone()
+        record_cache("repurposer.outputs", hits=int(row is not None), misses=int(row is None))
+        return json.loads(row[0]) if row else None
+
+    def save_output(self, key: str, branch: str, output: Any) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO branch_outputs (output_key, branch, output, created_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, branch, json.dumps(output), time.time()),
+            )
+
+
+_cache: Optional[RepurposerCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_repurposer_cache() -> RepurposerCache:
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = RepurposerCache()
+    return _cache
@@ -1,18 +1,48 @@
-from fastapi import APIRouter, HTTPException
-from .agent_content_repurposer_workflow import ContentRepurposerAgent, RepurposerInput
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from api.agent_manager import AgentUnavailableError, agent_manager, retry_headers
+from common.deadline import DeadlineExceeded
+from common.streaming import SSE_HEADERS, SSE_MEDIA_TYPE, stream_run
+from .schemas import RepurposerInput
 
 # -------------------------------
-# Initialize Router & Agent
+# Initialize Router
 # -------------------------------
 router = APIRouter(tags=["Content Repurposer"])
 
-# Initialize Repurposer Agent
-# This agent loads the graph when it's created
-repurposer_agent = ContentRepurposerAgent()
-
 # -------------------------------
 # Content Repurposer Endpoint
 # -------------------------------
+def run_repurposer_workflow(
+    input_data: RepurposerInput, on_progress=None, on_event=None, cancel=None
+) -> dict:
+    """Run the repurposer and shape the response (shared with the job queue and SSE stream)."""
+    # Use the synchronous 'invoke' method from the agent
+    # (the graph is built on first use; the lease bounds concurrent runs)
+    try:
+        with agent_manager.lease("repurposer") as repurposer_agent:
+            result = repurposer_agent.invoke(
+                input_data, on_progress=on_progress, on_event=on_event, cancel=cancel
+            )
+    except AgentUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_headers(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+
+    # The agent's error handling returns an 'error' key
+    if "error" in result:
+        print(f"Error in /repurpose-article: {result['error']}")
+        raise HTTPException(status_code=500, detail=result["error"])
+
+    # Success: return the package the frontend expects
+    # The agent already formats this as: {"repurposed_content": ...}
+    return {
+        "status": "success",
+        **result  # This unpacks to {"repurposed_content": ...}
+    }
+
+
 @router.post("/repurpose-article")
 def repurpose_article(input_data: RepurposerInput):
     """
@@ -29,22 +59,29 @@ def repurpose_article(input_data: RepurposerInput):
         # Debug log to see the incoming text (truncated)
         print("Received repurposer payload:", input_data.article_text[:100] + "...") 
 
-        # Use the synchronous 'invoke' method from the agent
         # FastAPI will run this sync function in a threadpool
-        result = repurposer_agent.invoke(input_data)
-
-        # The agent's error handling returns an 'error' key
-        if "error" in result:
-            print(f"Error in /repurpose-article: {result['error']}")
-            raise HTTPException(status_code=500, detail=result["error"])
-
-        # Success: return the package the frontend expects
-        # The agent already formats this as: {"repurposed_content": ...}
-        return {
-            "status": "success",
-            **result  # This unpacks to {"repurposed_content": ...}
-        }
+        return run_repurposer_workflow(input_data)
 
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Unhandled error in /repurpose-article: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/repurpose-article/stream")
+async def repurpose_article_stream(input_data: RepurposerInput, request: Request):
+    """
+    Same workflow as /repurpose-article, streamed as Server-Sent Events.
+
+    Emits `started`, `digest`, then `summary`, `social_posts`, `faq_section`
+    and `entities` in whatever order the parallel branches finish, and
+    finally `result` (the /repurpose-article response) or `error`.
+    A client disconnect stops the run before its next node.
+    """
+    print("Received streaming repurposer payload:", input_data.article_text[:100] + "...")
+    events = stream_run(
+        request,
+        lambda emit, cancel: run_repurposer_workflow(input_data, on_event=emit, cancel=cancel),
+    )
+    return StreamingResponse(events, media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
@@ -0,0 +1,7 @@
+from typing import Optional
+from pydantic import BaseModel
+
+# Pydantic model to validate the input from the frontend
+class RepurposerInput(BaseModel):
+    article_text: str
+    threadId: Optional[str] = None  # reuse to resume a failed run
@@ -0,0 +1,160 @@
+"""
+Prometheus views of the stats the ``/health/*`` endpoints already report.
+
+Admission queues, agent leases, the provider pool, token usage and the LLM
+policies keep their own counters. They are read at scrape time here rather
+than being counted a second time in ``common.metrics``.
+"""
+
+from api.agent_manager import agent_manager
+from common.admission import admission_controller
+from common.metrics import registry
+from llm import (
+    cascade_metrics,
+    degradation_policy,
+    get_provider_pool,
+    hedge_policy,
+    structured_output_metrics,
+    usage_metrics,
+)
+
+
+def _admission(field: str):
+    def collect():
+        snapshot = admission_controller.snapshot()
+        yield ("*",), snapshot["total"][field]
+        for path, stats in snapshot["endpoints"].items():
+            yield (path,), stats[field]
+
+    return collect
+
+
+def _agents(field: str):
+    return lambda: (((name,), state[field]) for name, state in agent_manager.health().items())
+
+
+def _backends(field: str):
+    def collect():
+        pool = get_provider_pool()
+        for name, stats in (pool.snapshot() if pool else {}).items():
+            yield (name,), stats[field]
+
+    return collect
+
+
+def _tokens():
+    by_model = usage_metrics.snapshot()["model"]
+    for model, totals in by_model.items():
+        for kind in ("prompt", "completion"):
+            yield (model, kind), totals[f"{kind}_tokens"]
+
+
+def _usage(dimension: str, counter: str):
+    def collect():
+        for key, totals in usage_metrics.snapshot()[dimension].items():
+            yield (key,), totals[counter]
+
+    return collect
+
+
+def _structured(outcome: str):
+    return lambda: (
+        ((schema,), stats[outcome]) for schema, stats in structured_output_metrics.snapshot().items()
+    )
+
+
+def _cascade(field: str):
+    return lambda: (((step,), stats[field]) for step, stats in cascade_metrics.snapshot().items())
+
+
+# ---------------------------------------------------------------------------
+# Admission control and agents
+# ---------------------------------------------------------------------------
+registry.callback(
+    "admission_in_flight", "Admitted requests in progress per governed endpoint ('*' = all).",
+    _admission("in_flight"), labelnames=("endpoint",),
+)
+registry.callback(
+    "admission_queue_depth", "Requests waiting for an admission slot per endpoint.",
+    _admission("waiting"), labelnames=("endpoint",),
+)
+registry.callback(
+    "admission_rejected_total", "Requests rejected with 429 (queue full) per endpoint.",
+    _admission("rejected_429"), kind="counter", labelnames=("endpoint",),
+)
+registry.callback(
+    "admission_timed_out_total", "Requests rejected with 503 (queue wait timed out) per endpoint.",
+    _admission("rejected_503"), kind="counter", labelnames=("endpoint",),
+)
+registry.callback(
+    "agent_runs_in_flight", "Workflow runs holding an agent slot.",
+    _agents("in_flight"), labelnames=("agent",),
+)
+registry.callback(
+    "agent_queue_depth", "Workflow runs waiting for an agent slot.",
+    _agents("waiting"), labelnames=("agent",),
+)
+registry.callback(
+    "agent_runs_failed_total", "Workflow runs that raised.",
+    _agents("failed"), kind="counter", labelnames=("agent",),
+)
+registry.callback(
+    "agent_runs_rejected_total", "Workflow runs refused (agent unavailable or slot wait timed out).",
+    _agents("rejected"), kind="counter", labelnames=("agent",),
+)
+
+# ---------------------------------------------------------------------------
+# LLM backends and policies
+# ---------------------------------------------------------------------------
+registry.callback(
+    "llm_backend_in_flight", "Calls in progress per provider-pool backend.",
+    _backends("in_flight"), labelnames=("backend",),
+)
+registry.callback(
+    "llm_backend_failures_total", "Retryable failures per provider-pool backend.",
+    _backends("failures"), kind="counter", labelnames=("backend",),
+)
+registry.callback(
+    "llm_backend_ejected_seconds", "Seconds until an ejected backend is tried again (0 = in rotation).",
+    _backends("ejected_for_seconds"), labelnames=("backend",),
+)
+registry.callback(
+    "llm_tokens_total", "Tokens used per model and kind (prompt/completion).",
+    _tokens, kind="counter", labelnames=("model", "kind"),
+)
+registry.callback(
+    "llm_workflow_tokens_total", "Total tokens used per workflow.",
+    _usage("workflow", "total_tokens"), kind="counter", labelnames=("workflow",),
+)
+registry.callback(
+    "llm_tenant_tokens_total", "Total tokens used per tenant (X-Tenant-ID; unknown values as 'other').",
+    _usage("tenant", "total_tokens"), kind="counter", labelnames=("tenant",),
+)
+registry.callback(
+    "llm_queue_seconds_total", "Time spent in the upstream queue per model (Groq only).",
+    _usage("model", "queue_seconds"), kind="counter", labelnames=("model",),
+)
+registry.callback(
+    "llm_structured_retries_total", "Structured-output calls re-asked after an invalid reply.",
+    _structured("retried"), kind="counter", labelnames=("schema",),
+)
+registry.callback(
+    "llm_structured_failures_total", "Structured-output calls that never validated.",
+    _structured("failed"), kind="counter", labelnames=("schema",),
+)
+registry.callback(
+    "llm_cascade_escalations_total", "Cascade steps escalated from the fast to the full model.",
+    _cascade("escalations"), kind="counter", labelnames=("step",),
+)
+registry.callback(
+    "llm_hedged_calls_total", "Duplicate requests sent for slow critical calls.",
+    lambda: [((), hedge_policy.snapshot()["hedged"])], kind="counter",
+)
+registry.callback(
+    "llm_hedge_wins_total", "Hedged calls answered first by the duplicate.",
+    lambda: [((), hedge_policy.snapshot()["hedge_wins"])], kind="counter",
+)
+registry.callback(
+    "degraded_mode", "1 while new runs start in degraded mode.",
+    lambda: [((), int(degradation_policy.snapshot()["degraded"]))],
+)
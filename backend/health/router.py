@@ -1,15 +1,86 @@
 from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+import health.metrics  # noqa: F401  (registers the scrape-time collectors)
+from api.agent_manager import agent_manager
+from common.admission import admission_controller
+from common.metrics import CONTENT_TYPE, registry
+from llm import (
+    cascade_metrics,
+    degradation_policy,
+    get_provider_pool,
+    hedge_policy,
+    structured_output_metrics,
+    usage_metrics,
+)
 
 router = APIRouter(tags=["Health"])
 
 
+# Liveness/readiness probes are async so they never wait on the threadpool
+# that sync workflow endpoints can saturate.
 @router.get("/ping")
-def ping():
+async def ping():
     """Simple liveness endpoint."""
     return {"message": "pong"}
 
 
 @router.get("/health")
-def health():
+async def health():
     """Basic readiness endpoint."""
     return {"status": "ok"}
+
+
+@router.get("/health/structured-output")
+def structured_output_health():
+    """Per-schema JSON parse, repair, retry and failure counts for LLM calls."""
+    return {"schemas": structured_output_metrics.snapshot()}
+
+
+@router.get("/health/agents")
+def agents_health():
+    """Load state, in-flight runs, concurrency limits and failures per workflow agent."""
+    return {"agents": agent_manager.health()}
+
+
+@router.get("/health/admission")
+def admission_health():
+    """In-flight, queued and rejected (429/503) request counts per governed endpoint."""
+    return admission_controller.snapshot()
+
+
+@router.get("/health/degradation")
+def degradation_health():
+    """Whether new runs start in degraded mode, with recent latency percentiles per model."""
+    return degradation_policy.snapshot()
+
+
+@router.get("/health/cascade")
+def cascade_health():
+    """Per-step cascade calls, escalation rate and reasons, and which model served them."""
+    return {"steps": cascade_metrics.snapshot()}
+
+
+@router.get("/health/providers")
+def providers_health():
+    """Per-backend load, failures and ejection state of the LLM provider pool."""
+    pool = get_provider_pool()
+    return {"backends": pool.snapshot() if pool else {}}
+
+
+@router.get("/health/hedging")
+def hedging_health():
+    """Hedged-call counts, wins and the recent hedge rate against its budget."""
+    return hedge_policy.snapshot()
+
+
+@router.get("/health/usage")
+def usage_health():
+    """Token usage and upstream time per workflow, node, model and tenant since startup."""
+    return usage_metrics.snapshot()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Prometheus scrape endpoint: HTTP, node, upstream, cache and event-loop metrics."""
+    return PlainTextResponse(registry.render(), media_type=CONTENT_TYPE)
@@ -0,0 +1,63 @@
+from fastapi import APIRouter, HTTPException, Request
+from pydantic import ValidationError
+
+from .store import QUEUED
+from .workflows import WORKFLOWS
+from .worker import job_queue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+
+@router.post("/{workflow}", status_code=202)
+async def submit_job(workflow: str, request: Request):
+    """
+    Queue a workflow run and return immediately with a job id.
+
+    The body is the same JSON the synchronous endpoint for that workflow
+    accepts. Poll ``GET /jobs/{job_id}`` for progress and the result.
+    """
+    if workflow not in WORKFLOWS:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Unknown workflow '{workflow}'. Available: {', '.join(WORKFLOWS)}",
+        )
+
+    try:
+        payload = await request.json()
+    except ValueError as exc:
+        raise HTTPException(status_code=422, detail="Request body must be valid JSON.") from exc
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=422, detail="Request body must be a JSON object.")
+    try:
+        job_id = job_queue.submit(workflow, payload)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors()) from exc
+    except (TypeError, ValueError) as exc:  # payload shape the normalizers cannot read
+        raise HTTPException(status_code=422, detail=str(exc)) from exc
+
+    return {"status": "queued", "jobId": job_id, "workflow": workflow}
+
+
+@router.get("/{job_id}")
+def get_job(job_id: str):
+    """Return status, node-level progress and (once finished) the workflow result."""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+
+    return {
+        "jobId": job["id"],
+        "workflow": job["workflow"],
+        "status": job["status"],
+        "attempts": job["attempts"],
+        "progress": job["progress"],
+        "result": job["result"],
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+        "retry_at": job["run_after"] if job["status"] == QUEUED else None,
+    }
+
+
+__all__ = ["router"]
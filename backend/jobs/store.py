@@ -0,0 +1,209 @@
+"""
+SQLite-backed durable job queue.
+
+Jobs are rows in a single table. Workers claim the oldest queued row inside
+an immediate transaction, so one process can run several worker threads
+without handing the same job out twice. Jobs that were running when the
+process stopped are put back in the queue on startup, unless they have
+already been tried ``JOB_MAX_ATTEMPTS`` times (a job that keeps crashing the
+process would otherwise loop forever). Jobs that failed for a transient
+reason are queued again with a ``run_after`` time and claimed once it passes.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+DEFAULT_DB_PATH = Path(__file__).resolve().parent.parent / "data" / "jobs.sqlite3"
+DEFAULT_MAX_ATTEMPTS = 3
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    workflow TEXT NOT NULL,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    progress TEXT NOT NULL DEFAULT '[]',
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    run_after REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created ON jobs (status, created_at);
+"""
+
+
+def job_max_attempts() -> int:
+    return int(os.getenv("JOB_MAX_ATTEMPTS", DEFAULT_MAX_ATTEMPTS))
+
+
+class JobStore:
+    """Thread-safe wrapper around the jobs table."""
+
+    def __init__(self, path: Optional[str] = None) -> None:
+        self.path = Path(path or os.getenv("JOBS_DB_PATH") or DEFAULT_DB_PATH)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            str(self.path), check_same_thread=False, isolation_level=None
+        )
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        columns = {row["name"] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "run_after" not in columns:
+            # Databases created before retries were delayed
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN run_after REAL")
+
+    # ------------------------------------------------------------------ #
+    # Producer side
+    # ------------------------------------------------------------------ #
+    def enqueue(self, workflow: str, payload: Dict[str, Any]) -> str:
+        job_id = str(uuid.uuid4())
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (id, workflow, status, payload, created_at, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, workflow, QUEUED, json.dumps(payload), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._to_dict(row) if row else None
+
+    # ------------------------------------------------------------------ #
+    # Worker side
+    # ------------------------------------------------------------------ #
+    def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically move the oldest queued job that is due to ``running`` and return it."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? AND (run_after IS NULL OR run_after <= ?)"
+                    " ORDER BY created_at LIMIT 1",
+                    (QUEUED, now),
+                ).fetchone()
+                if row is None:
+                    self._conn.execute("COMMIT")
+                    return None
+                self._conn.execute(
+                    "UPDATE jobs SET status = ?, attempts = attempts + 1,"
+                    " started_at = ?, updated_at = ? WHERE id = ?",
+                    (RUNNING, now, now, row["id"]),
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        job = self._to_dict(row)
+        job["status"] = RUNNING
+        job["attempts"] += 1
+        return job
+
+    def append_progress(self, job_id: str, step: str) -> None:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT progress FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            if row is None:
+                return
+            progress = json.loads(row["progress"])
+            progress.append({"step": step, "at": time.time()})
+            self._conn.execute(
+                "UPDATE jobs SET progress = ?, updated_at = ? WHERE id = ?",
+                (json.dumps(progress), time.time(), job_id),
+            )
+
+    def mark_succeeded(self, job_id: str, result: Dict[str, Any]) -> None:
+        self._finish(job_id, SUCCEEDED, result=json.dumps(result, default=str))
+
+    def mark_failed(self, job_id: str, error: str) -> None:
+        self._finish(job_id, FAILED, error=error)
+
+    def retry_later(self, job_id: str, error: str, delay: float) -> None:
+        """Put a running job back in the queue, to be claimed after ``delay`` seconds."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, run_after = ?, updated_at = ? WHERE id = ?",
+                (QUEUED, error, now + delay, now, job_id),
+            )
+
+    def requeue_interrupted(self, max_attempts: Optional[int] = None) -> Tuple[int, int]:
+        """Return jobs left ``running`` by a previous process to the queue.
+
+        Jobs that already used ``max_attempts`` are failed instead. Returns
+        ``(requeued, failed)``.
+        """
+        if max_attempts is None:
+            max_attempts = job_max_attempts()
+        now = time.time()
+        with self._lock:
+            failed = self._conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ?, updated_at = ?"
+                " WHERE status = ? AND attempts >= ?",
+                (
+                    FAILED,
+                    f"Interrupted after {max_attempts} attempt(s); not retried again.",
+                    now,
+                    now,
+                    RUNNING,
+                    max_attempts,
+                ),
+            ).rowcount
+            requeued = self._conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE status = ?",
+                (QUEUED, now, RUNNING),
+            ).rowcount
+        return requeued, failed
+
+    def count_by_status(self) -> Dict[str, int]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT status, COUNT(*) AS total FROM jobs GROUP BY status"
+            ).fetchall()
+        return {row["status"]: row["total"] for row in rows}
+
+    # ------------------------------------------------------------------ #
+    # Internal helpers
+    # ------------------------------------------------------------------ #
+    def _finish(
+        self, job_id: str, status: str, *, result: Optional[str] = None, error: Optional[str] = None
+    ) -> None:
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?,"
+                " finished_at = ?, updated_at = ? WHERE id = ?",
+                (status, result, error, now, now, job_id),
+            )
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        job = dict(row)
+        job["payload"] = json.loads(job["payload"])
+        job["progress"] = json.loads(job["progress"] or "[]")
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        return job
+
@@ -0,0 +1,163 @@
+"""Worker pool that drains the durable job queue."""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from typing import Any, Dict, List, Optional
+
+from pydantic import ValidationError
+
+from common.threads import resolve_thread_id, reuse_finished_runs
+
+from .store import JobStore, job_max_attempts
+from .workflows import WORKFLOWS
+
+DEFAULT_WORKERS = 2
+POLL_INTERVAL_SECONDS = 1.0
+RETRY_BASE_SECONDS = 5.0
+RETRY_MAX_SECONDS = 300.0
+
+
+def is_permanent_failure(exc: Exception) -> bool:
+    """True for errors a retry cannot fix: invalid payloads and other 4xx responses.
+
+    Everything else (a busy or unavailable agent, upstream errors, timeouts)
+    is retried with backoff until the attempt cap.
+    """
+    if isinstance(exc, ValidationError):
+        return True
+    status = getattr(exc, "status_code", None)
+    return isinstance(status, int) and 400 <= status < 500 and status not in (408, 429)
+
+
+def retry_delay(attempts: int, retry_after: Optional[float] = None) -> float:
+    """Exponential backoff after ``attempts`` tries, never sooner than ``retry_after``."""
+    backoff = min(RETRY_MAX_SECONDS, RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0))
+    return max(backoff, float(retry_after or 0))
+
+
+class JobQueue:
+    """Accepts workflow jobs and executes them on a fixed pool of threads."""
+
+    def __init__(self, store: Optional[JobStore] = None, workers: Optional[int] = None) -> None:
+        self.logger = logging.getLogger("JobQueue")
+        self._store = store
+        self.workers = workers or int(os.getenv("JOB_WORKERS", DEFAULT_WORKERS))
+        self._threads: List[threading.Thread] = []
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    @property
+    def store(self) -> JobStore:
+        # Opened lazily so importing the router does not touch the filesystem.
+        if self._store is None:
+            self._store = JobStore()
+        return self._store
+
+    # ------------------------------------------------------------------ #
+    # Lifecycle
+    # ------------------------------------------------------------------ #
+    def start(self) -> None:
+        if self._threads:
+            return
+        requeued, failed = self.store.requeue_interrupted()
+        if requeued:
+            self.logger.info(f"Re-queued {requeued} interrupted job(s).")
+        if failed:
+            self.logger.warning(f"Failed {failed} job(s) that were interrupted too often.")
+
+        self._stop.clear()
+        for index in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, name=f"job-worker-{index}", daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        self.logger.info(f"Started {self.workers} job worker(s).")
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        self._wake.set()
+        for thread in self._threads:
+            thread.join(timeout=timeout)
+        self._threads = []
+
+    # ------------------------------------------------------------------ #
+    # Producer API
+    # ------------------------------------------------------------------ #
+    def submit(self, workflow: str, payload: Dict[str, Any]) -> str:
+        if workflow not in WORKFLOWS:
+            raise KeyError(workflow)
+        validate = WORKFLOWS[workflow].validate
+        if validate is not None:
+            validate(payload)
+
+        # Pin a thread id so a job re-run after a restart resumes its checkpoint
+        payload["threadId"] = resolve_thread_id(payload)
+        job_id = self.store.enqueue(workflow, payload)
+        self._wake.set()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        return self.store.get(job_id)
+
+    # ------------------------------------------------------------------ #
+    # Worker loop
+    # ------------------------------------------------------------------ #
+    def _work(self) -> None:
+        while not self._stop.is_set():
+            job = self.store.claim_next()
+            if job is None:
+                self._wake.wait(POLL_INTERVAL_SECONDS)
+                self._wake.clear()
+                continue
+            self._execute(job)
+
+    def _execute(self, job: Dict[str, Any]) -> None:
+        job_id = job["id"]
+        workflow = WORKFLOWS.get(job["workflow"])
+        if workflow is None:
+            self.store.mark_failed(job_id, f"Unknown workflow '{job['workflow']}'")
+            return
+
+        self.logger.info(f"[job {job_id}] running '{job['workflow']}' (attempt {job['attempts']})")
+        try:
+            # A re-run job whose workflow had already finished returns that result.
+            with reuse_finished_runs():
+                result = workflow.run(
+                    job["payload"], lambda step: self.store.append_progress(job_id, step)
+                )
+        except Exception as exc:
+            detail = str(getattr(exc, "detail", None) or exc)
+            if is_permanent_failure(exc):
+                self.logger.error(f"[job {job_id}] failed: {detail}")
+                self.store.mark_failed(job_id, detail)
+            else:
+                self._retry_or_fail(job, detail, getattr(exc, "retry_after", None))
+            return
+
+        if isinstance(result, dict) and result.get("status") == "error":
+            # Agents report upstream errors (rate limits, 503s...) as error results.
+            self._retry_or_fail(job, result.get("message", "Unknown agent error"))
+            return
+        self.store.mark_succeeded(job_id, result)
+        self.logger.info(f"[job {job_id}] succeeded")
+
+    def _retry_or_fail(self, job: Dict[str, Any], error: str, retry_after: Optional[float] = None) -> None:
+        job_id, attempts = job["id"], job["attempts"]
+        max_attempts = job_max_attempts()
+        if attempts >= max_attempts:
+            self.logger.error(f"[job {job_id}] failed after {attempts} attempt(s): {error}")
+            self.store.mark_failed(job_id, f"{error} (gave up after {attempts} attempt(s))")
+            return
+        delay = retry_delay(attempts, retry_after)
+        self.logger.warning(
+            f"[job {job_id}] attempt {attempts}/{max_attempts} failed, retrying in {delay:.0f}s: {error}"
+        )
+        self.store.retry_later(job_id, error, delay)
+
+
+# Global instance (importable anywhere)
+job_queue = JobQueue()
@@ -0,0 +1,107 @@
+"""
+Workflows that can be run through the job queue.
+
+Each entry wraps the same code path as the synchronous endpoint so a job
+result has exactly the shape the frontend already understands. Imports are
+deferred to call time so the queue does not pull every agent in at startup.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional
+
+Progress = Callable[[str], None]
+
+
+@dataclass(frozen=True)
+class JobWorkflow:
+    run: Callable[[Dict[str, Any], Progress], Dict[str, Any]]
+    validate: Optional[Callable[[Dict[str, Any]], Any]] = None
+
+
+def _validate_blog(payload: Dict[str, Any]):
+    from blog.blog_workflow_model import BlogState
+    from blog.router import normalize_input
+
+    return BlogState(**normalize_input(payload))
+
+
+def _run_blog(payload: Dict[str, Any], on_progress: Progress) -> Dict[str, Any]:
+    from blog.router import run_blog_workflow
+
+    return asyncio.run(run_blog_workflow(payload, on_progress=on_progress))
+
+
+def _validate_news(payload: Dict[str, Any]):
+    from news.news_workflow_model import NewsArticleState
+    from news.router import normalize_news_input
+
+    return NewsArticleState(**normalize_news_input(payload))
+
+
+def _run_news(payload: Dict[str, Any], on_progress: Progress) -> Dict[str, Any]:
+    from news.router import run_news_workflow
+
+    return asyncio.run(run_news_workflow(payload, on_progress=on_progress))
+
+
+def _validate_youtube_script(payload: Dict[str, Any]):
+    from youtube.youtube_script_model import YoutubeScript
+
+    return YoutubeScript(**payload)
+
+
+def _run_youtube_script(payload: Dict[str, Any], on_progress: Progress) -> Dict[str, Any]:
+    from youtube.router import run_youtube_script_workflow
+
+    return asyncio.run(run_youtube_script_workflow(payload, on_progress=on_progress))
+
+
+def _validate_youtube_blog(payload: Dict[str, Any]):
+    from youtubeBlog.schemas import YouTubeBlogInput
+
+    return YouTubeBlogInput(**payload)
+
+
+def _run_youtube_blog(payload: Dict[str, Any], on_progress: Progress) -> Dict[str, Any]:
+    from api.agent_manager import agent_manager
+
+    with agent_manager.lease("youtube-blog") as agent:
+        return agent.invoke(_validate_youtube_blog(payload), on_progress=on_progress)
+
+
+def _validate_repurposer(payload: Dict[str, Any]):
+    from contentRepurposer.schemas import RepurposerInput
+
+    return RepurposerInput(**payload)
+
+
+def _run_repurposer(payload: Dict[str, Any], on_progress: Progress) -> Dict[str, Any]:
+    from contentRepurposer.router import run_repurposer_workflow
+
+    return run_repurposer_workflow(_validate_repurposer(payload), on_progress=on_progress)
+
+
+def _validate_x_post(payload: Dict[str, Any]):
+    from x_post.schemas import XPostInput
+
+    return XPostInput(**payload)
+
+
+def _run_x_post(payload: Dict[str, Any], on_progress: Progress) -> Dict[str, Any]:
+    from api.agent_manager import agent_manager
+
+    with agent_manager.lease("x-post") as agent:
+        return agent.invoke(_validate_x_post(payload), on_progress=on_progress)
+
+
+WORKFLOWS: Dict[str, JobWorkflow] = {
+    "blog": JobWorkflow(run=_run_blog, validate=_validate_blog),
+    "news": JobWorkflow(run=_run_news, validate=_validate_news),
+    "youtube-script": JobWorkflow(run=_run_youtube_script, validate=_validate_youtube_script),
+    "youtube-blog": JobWorkflow(run=_run_youtube_blog, validate=_validate_youtube_blog),
+    "repurposer": JobWorkflow(run=_run_repurposer, validate=_validate_repurposer),
+    "x-post": JobWorkflow(run=_run_x_post, validate=_validate_x_post),
+}
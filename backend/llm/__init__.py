@@ -0,0 +1,68 @@
+from .cascade import (
+    CascadeStep,
+    all_of,
+    cascade_metrics,
+    forbid,
+    require_verdict,
+    run_cascade,
+    word_range,
+)
+from .clients import LazyClient, get_client, get_provider_pool, set_client
+from .degradation import (
+    FAST_MODEL,
+    FULL_MODEL,
+    degradation_policy,
+    degraded_run,
+    full_quality,
+    is_degraded,
+    route,
+    skip_optional,
+)
+from .hedging import hedge_policy, hedged_create
+from .providers import JUDGE_ROLE, FakeChatClient, NoBackendAvailableError, ProviderPool
+from .structured import (
+    StructuredOutputError,
+    complete_json,
+    parse_structured,
+    repair_json,
+    structured_output_metrics,
+)
+from .usage import UsageLedger, UsageMiddleware, current_ledger, usage_metrics, usage_scope
+
+__all__ = [
+    "CascadeStep",
+    "all_of",
+    "cascade_metrics",
+    "forbid",
+    "require_verdict",
+    "run_cascade",
+    "word_range",
+    "LazyClient",
+    "get_client",
+    "get_provider_pool",
+    "set_client",
+    "FAST_MODEL",
+    "FULL_MODEL",
+    "degradation_policy",
+    "degraded_run",
+    "full_quality",
+    "is_degraded",
+    "route",
+    "skip_optional",
+    "hedge_policy",
+    "hedged_create",
+    "JUDGE_ROLE",
+    "FakeChatClient",
+    "NoBackendAvailableError",
+    "ProviderPool",
+    "StructuredOutputError",
+    "complete_json",
+    "parse_structured",
+    "repair_json",
+    "structured_output_metrics",
+    "UsageLedger",
+    "UsageMiddleware",
+    "current_ledger",
+    "usage_metrics",
+    "usage_scope",
+]
@@ -0,0 +1,198 @@
+"""
+Model cascade: try the fast model first, escalate only when its output fails.
+
+Some steps (compliance reviews, image-prompt crafting) always ran on the 70B
+model although the 8B model handles most of them. A ``CascadeStep`` names
+the step, the models to try in order and a cheap validator (verdict present,
+length within bounds, ...). ``run_cascade`` returns the first output that
+passes; the last model's output is returned as-is. Escalations and their
+reasons are counted per step (``cascade_metrics``) so the validators and the
+step list can be tuned.
+
+``LLM_CASCADE_DISABLED`` (comma separated step names, or ``all``) sends those
+steps straight to the last model. In degraded mode steps never escalate.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .degradation import FAST_MODEL, FULL_MODEL, is_degraded
+
+# Returns a short failure reason, or None when the output is acceptable.
+Validator = Callable[[str], Optional[str]]
+
+WORD_PATTERN = re.compile(r"\S+")
+
+
+# ------------------------------------------------------------------ #
+# Validators
+# ------------------------------------------------------------------ #
+def require_verdict(*verdicts: str) -> Validator:
+    """Output must name one of ``verdicts`` (case-insensitive)."""
+
+    def validate(text: str) -> Optional[str]:
+        upper = text.upper()
+        if not any(verdict.upper() in upper for verdict in verdicts):
+            return "missing_verdict"
+        return None
+
+    return validate
+
+
+def word_range(min_words: int, max_words: int) -> Validator:
+    def validate(text: str) -> Optional[str]:
+        words = len(WORD_PATTERN.findall(text))
+        if words < min_words:
+            return "too_short"
+        if words > max_words:
+            return "too_long"
+        return None
+
+    return validate
+
+
+def forbid(*phrases: str) -> Validator:
+    """Output must not contain any of ``phrases`` as whole words (case-insensitive)."""
+    patterns = [
+        (
+            phrase,
+            re.compile(
+                (r"\b" if phrase[:1].isalnum() else "")
+                + re.escape(phrase)
+                + (r"\b" if phrase[-1:].isalnum() else ""),
+                re.IGNORECASE,
+            ),
+        )
+        for phrase in phrases
+    ]
+
+    def validate(text: str) -> Optional[str]:
+        for phrase, pattern in patterns:
+            if pattern.search(text):
+                return f"contains:{phrase}"
+        return None
+
+    return validate
+
+
+def all_of(*validators: Validator) -> Validator:
+    def validate(text: str) -> Optional[str]:
+        for validator in validators:
+            reason = validator(text)
+            if reason:
+                return reason
+        return None
+
+    return validate
+
+
+@dataclass(frozen=True)
+class CascadeStep:
+    name: str
+    validator: Validator
+    models: Tuple[str, ...] = (FAST_MODEL, FULL_MODEL)
+
+    def enabled(self) -> bool:
+        disabled = {
+            item.strip() for item in os.getenv("LLM_CASCADE_DISABLED", "").split(",") if item.strip()
+        }
+        return not ({"all", self.name} & disabled)
+
+
+# ------------------------------------------------------------------ #
+# Metrics
+# ------------------------------------------------------------------ #
+class CascadeMetrics:
+    """Per-step calls, escalations (with reasons) and which model served the result."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: Counter = Counter()
+        self._escalations: Counter = Counter()
+        self._reasons: Dict[str, Counter] = defaultdict(Counter)
+        self._served_by: Dict[str, Counter] = defaultdict(Counter)
+        self._unresolved: Counter = Counter()
+
+    def record(
+        self, step: str, served_by: str, reasons: List[str], resolved: bool
+    ) -> None:
+        with self._lock:
+            self._calls[step] += 1
+            self._served_by[step][served_by] += 1
+            if reasons:
+                self._escalations[step] += 1
+                self._reasons[step].update(reasons)
+            if not resolved:
+                self._unresolved[step] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            return {
+                step: {
+                    "calls": calls,
+                    "escalations": self._escalations[step],
+                    "escalation_rate": round(self._escalations[step] / calls, 4),
+                    "unresolved": self._unresolved[step],
+                    "reasons": dict(self._reasons[step]),
+                    "served_by": dict(self._served_by[step]),
+                }
+                for step, calls in self._calls.items()
+            }
+
+
+# Global instance (importable anywhere)
+cascade_metrics = CascadeMetrics()
+
+
+# ------------------------------------------------------------------ #
+# Runner
+# ------------------------------------------------------------------ #
+def run_cascade(
+    client: Any,
+    step: CascadeStep,
+    messages: List[Dict[str, str]],
+    *,
+    max_tokens: int = 512,
+    temperature: float = 0.7,
+    top_p: float = 1,
+) -> str:
+    """Complete ``messages`` with the cheapest model in ``step`` whose output validates."""
+    models = step.models if step.enabled() else step.models[-1:]
+    if is_degraded():
+        # Under upstream pressure take the fast model's answer as it is.
+        models = models[:1]
+
+    reasons: List[str] = []
+    text = ""
+    for position, model in enumerate(models):
+        last = position == len(models) - 1
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=messages,
+                temperature=temperature,
+                max_completion_tokens=max_tokens,
+                top_p=top_p,
+                stream=False,
+            )
+        except Exception as exc:
+            if last:
+                raise
+            reasons.append(f"error:{type(exc).__name__}")
+            continue
+
+        text = (completion.choices[0].message.content or "").strip()
+        reason = step.validator(text)
+        if reason is None or last:
+            cascade_metrics.record(step.name, model, reasons, resolved=reason is None)
+            return text
+        print(f"Cascade '{step.name}': {model} output rejected ({reason}), escalating.")
+        reasons.append(reason)
+
+    return text
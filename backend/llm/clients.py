@@ -0,0 +1,114 @@
+"""
+Shared, lazily created LLM clients.
+
+Model modules used to call ``Groq()`` at import time (one HTTP client each),
+which slowed startup and failed imports when the key was missing.
+``get_client`` creates one client per name on first use and shares it;
+``LazyClient`` is a drop-in module-level stand-in for ``Groq()`` that defers
+that until the first request. The default client is the ``ProviderPool``
+from ``llm.providers`` (Groq unless ``LLM_BACKENDS`` says otherwise). Shared
+clients time every chat completion and feed the latency to
+``llm.degradation``, and record the token usage of each response
+(``llm.usage``). Within a request deadline (``common.deadline``) each
+call gets the remaining time as its ``timeout``.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Dict
+
+from common.deadline import current_deadline
+from common.metrics import upstream_in_flight, upstream_seconds
+
+from .degradation import degradation_policy
+from .usage import record_completion
+from .providers import ProviderPool, build_provider_pool
+
+DEFAULT_CLIENT = "default"
+
+_clients: Dict[str, Any] = {}
+_clients_lock = threading.Lock()
+
+
+class _TimedCompletions:
+    def __init__(self, completions: Any) -> None:
+        self._completions = completions
+
+    def create(self, **kwargs: Any) -> Any:
+        deadline = current_deadline()
+        if deadline is not None:
+            # Raises instead of starting a call that cannot finish in time.
+            kwargs["timeout"] = deadline.call_timeout(kwargs.get("timeout"))
+        started = time.perf_counter()
+        outcome = "error"
+        upstream_in_flight.inc(service="llm")
+        try:
+            response = self._completions.create(**kwargs)
+            outcome = "ok"
+        finally:
+            # Failures (timeouts especially) count: they are the latency users see.
+            elapsed = time.perf_counter() - started
+            upstream_in_flight.dec(service="llm")
+            upstream_seconds.observe(
+                elapsed, service="llm", target=kwargs.get("model", ""), outcome=outcome
+            )
+            degradation_policy.observe(kwargs.get("model"), elapsed)
+        if not kwargs.get("stream"):
+            record_completion(kwargs.get("model"), response, elapsed)
+        return response
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self._completions, attr)
+
+
+class InstrumentedClient:
+    """Wraps an SDK client so ``chat.completions.create`` calls are timed and accounted."""
+
+    def __init__(self, client: Any) -> None:
+        self.wrapped = client
+        self.chat = SimpleNamespace(completions=_TimedCompletions(client.chat.completions))
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(self.wrapped, attr)
+
+
+def _create_client(name: str) -> Any:
+    if name == DEFAULT_CLIENT:
+        return InstrumentedClient(build_provider_pool())
+    raise KeyError(f"Unknown LLM client '{name}'")
+
+
+def get_client(name: str = DEFAULT_CLIENT) -> Any:
+    """Return the shared client for ``name``, creating it on first use."""
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                client = _clients[name] = _create_client(name)
+    return client
+
+
+def set_client(client: Any, name: str = DEFAULT_CLIENT) -> None:
+    """Install ``client`` (e.g. a ``FakeChatClient``) as the shared client for ``name``."""
+    with _clients_lock:
+        _clients[name] = InstrumentedClient(client)
+
+
+def get_provider_pool() -> ProviderPool | None:
+    """The provider pool behind the default client, if it is one."""
+    pool = getattr(get_client(), "wrapped", None)
+    return pool if isinstance(pool, ProviderPool) else None
+
+
+class LazyClient:
+    """Proxy that resolves ``get_client(name)`` on first attribute access."""
+
+    def __init__(self, name: str = DEFAULT_CLIENT) -> None:
+        self._name = name
+
+    def __getattr__(self, attr: str) -> Any:
+        return getattr(get_client(self._name), attr)
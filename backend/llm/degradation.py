@@ -0,0 +1,221 @@
+"""
+Degraded fast mode driven by observed upstream latency.
+
+When the 70B model slows down, every workflow step on it slows down with it
+and requests start timing out together. Every completion made through the
+shared clients is timed here. While the p95 latency of the full model stays
+above ``DEGRADE_ENTER_P95_SECONDS``, new runs start in degraded mode:
+
+* non-critical steps are routed to the fast 8B model with a smaller
+  ``max_tokens`` (``route``);
+* optional review steps (compliance reviews, revisions) are skipped
+  (``skip_optional``, which also skips them when the request deadline from
+  ``common.deadline`` is close);
+* responses carry ``"degraded": true``.
+
+Critical steps (the main draft of each workflow) keep the full model, so
+their latency keeps being observed. Degraded mode ends once the p95 falls
+below ``DEGRADE_EXIT_P95_SECONDS`` or the samples age out of the window.
+``LLM_DEGRADED_MODE=on|off`` forces the mode; the default is ``auto``.
+
+The mode is decided once per run (``degraded_run``) and read through a
+context variable, which LangGraph copies into its node threads.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Deque, Dict, Iterator, Optional, Tuple
+
+from common.deadline import time_short
+
+FULL_MODEL = "llama-3.3-70b-versatile"
+FAST_MODEL = "llama-3.1-8b-instant"
+# Model used for non-critical steps while degraded
+FALLBACK_MODELS = {FULL_MODEL: FAST_MODEL}
+
+DEFAULT_ENTER_P95_SECONDS = 15.0
+DEFAULT_EXIT_P95_SECONDS = 8.0
+DEFAULT_WINDOW_SECONDS = 300.0
+DEFAULT_MIN_SAMPLES = 10
+DEFAULT_MAX_TOKENS_FACTOR = 0.6
+MIN_MAX_TOKENS = 128
+MAX_SAMPLES = 500
+
+_degraded: contextvars.ContextVar[bool] = contextvars.ContextVar("llm_degraded", default=False)
+
+
+def percentile(values, pct: float) -> Optional[float]:
+    """Nearest-rank percentile; ``None`` for no values."""
+    ordered = sorted(values)
+    if not ordered:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+class DegradationPolicy:
+    """Rolling per-model latency window with hysteresis on the full model's p95."""
+
+    def __init__(
+        self,
+        *,
+        mode: Optional[str] = None,
+        watch_model: str = FULL_MODEL,
+        enter_seconds: Optional[float] = None,
+        exit_seconds: Optional[float] = None,
+        window_seconds: Optional[float] = None,
+        min_samples: Optional[int] = None,
+        max_tokens_factor: Optional[float] = None,
+    ) -> None:
+        self.logger = logging.getLogger("DegradationPolicy")
+        self.mode = (mode or os.getenv("LLM_DEGRADED_MODE", "auto")).strip().lower()
+        self.watch_model = watch_model
+        self.enter_seconds = enter_seconds or float(
+            os.getenv("DEGRADE_ENTER_P95_SECONDS", DEFAULT_ENTER_P95_SECONDS)
+        )
+        self.exit_seconds = exit_seconds or float(
+            os.getenv("DEGRADE_EXIT_P95_SECONDS", DEFAULT_EXIT_P95_SECONDS)
+        )
+        self.window_seconds = window_seconds or DEFAULT_WINDOW_SECONDS
+        self.min_samples = min_samples or DEFAULT_MIN_SAMPLES
+        self.max_tokens_factor = max_tokens_factor or float(
+            os.getenv("DEGRADE_MAX_TOKENS_FACTOR", DEFAULT_MAX_TOKENS_FACTOR)
+        )
+        self._samples: Dict[str, Deque[Tuple[float, float]]] = {}
+        self._lock = threading.Lock()
+        self._degraded = False
+        self._since: Optional[float] = None
+        self.degraded_runs = 0
+        self.total_runs = 0
+
+    # ------------------------------------------------------------------ #
+    # Observations
+    # ------------------------------------------------------------------ #
+    def observe(self, model: Optional[str], seconds: float) -> None:
+        if not model:
+            return
+        with self._lock:
+            samples = self._samples.setdefault(model, deque(maxlen=MAX_SAMPLES))
+            samples.append((time.monotonic(), seconds))
+
+    def _recent(self, model: str) -> list:
+        cutoff = time.monotonic() - self.window_seconds
+        samples = self._samples.get(model, ())
+        return [seconds for at, seconds in samples if at >= cutoff]
+
+    def recent(self, model: str) -> list:
+        """Latencies (seconds) observed for ``model`` within the window."""
+        with self._lock:
+            return self._recent(model)
+
+    def p95(self, model: Optional[str] = None) -> Optional[float]:
+        with self._lock:
+            return percentile(self._recent(model or self.watch_model), 95)
+
+    # ------------------------------------------------------------------ #
+    # Decision
+    # ------------------------------------------------------------------ #
+    def active(self) -> bool:
+        """Whether a run starting now should be degraded."""
+        if self.mode == "on":
+            return True
+        if self.mode == "off":
+            return False
+        with self._lock:
+            recent = self._recent(self.watch_model)
+            p95 = percentile(recent, 95) if len(recent) >= self.min_samples else None
+            if not self._degraded and p95 is not None and p95 > self.enter_seconds:
+                self._degraded, self._since = True, time.time()
+                self.logger.warning(
+                    f"Entering degraded mode: {self.watch_model} p95 {p95:.1f}s"
+                    f" > {self.enter_seconds:.1f}s"
+                )
+            elif self._degraded and (p95 is None or p95 < self.exit_seconds):
+                self._degraded, self._since = False, None
+                self.logger.warning("Leaving degraded mode: upstream latency recovered.")
+            return self._degraded
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            models = {
+                model: {
+                    "samples": len(recent),
+                    "p50_seconds": percentile(recent, 50),
+                    "p95_seconds": percentile(recent, 95),
+                }
+                for model, recent in ((m, self._recent(m)) for m in self._samples)
+            }
+            return {
+                "mode": self.mode,
+                "degraded": self._degraded if self.mode == "auto" else self.mode == "on",
+                "degraded_since": self._since,
+                "enter_p95_seconds": self.enter_seconds,
+                "exit_p95_seconds": self.exit_seconds,
+                "runs": self.total_runs,
+                "degraded_runs": self.degraded_runs,
+                "models": models,
+            }
+
+
+degradation_policy = DegradationPolicy()
+
+
+# ---------------------------------------------------------------------------
+# Per-run helpers used by agents and model modules
+# ---------------------------------------------------------------------------
+@contextmanager
+def degraded_run(policy: DegradationPolicy = degradation_policy) -> Iterator[bool]:
+    """Decide the mode once for a workflow run; yields whether it is degraded."""
+    degraded = policy.active()
+    with policy._lock:
+        policy.total_runs += 1
+        policy.degraded_runs += int(degraded)
+    token = _degraded.set(degraded)
+    try:
+        yield degraded
+    finally:
+        _degraded.reset(token)
+
+
+@contextmanager
+def full_quality() -> Iterator[None]:
+    """Run outside degraded mode, e.g. background work no request is waiting on."""
+    token = _degraded.set(False)
+    try:
+        yield
+    finally:
+        _degraded.reset(token)
+
+
+def is_degraded() -> bool:
+    return _degraded.get()
+
+
+def route(model: str, max_tokens: int, *, critical: bool = False) -> Tuple[str, int]:
+    """Model and token budget for one call, downgraded for non-critical steps."""
+    if critical or not is_degraded():
+        return model, max_tokens
+    reduced = max(MIN_MAX_TOKENS, int(max_tokens * degradation_policy.max_tokens_factor))
+    return FALLBACK_MODELS.get(model, model), min(max_tokens, reduced)
+
+
+def skip_optional(step: str) -> bool:
+    """True when an optional step (review, revision) should be skipped for this run.
+
+    Steps are skipped in degraded mode and when the request deadline is close.
+    """
+    if is_degraded():
+        print(f"Degraded mode: skipping {step}.")
+        return True
+    if time_short():
+        print(f"Request deadline close: skipping {step}.")
+        return True
+    return False
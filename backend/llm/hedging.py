@@ -0,0 +1,183 @@
+"""
+Hedged completions for critical-path calls.
+
+Upstream p99 latency is several times the median, and a multi-step graph
+hits the tail on almost every run. ``hedged_create`` sends the request, waits
+for the ``LLM_HEDGE_PERCENTILE`` (default p90) of the model's recent latency
+and, if no response has arrived, sends a duplicate. The first response wins;
+the other one is cancelled if it has not started, and otherwise closed when
+it completes (streams and raw responses release their connection).
+
+A blocking SDK call cannot be interrupted, so a primary that a hedge may
+overtake has to run off the caller's thread. Calls that cannot be hedged
+(hedging off, too few samples, budget spent) therefore run inline on the
+caller's thread, and only hedgeable calls use the pool.
+
+Duplicates cost tokens, so hedging is capped: at most ``LLM_HEDGE_MAX_RATE``
+(default 10%) of the recent hedge-eligible calls may be hedged. Latency comes
+from the samples ``llm.degradation`` already collects; until a model has
+``MIN_SAMPLES`` of them nothing is hedged. ``LLM_HEDGING=off`` disables it.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Deque, Dict, Optional
+
+from .degradation import DegradationPolicy, degradation_policy, percentile
+
+DEFAULT_PERCENTILE = 90.0
+DEFAULT_MAX_RATE = 0.1
+DEFAULT_MIN_DELAY_SECONDS = 1.0
+MIN_SAMPLES = 20
+BUDGET_WINDOW_CALLS = 200
+MAX_WORKERS = 16
+
+
+class HedgePolicy:
+    """Decides when to hedge a call and keeps the hedge rate under budget."""
+
+    def __init__(
+        self,
+        *,
+        latency: DegradationPolicy = degradation_policy,
+        enabled: Optional[bool] = None,
+        pct: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        min_delay: Optional[float] = None,
+    ) -> None:
+        self.latency = latency
+        self.enabled = (
+            enabled
+            if enabled is not None
+            else os.getenv("LLM_HEDGING", "on").strip().lower() not in {"0", "false", "off"}
+        )
+        self.pct = pct or float(os.getenv("LLM_HEDGE_PERCENTILE", DEFAULT_PERCENTILE))
+        self.max_rate = max_rate if max_rate is not None else float(
+            os.getenv("LLM_HEDGE_MAX_RATE", DEFAULT_MAX_RATE)
+        )
+        self.min_delay = min_delay if min_delay is not None else float(
+            os.getenv("LLM_HEDGE_MIN_DELAY_SECONDS", DEFAULT_MIN_DELAY_SECONDS)
+        )
+        self._lock = threading.Lock()
+        # 1 for each recent eligible call that was hedged, 0 otherwise.
+        self._window: Deque[int] = deque(maxlen=BUDGET_WINDOW_CALLS)
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self.over_budget = 0
+
+    def delay(self, model: str) -> Optional[float]:
+        """Seconds to wait before hedging a call to ``model``; ``None`` to never hedge it."""
+        if not self.enabled:
+            return None
+        recent = self.latency.recent(model)
+        if len(recent) < MIN_SAMPLES:
+            return None
+        return max(self.min_delay, percentile(recent, self.pct))
+
+    def start(self) -> None:
+        with self._lock:
+            self.calls += 1
+            self._window.append(0)
+
+    def budget_allows(self) -> bool:
+        """Whether a hedge could still be claimed; counts the call as over budget if not."""
+        with self._lock:
+            if sum(self._window) + 1 > self.max_rate * len(self._window):
+                self.over_budget += 1
+                return False
+            return True
+
+    def try_hedge(self) -> bool:
+        """Claim a hedge for the current call if the budget allows it."""
+        with self._lock:
+            if sum(self._window) + 1 > self.max_rate * len(self._window):
+                self.over_budget += 1
+                return False
+            self._window[-1] = 1
+            self.hedged += 1
+            return True
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.hedge_wins += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            window = len(self._window)
+            return {
+                "enabled": self.enabled,
+                "percentile": self.pct,
+                "max_rate": self.max_rate,
+                "calls": self.calls,
+                "hedged": self.hedged,
+                "hedge_wins": self.hedge_wins,
+                "over_budget": self.over_budget,
+                "recent_hedge_rate": round(sum(self._window) / window, 4) if window else 0.0,
+            }
+
+
+hedge_policy = HedgePolicy()
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+
+def _submit(fn, **kwargs: Any) -> Future:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix="llm-hedge")
+    # Carry the run's context (degraded mode, ...) into the worker thread.
+    context = contextvars.copy_context()
+    return _executor.submit(context.run, fn, **kwargs)
+
+
+def _close_result(future: Future) -> None:
+    """Release a losing call's response once it arrives (no-op for plain completions)."""
+    if future.cancelled() or future.exception() is not None:
+        return
+    close = getattr(future.result(), "close", None)
+    if callable(close):
+        try:
+            close()
+        except Exception as exc:  # the winner is already returned; never fail the call
+            print(f"Could not close a losing hedged response: {exc}")
+
+
+def hedged_create(client: Any, policy: HedgePolicy = hedge_policy, **kwargs: Any) -> Any:
+    """``client.chat.completions.create(**kwargs)``, hedged once past the latency percentile."""
+    create = client.chat.completions.create
+    delay = policy.delay(kwargs.get("model", ""))
+    if delay is None:
+        return create(**kwargs)
+
+    policy.start()
+    if not policy.budget_allows():
+        return create(**kwargs)
+    primary = _submit(create, **kwargs)
+    done, _ = wait([primary], timeout=delay)
+    if done or not policy.try_hedge():
+        return primary.result()
+
+    print(f"Hedging {kwargs.get('model')} call after {delay:.1f}s.")
+    hedge = _submit(create, **kwargs)
+    pending = {primary, hedge}
+    while True:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        # A failed call only loses if the other one can still answer.
+        winner = min(done, key=lambda future: future.exception() is not None)
+        if winner.exception() is None or not pending:
+            break
+    for loser in pending:
+        if not loser.cancel():
+            loser.add_done_callback(_close_result)
+    if winner is hedge and winner.exception() is None:
+        policy.record_win()
+    return winner.result()
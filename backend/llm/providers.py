@@ -0,0 +1,374 @@
+"""
+Pluggable LLM providers behind one chat-completions client.
+
+Call sites keep calling ``client.chat.completions.create(model=..., ...)``.
+The shared client is a ``ProviderPool`` that maps the requested model to a
+logical role and sends the call to one of the backends serving that role:
+
+* roles: ``writer`` (long-form drafting, the 70B model), ``fast`` (the 8B
+  model) and ``judge`` (reviews and scoring, the 8B model by default).
+  Call sites may pass a role name or a Groq model id as ``model``; compliance
+  reviews and the X-post evaluator ask for ``JUDGE_ROLE`` so a dedicated
+  review model can be configured per backend.
+* backends: Groq, any OpenAI-compatible endpoint (vLLM, llama.cpp server,
+  ...) through the ``openai`` package, or a local fake for tests. Each has a
+  weight, a concurrency cap and its own model name per role.
+* a backend is picked by weight among those with a free slot; rate limits,
+  server errors and connection failures fail over to the next backend, and
+  ``EJECT_AFTER_FAILURES`` consecutive failures eject the backend for a
+  cooldown (or the upstream ``Retry-After``).
+
+Configuration (only Groq when ``LLM_BACKENDS`` is unset)::
+
+    LLM_BACKENDS=groq,vllm
+    LLM_BACKEND_VLLM_KIND=openai
+    LLM_BACKEND_VLLM_BASE_URL=http://localhost:8000/v1
+    LLM_BACKEND_VLLM_MODELS=fast=meta-llama/Llama-3.1-8B-Instruct,judge=meta-llama/Llama-3.1-8B-Instruct
+    LLM_BACKEND_VLLM_WEIGHT=2
+    LLM_BACKEND_VLLM_MAX_CONCURRENCY=16
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import random
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional
+
+from common.deadline import check_deadline
+from common.metrics import record_upstream_error, upstream_retries
+
+from .degradation import FAST_MODEL, FULL_MODEL
+
+JUDGE_ROLE = "judge"
+ROLES = ("writer", "fast", JUDGE_ROLE)
+# Groq model ids used across the code base, and the role each one stands for
+MODEL_ROLES = {FULL_MODEL: "writer", FAST_MODEL: "fast"}
+GROQ_ROLE_MODELS = {"writer": FULL_MODEL, "fast": FAST_MODEL, JUDGE_ROLE: FAST_MODEL}
+
+DEFAULT_MAX_CONCURRENCY = 32
+DEFAULT_QUEUE_TIMEOUT_SECONDS = 30.0
+EJECT_AFTER_FAILURES = 3
+EJECT_SECONDS = 30.0
+MAX_EJECT_SECONDS = 300.0
+RETRYABLE_STATUS = {401, 403, 408, 409, 429}
+
+
+class NoBackendAvailableError(RuntimeError):
+    """Raised when every backend for a role is ejected, saturated or failed."""
+
+
+def resolve_role(model: str) -> str:
+    if model in ROLES:
+        return model
+    return MODEL_ROLES.get(model, "writer")
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Errors worth failing over: rate limits, auth, server and connection errors.
+
+    Bad requests (400/404/422) are the caller's problem and are re-raised
+    as-is; ``complete_json`` relies on Groq's 400 ``failed_generation``.
+    """
+    status = getattr(exc, "status_code", None)
+    if status is None:
+        name = type(exc).__name__
+        return "Connection" in name or "Timeout" in name
+    return status in RETRYABLE_STATUS or status >= 500
+
+
+def _retry_after(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+# ------------------------------------------------------------------ #
+# Fake provider (tests and local development)
+# ------------------------------------------------------------------ #
+class FakeChatClient:
+    """OpenAI-shaped client that answers locally.
+
+    ``responder(kwargs) -> str`` builds the reply; the default echoes the
+    model and the start of the last message. Every request is kept in
+    ``calls``.
+    """
+
+    def __init__(
+        self, responder: Optional[Callable[[Dict[str, Any]], str]] = None, latency: float = 0.0
+    ) -> None:
+        self.responder = responder or (
+            lambda kwargs: f"[{kwargs['model']}] {kwargs['messages'][-1]['content'][:200]}"
+        )
+        self.latency = latency
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs: Any) -> Any:
+        with self._lock:
+            self.calls.append(kwargs)
+        if self.latency:
+            time.sleep(self.latency)
+        content = self.responder(kwargs)
+        prompt_tokens = sum(len(str(m.get("content", ""))) for m in kwargs["messages"]) // 4
+        completion_tokens = len(content) // 4
+        return SimpleNamespace(
+            model=kwargs["model"],
+            choices=[SimpleNamespace(message=SimpleNamespace(content=content))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens,
+            ),
+        )
+
+
+# ------------------------------------------------------------------ #
+# Backends
+# ------------------------------------------------------------------ #
+class Backend:
+    """One provider endpoint with its role -> model map, weight, cap and health."""
+
+    def __init__(
+        self,
+        name: str,
+        client_factory: Callable[[], Any],
+        *,
+        models: Dict[str, str],
+        kind: str = "groq",
+        weight: float = 1.0,
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    ) -> None:
+        self.name = name
+        self.kind = kind
+        self.models = models
+        self.weight = weight
+        self.max_concurrency = max_concurrency
+        self._client_factory = client_factory
+        self._client: Any = None
+        self._slots = threading.BoundedSemaphore(max_concurrency)
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.ejections = 0
+        self.ejected_until = 0.0
+        self.last_error: Optional[str] = None
+
+    @property
+    def client(self) -> Any:
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self._client_factory()
+        return self._client
+
+    def serves(self, role: str) -> bool:
+        return role in self.models
+
+    def healthy(self) -> bool:
+        return time.monotonic() >= self.ejected_until
+
+    def try_acquire(self, timeout: Optional[float] = None) -> bool:
+        acquired = (
+            self._slots.acquire(blocking=False)
+            if timeout is None
+            else self._slots.acquire(timeout=timeout)
+        )
+        if acquired:
+            with self._lock:
+                self.in_flight += 1
+        return acquired
+
+    def release(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+        self._slots.release()
+
+    def create(self, role: str, kwargs: Dict[str, Any]) -> Any:
+        request = {**kwargs, "model": self.models[role]}
+        if self.kind == "openai" and "max_completion_tokens" in request:
+            # Not every OpenAI-compatible server knows the newer parameter name.
+            request["max_tokens"] = request.pop("max_completion_tokens")
+        return self.client.chat.completions.create(**request)
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+
+    def record_failure(self, exc: Exception) -> None:
+        with self._lock:
+            self.requests += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            self.last_error = f"{type(exc).__name__}: {exc}"[:300]
+            retry_after = _retry_after(exc)
+            if retry_after is not None or self.consecutive_failures >= EJECT_AFTER_FAILURES:
+                cooldown = min(MAX_EJECT_SECONDS, retry_after or EJECT_SECONDS)
+                self.ejected_until = time.monotonic() + cooldown
+                self.ejections += 1
+                logging.getLogger("ProviderPool").warning(
+                    f"Ejecting backend '{self.name}' for {cooldown:.0f}s: {self.last_error}"
+                )
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            remaining = max(0.0, self.ejected_until - time.monotonic())
+            return {
+                "kind": self.kind,
+                "roles": dict(self.models),
+                "weight": self.weight,
+                "max_concurrency": self.max_concurrency,
+                "in_flight": self.in_flight,
+                "requests": self.requests,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "ejections": self.ejections,
+                "ejected_for_seconds": round(remaining, 1),
+                "last_error": self.last_error,
+            }
+
+
+# ------------------------------------------------------------------ #
+# Pool
+# ------------------------------------------------------------------ #
+class ProviderPool:
+    """Chat-completions client that load-balances and fails over across backends."""
+
+    def __init__(self, backends: List[Backend], queue_timeout: Optional[float] = None) -> None:
+        if not backends:
+            raise ValueError("ProviderPool needs at least one backend")
+        self.backends = backends
+        self.queue_timeout = (
+            queue_timeout
+            if queue_timeout is not None
+            else float(os.getenv("LLM_BACKEND_QUEUE_TIMEOUT_SECONDS", DEFAULT_QUEUE_TIMEOUT_SECONDS))
+        )
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def _candidates(self, role: str) -> List[Backend]:
+        """Healthy backends for ``role`` in weighted-random order."""
+        serving = [b for b in self.backends if b.serves(role)]
+        if not serving:
+            raise NoBackendAvailableError(f"No backend is configured for role '{role}'")
+        healthy = [b for b in serving if b.healthy()]
+        # With everything ejected, try the least recently ejected rather than fail outright.
+        pool = healthy or sorted(serving, key=lambda b: b.ejected_until)[:1]
+        ordered: List[Backend] = []
+        while pool:
+            choice = random.choices(pool, weights=[b.weight for b in pool])[0]
+            ordered.append(choice)
+            pool = [b for b in pool if b is not choice]
+        return ordered
+
+    def _acquire(self, candidates: List[Backend]) -> Optional[Backend]:
+        for backend in candidates:
+            if backend.try_acquire():
+                return backend
+        return None
+
+    def create(self, **kwargs: Any) -> Any:
+        role = resolve_role(kwargs.get("model", "writer"))
+        remaining = self._candidates(role)
+        last_error: Optional[Exception] = None
+        while remaining:
+            backend = self._acquire(remaining)
+            if backend is None:
+                # Every candidate is at its cap: wait for the preferred one.
+                backend = remaining[0]
+                if not backend.try_acquire(timeout=self.queue_timeout):
+                    raise NoBackendAvailableError(
+                        f"All backends for role '{role}' are at capacity"
+                    )
+            remaining = [b for b in remaining if b is not backend]
+            try:
+                response = backend.create(role, kwargs)
+            except Exception as exc:
+                record_upstream_error("llm", exc)
+                if not is_retryable(exc):
+                    backend.record_success()  # the backend answered; the request was bad
+                    raise
+                backend.record_failure(exc)
+                last_error = exc
+                if remaining:
+                    check_deadline(f"failing over from '{backend.name}'")
+                    upstream_retries.inc(service="llm", reason="failover")
+                    print(f"Backend '{backend.name}' failed ({type(exc).__name__}); failing over.")
+                continue
+            finally:
+                backend.release()
+            backend.record_success()
+            return response
+        raise last_error or NoBackendAvailableError(f"No backend available for role '{role}'")
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {backend.name: backend.snapshot() for backend in self.backends}
+
+
+# ------------------------------------------------------------------ #
+# Configuration
+# ------------------------------------------------------------------ #
+def _groq_client() -> Any:
+    from groq import Groq  # imported here so importing a router stays cheap
+
+    return Groq()  # Uses GROQ_API_KEY from environment
+
+
+def _parse_models(setting: str) -> Dict[str, str]:
+    models: Dict[str, str] = {}
+    for item in setting.split(","):
+        role, _, model = item.partition("=")
+        if role.strip() in ROLES and model.strip():
+            models[role.strip()] = model.strip()
+    return models
+
+
+def backend_from_env(name: str) -> Backend:
+    prefix = f"LLM_BACKEND_{name.upper().replace('-', '_')}_"
+
+    def setting(key: str, default: Optional[str] = None) -> Optional[str]:
+        return os.getenv(prefix + key, default)
+
+    kind = (setting("KIND") or (name if name in ("groq", "fake") else "openai")).lower()
+    models = _parse_models(setting("MODELS", ""))
+    if kind == "groq":
+        factory: Callable[[], Any] = _groq_client
+        models = models or dict(GROQ_ROLE_MODELS)
+    elif kind == "openai":
+        base_url, api_key = setting("BASE_URL"), setting("API_KEY", "not-needed")
+
+        def factory() -> Any:
+            from openai import OpenAI
+
+            return OpenAI(base_url=base_url, api_key=api_key)
+
+        if not models:
+            raise ValueError(f"{prefix}MODELS must map at least one role to a model")
+    elif kind == "fake":
+        factory = FakeChatClient
+        models = models or {role: f"fake-{role}" for role in ROLES}
+    else:
+        raise ValueError(f"Unknown LLM backend kind '{kind}' for '{name}'")
+
+    return Backend(
+        name,
+        factory,
+        models=models,
+        kind=kind,
+        weight=float(setting("WEIGHT", "1")),
+        max_concurrency=int(setting("MAX_CONCURRENCY", str(DEFAULT_MAX_CONCURRENCY))),
+    )
+
+
+def build_provider_pool() -> ProviderPool:
+    names = [n.strip() for n in os.getenv("LLM_BACKENDS", "groq").split(",") if n.strip()]
+    return ProviderPool([backend_from_env(name) for name in names])
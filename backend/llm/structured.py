@@ -0,0 +1,228 @@
+"""
+Schema-validated JSON output for Groq chat completions.
+
+Every JSON-producing call goes through ``complete_json``: the request uses
+Groq JSON mode, the reply is validated against a Pydantic model, and fenced,
+chatty or truncated JSON is repaired locally before anything is re-requested.
+Only when repair and validation both fail is the call retried, with the
+validation error fed back to the model. Outcomes are counted per schema so
+parse-failure rates can be monitored.
+"""
+
+from __future__ import annotations
+
+import json
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+T = TypeVar("T", bound=BaseModel)
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA_PATTERN = re.compile(r",\s*([}\]])")
+CLOSERS = {"{": "}", "[": "]"}
+
+
+class StructuredOutputError(ValueError):
+    """Raised when a model reply cannot be repaired into the requested schema."""
+
+    def __init__(self, schema: str, message: str, raw: str = "") -> None:
+        super().__init__(f"{schema}: {message}")
+        self.schema = schema
+        self.raw = raw
+
+
+# ------------------------------------------------------------------ #
+# Local repair
+# ------------------------------------------------------------------ #
+def _scan(text: str) -> Tuple[Optional[int], List[str], bool, List[Tuple[int, List[str]]]]:
+    """Walk ``text`` (starting at a ``{``/``[``) tracking nesting outside strings.
+
+    Returns the index where the top-level value closes (or ``None`` if it
+    never does), the open-bracket stack at the end, whether a string is still
+    open, and every comma outside strings with the stack at that point.
+    """
+    stack: List[str] = []
+    in_string = escaped = False
+    commas: List[Tuple[int, List[str]]] = []
+    for index, char in enumerate(text):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        if char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(char)
+        elif char in "}]":
+            if stack:
+                stack.pop()
+            if not stack:
+                return index, [], False, commas
+        elif char == ",":
+            commas.append((index, list(stack)))
+    return None, stack, in_string, commas
+
+
+def _close(text: str, stack: List[str]) -> str:
+    return text + "".join(CLOSERS[opener] for opener in reversed(stack))
+
+
+def repair_json(text: str) -> Any:
+    """Best-effort parse of JSON wrapped in fences/prose or cut off mid-value.
+
+    Raises ``json.JSONDecodeError`` if nothing usable can be recovered.
+    """
+    fenced = FENCE_PATTERN.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise json.JSONDecodeError("no JSON object found", text, 0)
+    text = text[min(starts):]
+
+    end, stack, in_string, commas = _scan(text)
+    if end is not None:
+        return json.loads(TRAILING_COMMA_PATTERN.sub(r"\1", text[: end + 1]))
+
+    # Truncated: close what is open, then back off to earlier commas until it parses.
+    candidate = (text + '"') if in_string else text
+    attempts = [_close(candidate.rstrip().rstrip(","), stack)]
+    attempts += [_close(text[:index], opened) for index, opened in reversed(commas)]
+    for attempt in attempts:
+        try:
+            return json.loads(TRAILING_COMMA_PATTERN.sub(r"\1", attempt))
+        except json.JSONDecodeError:
+            continue
+    raise json.JSONDecodeError("could not repair truncated JSON", text, len(text))
+
+
+def parse_structured(raw: str, schema: Type[T]) -> Tuple[T, bool]:
+    """Validate ``raw`` against ``schema``. Returns (model, repaired)."""
+    try:
+        return schema.model_validate_json(raw), False
+    except ValidationError as exc:
+        # model_validate_json reports malformed JSON as a validation error too.
+        if not any(error["type"] == "json_invalid" for error in exc.errors()):
+            raise
+    return schema.model_validate(repair_json(raw)), True
+
+
+# ------------------------------------------------------------------ #
+# Metrics
+# ------------------------------------------------------------------ #
+class StructuredOutputMetrics:
+    """Per-schema counters: requests, direct parses, repairs, retries, failures."""
+
+    OUTCOMES = ("requests", "parsed", "repaired", "retried", "failed")
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counts: Dict[str, Counter] = defaultdict(Counter)
+
+    def record(self, schema: str, outcome: str) -> None:
+        with self._lock:
+            self._counts[schema][outcome] += 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            counts = {name: dict(counter) for name, counter in self._counts.items()}
+        report: Dict[str, Dict[str, Any]] = {}
+        for name, counter in counts.items():
+            stats: Dict[str, Any] = {key: counter.get(key, 0) for key in self.OUTCOMES}
+            attempts = stats["requests"] + stats["retried"]
+            # Any reply that did not validate as-is counts as a parse failure.
+            failures = attempts - stats["parsed"]
+            stats["parse_failure_rate"] = round(failures / attempts, 4) if attempts else 0.0
+            stats["unrecovered_rate"] = (
+                round(stats["failed"] / stats["requests"], 4) if stats["requests"] else 0.0
+            )
+            report[name] = stats
+        return report
+
+
+# Global instance (importable anywhere)
+structured_output_metrics = StructuredOutputMetrics()
+
+
+# ------------------------------------------------------------------ #
+# Completion helper
+# ------------------------------------------------------------------ #
+def _failed_generation(exc: Exception) -> Optional[str]:
+    """Groq rejects invalid JSON-mode output with a 400 carrying the raw text."""
+    if getattr(exc, "status_code", None) != 400:
+        return None
+    body = getattr(exc, "body", None)
+    error = body.get("error", body) if isinstance(body, dict) else {}
+    failed = error.get("failed_generation") if isinstance(error, dict) else None
+    return failed if isinstance(failed, str) else None
+
+
+def complete_json(
+    client: Any,
+    *,
+    model: str,
+    messages: List[Dict[str, str]],
+    schema: Type[T],
+    temperature: float = 0.2,
+    max_tokens: int = 1024,
+    top_p: float = 1,
+    retries: int = 1,
+) -> T:
+    """Run a JSON-mode chat completion and return the validated ``schema`` instance.
+
+    Raises ``StructuredOutputError`` once local repair and ``retries``
+    re-requests have all failed.
+    """
+    name = schema.__name__
+    structured_output_metrics.record(name, "requests")
+    conversation = list(messages)
+    error = ""
+    raw = ""
+
+    for attempt in range(retries + 1):
+        if attempt:
+            structured_output_metrics.record(name, "retried")
+        try:
+            completion = client.chat.completions.create(
+                model=model,
+                messages=conversation,
+                temperature=temperature,
+                max_completion_tokens=max_tokens,
+                top_p=top_p,
+                stream=False,
+                response_format={"type": "json_object"},
+            )
+            raw = (completion.choices[0].message.content or "").strip()
+        except Exception as exc:
+            raw = _failed_generation(exc)
+            if raw is None:
+                raise
+
+        try:
+            parsed, repaired = parse_structured(raw, schema)
+        except (ValidationError, json.JSONDecodeError) as exc:
+            error = str(exc)
+            print(f"Structured output for {name} failed validation (attempt {attempt + 1}): {error[:200]}")
+            conversation = list(messages) + [
+                {"role": "assistant", "content": raw[:2000]},
+                {
+                    "role": "user",
+                    "content": "That response was not valid for the requested schema:\n"
+                    f"{error[:1000]}\nReturn ONLY the corrected JSON object.",
+                },
+            ]
+            continue
+
+        structured_output_metrics.record(name, "repaired" if repaired else "parsed")
+        return parsed
+
+    structured_output_metrics.record(name, "failed")
+    raise StructuredOutputError(name, error, raw)
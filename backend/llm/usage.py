@@ -0,0 +1,344 @@
+"""
+Token accounting from ``completion.usage``.
+
+Every completion carries usage data, but the model helpers only return the
+message text, so there was no way to tell which workflow or node used the
+tokens. The shared clients now record one ``UsageRecord`` per call (prompt,
+completion and total tokens; upstream queue time and latency) and attribute
+it to:
+
+* the workflow: the agent name, set by ``agent_manager.lease``;
+* the node: the running LangGraph node, or a step named with ``usage_scope``;
+* the model;
+* the tenant: the ``X-Tenant-ID`` request header (``"default"`` without it).
+
+The tenant becomes a metric label, so the header is not trusted as-is: it
+must be 1-64 letters, digits, ``.``, ``_`` or ``-``, and must appear in
+``USAGE_TENANTS`` when that allow-list is set. Without an allow-list, only
+the first ``USAGE_MAX_TENANTS`` (100) distinct tenants are tracked. Any
+other value is counted as ``"other"``.
+
+Records are aggregated into process-wide counters (``usage_metrics``, served
+by ``/health/usage``) and into a per-request ``UsageLedger``. Requests sent
+with ``X-Include-Usage: true`` get the ledger's summary as a ``usage`` field
+in their JSON response (``UsageMiddleware``).
+"""
+
+from __future__ import annotations
+
+import contextvars
+import json
+import os
+import re
+import sys
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set
+
+DEFAULT_TENANT = "default"
+OTHER_TENANT = "other"
+TENANT_PATTERN = re.compile(r"[A-Za-z0-9._-]{1,64}")
+DEFAULT_MAX_TENANTS = 100
+UNATTRIBUTED = "-"
+TENANT_HEADER = b"x-tenant-id"
+INCLUDE_HEADER = b"x-include-usage"
+DIMENSIONS = ("workflow", "node", "model", "tenant")
+COUNTERS = (
+    "calls",
+    "prompt_tokens",
+    "completion_tokens",
+    "total_tokens",
+    "latency_seconds",
+    "queue_seconds",
+)
+MAX_LEDGER_RECORDS = 500
+
+
+@dataclass
+class UsageRecord:
+    model: str
+    workflow: str
+    node: str
+    tenant: str
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    total_tokens: int = 0
+    latency_seconds: float = 0.0
+    queue_seconds: float = 0.0
+
+
+def _new_totals() -> Dict[str, float]:
+    return {counter: 0 for counter in COUNTERS}
+
+
+def _add(totals: Dict[str, float], record: UsageRecord) -> None:
+    totals["calls"] += 1
+    totals["prompt_tokens"] += record.prompt_tokens
+    totals["completion_tokens"] += record.completion_tokens
+    totals["total_tokens"] += record.total_tokens
+    totals["latency_seconds"] += record.latency_seconds
+    totals["queue_seconds"] += record.queue_seconds
+
+
+def _rounded(totals: Dict[str, float]) -> Dict[str, float]:
+    return {
+        key: round(value, 3) if isinstance(value, float) else value
+        for key, value in totals.items()
+    }
+
+
+class UsageMetrics:
+    """Process-wide usage counters per workflow, node, model and tenant."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.totals = _new_totals()
+        self.by: Dict[str, Dict[str, Dict[str, float]]] = {
+            dimension: defaultdict(_new_totals) for dimension in DIMENSIONS
+        }
+
+    def record(self, record: UsageRecord) -> None:
+        with self._lock:
+            _add(self.totals, record)
+            for dimension in DIMENSIONS:
+                _add(self.by[dimension][getattr(record, dimension)], record)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "totals": _rounded(self.totals),
+                **{
+                    dimension: {key: _rounded(totals) for key, totals in self.by[dimension].items()}
+                    for dimension in DIMENSIONS
+                },
+            }
+
+
+# Global instance (importable anywhere)
+usage_metrics = UsageMetrics()
+
+
+class TenantPolicy:
+    """Maps ``X-Tenant-ID`` values to bounded tenant labels."""
+
+    def __init__(
+        self, allowed: Optional[Iterable[str]] = None, max_tenants: Optional[int] = None
+    ) -> None:
+        if allowed is None:
+            allowed = [t.strip() for t in os.getenv("USAGE_TENANTS", "").split(",") if t.strip()]
+        self.allowed: Set[str] = set(allowed)
+        self.max_tenants = max_tenants or int(os.getenv("USAGE_MAX_TENANTS", DEFAULT_MAX_TENANTS))
+        self._lock = threading.Lock()
+        self._seen: Set[str] = set()
+
+    def resolve(self, value: Optional[str]) -> str:
+        if not value:
+            return DEFAULT_TENANT
+        if not TENANT_PATTERN.fullmatch(value):
+            return OTHER_TENANT
+        if self.allowed:
+            return value if value in self.allowed else OTHER_TENANT
+        with self._lock:
+            if value in self._seen:
+                return value
+            if len(self._seen) >= self.max_tenants:
+                return OTHER_TENANT
+            self._seen.add(value)
+            return value
+
+
+# Global instance (importable anywhere)
+tenant_policy = TenantPolicy()
+
+
+class UsageLedger:
+    """Usage records of one request (or job), summarised for the response."""
+
+    def __init__(self, tenant: str = DEFAULT_TENANT) -> None:
+        self.tenant = tenant
+        self._lock = threading.Lock()
+        self.records: List[UsageRecord] = []
+        # Calls past MAX_LEDGER_RECORDS still reach usage_metrics.
+        self.dropped = 0
+
+    def add(self, record: UsageRecord) -> None:
+        with self._lock:
+            if len(self.records) < MAX_LEDGER_RECORDS:
+                self.records.append(record)
+            else:
+                self.dropped += 1
+
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            records = list(self.records)
+        totals = _new_totals()
+        by: Dict[str, Dict[str, Dict[str, float]]] = {
+            dimension: defaultdict(_new_totals) for dimension in ("workflow", "node", "model")
+        }
+        for record in records:
+            _add(totals, record)
+            for dimension, groups in by.items():
+                _add(groups[getattr(record, dimension)], record)
+        return {
+            "tenant": self.tenant,
+            **_rounded(totals),
+            "unrecorded_calls": self.dropped,
+            **{
+                f"by_{dimension}": {key: _rounded(value) for key, value in groups.items()}
+                for dimension, groups in by.items()
+            },
+        }
+
+
+_ledger: contextvars.ContextVar[Optional[UsageLedger]] = contextvars.ContextVar(
+    "usage_ledger", default=None
+)
+_workflow: contextvars.ContextVar[str] = contextvars.ContextVar("usage_workflow", default=UNATTRIBUTED)
+_step: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("usage_step", default=None)
+
+
+# ---------------------------------------------------------------------------
+# Attribution helpers
+# ---------------------------------------------------------------------------
+@contextmanager
+def usage_scope(*, workflow: Optional[str] = None, step: Optional[str] = None) -> Iterator[None]:
+    """Attribute calls made inside the block to ``workflow`` and/or ``step``."""
+    tokens = []
+    if workflow is not None:
+        tokens.append((_workflow, _workflow.set(workflow)))
+    if step is not None:
+        tokens.append((_step, _step.set(step)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_ledger() -> Optional[UsageLedger]:
+    return _ledger.get()
+
+
+def current_workflow() -> str:
+    return _workflow.get()
+
+
+def _current_node() -> str:
+    step = _step.get()
+    if step:
+        return step
+    # Only ask LangGraph when a graph may be running; never import it from here.
+    if "langgraph.config" in sys.modules:
+        try:
+            from langgraph.config import get_config
+
+            node = get_config().get("metadata", {}).get("langgraph_node")
+        except RuntimeError:  # not inside a runnable
+            node = None
+        if node:
+            return str(node)
+    return UNATTRIBUTED
+
+
+def _value(usage: Any, key: str) -> Any:
+    if isinstance(usage, dict):
+        return usage.get(key)
+    return getattr(usage, key, None)
+
+
+def record_completion(model: Optional[str], response: Any, latency_seconds: float) -> None:
+    """Record the ``usage`` of one completion against the current attribution."""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return
+    ledger = _ledger.get()
+    prompt = int(_value(usage, "prompt_tokens") or 0)
+    completion = int(_value(usage, "completion_tokens") or 0)
+    record = UsageRecord(
+        model=model or getattr(response, "model", None) or UNATTRIBUTED,
+        workflow=_workflow.get(),
+        node=_current_node(),
+        tenant=ledger.tenant if ledger is not None else DEFAULT_TENANT,
+        prompt_tokens=prompt,
+        completion_tokens=completion,
+        total_tokens=int(_value(usage, "total_tokens") or prompt + completion),
+        latency_seconds=latency_seconds,
+        # Groq reports time spent in its queue; other backends do not.
+        queue_seconds=float(_value(usage, "queue_time") or 0.0),
+    )
+    usage_metrics.record(record)
+    if ledger is not None:
+        ledger.add(record)
+
+
+# ---------------------------------------------------------------------------
+# ASGI middleware
+# ---------------------------------------------------------------------------
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1").strip()
+    return None
+
+
+class UsageMiddleware:
+    """Give each HTTP request a ``UsageLedger`` and, on request, report it.
+
+    With ``X-Include-Usage: true`` a JSON object response gets a ``usage``
+    field with the request's totals per workflow, node and model. Other
+    responses (streams, lists) pass through unchanged.
+    """
+
+    def __init__(self, app, tenants: Optional[TenantPolicy] = None) -> None:
+        self.app = app
+        self.tenants = tenants or tenant_policy
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        ledger = UsageLedger(self.tenants.resolve(_header(scope, TENANT_HEADER)))
+        include = (_header(scope, INCLUDE_HEADER) or "").lower() in {"1", "true", "yes"}
+        token = _ledger.set(ledger)
+        try:
+            await self.app(scope, receive, _usage_sender(send, ledger) if include else send)
+        finally:
+            _ledger.reset(token)
+
+
+def _usage_sender(send, ledger: UsageLedger):
+    start: Optional[Dict[str, Any]] = None
+    body = bytearray()
+
+    async def wrapped_send(message) -> None:
+        nonlocal start
+        if message["type"] == "http.response.start":
+            headers = dict(message.get("headers", ()))
+            if headers.get(b"content-type", b"").startswith(b"application/json"):
+                start = message  # hold it until the body is complete
+                return
+        elif message["type"] == "http.response.body" and start is not None:
+            body.extend(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            payload = bytes(body)
+            try:
+                data = json.loads(payload)
+            except ValueError:
+                data = None
+            if isinstance(data, dict):
+                data["usage"] = ledger.summary()
+                payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            headers = [
+                (key, value) for key, value in start.get("headers", ()) if key != b"content-length"
+            ]
+            headers.append((b"content-length", str(len(payload)).encode()))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": payload})
+            return
+        await send(message)
+
+    return wrapped_send
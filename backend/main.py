@@ -1,11 +1,19 @@
+from api.agent_manager import agent_manager
 from blog.router import router as blog_router
+from common.admission import AdmissionControlMiddleware, admission_controller
+from common.deadline import DeadlineMiddleware
+from common.metrics import MetricsMiddleware, loop_lag_monitor
 from content.router import router as content_router
 from contentRepurposer.router import router as contentRepurposer_router
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 from health.router import router as health_router
+from jobs.router import router as jobs_router
+from jobs.worker import job_queue
+from llm import UsageMiddleware
 from news.router import router as news_router
 from visualPostGenerator.router import router as caption_router
+from x_post.idea_cache import trending_idea_cache
 from x_post.router import router as xpost_router
 from youtube.router import router as youtube_route
 from youtubeBlog.router import router as youtube_router
@@ -17,6 +25,17 @@ origins = [
     "http://localhost:3000",  # Next.js dev server
 ]
 
+# Per-endpoint concurrency limits and bounded queues (429/503 + Retry-After when
+# saturated). Added before CORS so rejections still carry CORS headers.
+app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+
+# Every request carries a deadline (queue wait included) that workflow nodes and
+# LLM calls can see; a client disconnect cancels further upstream calls.
+app.add_middleware(DeadlineMiddleware)
+
+# Token usage per request (X-Tenant-ID); X-Include-Usage: true adds it to JSON responses.
+app.add_middleware(UsageMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=origins,
@@ -25,6 +44,29 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency and status include admission queueing and rejections.
+app.add_middleware(MetricsMiddleware)
+
+
+@app.on_event("startup")
+def start_job_workers():
+    job_queue.start()
+    trending_idea_cache.start()
+    # Agents are built on first use unless AGENT_WARMUP opts into warming them here
+    agent_manager.start_warmup()
+
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    loop_lag_monitor.start()
+
+
+@app.on_event("shutdown")
+def stop_job_workers():
+    job_queue.stop()
+    trending_idea_cache.stop()
+    loop_lag_monitor.stop()
+
 
 @app.get("/")
 def read_root():
@@ -40,3 +82,4 @@ app.include_router(health_router)
 app.include_router(caption_router)
 app.include_router(youtube_route)
 app.include_router(xpost_router)
+app.include_router(jobs_router)
@@ -1,5 +1,11 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, Optional
 from langgraph.graph import StateGraph
+
+from common.checkpoint import get_checkpointer, resolve_thread_id, run_checkpointed
+from common.deadline import DeadlineExceeded
+from common.graph import ProgressCallback
+from llm import degraded_run
 from .news_workflow_model import NewsArticleState, build_news_article_graph
 
 
@@ -13,7 +19,12 @@ class NewsArticleWorkflowAgent:
         """Build the LangGraph workflow."""
         self.graph = build_news_article_graph()
 
-    async def ainvoke(self, input_data: Dict[str, Any], thread_id: str = None):
+    async def ainvoke(
+        self,
+        input_data: Dict[str, Any],
+        thread_id: str = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
         """Run the workflow asynchronously (currently synchronous execution)."""
         print("=== ainvoke (NEWS) received input_data ===")
         print(input_data)
@@ -28,28 +39,29 @@ class NewsArticleWorkflowAgent:
                 word_count=input_data.get("word_count", 800),
                 tone=input_data.get("tone", ""),
                 audience=input_data.get("audience", ""),
-                
-                # Ensure other keys required by NewsArticleState have defaults
-                # (based on the model file we just wrote)
-                research_notes="",
-                article_draft="",
-                compliance_report="",
-                revision_count=0,
-                final_response="",
+                # Workflow-generated fields keep their model defaults so the
+                # checkpointer can tell inputs apart from node outputs.
             )
 
             # ⚙️ Run the LangGraph workflow
             graph = self.graph or build_news_article_graph()
-            app = graph.compile()
+            app = graph.compile(checkpointer=get_checkpointer())
             
             # 'result' will be the final state dictionary after the graph finishes
-            result = app.invoke(state) 
+            thread_id = thread_id or resolve_thread_id(input_data)
+            # Degraded mode (slow upstream) is decided once for the whole run
+            with degraded_run() as degraded:
+                # Off the event loop, so the server keeps serving (and noticing disconnects)
+                result = await asyncio.to_thread(
+                    run_checkpointed, app, state, thread_id, on_progress=on_progress
+                )
 
             # Extract the final article from the final state
             article = result.get("article_draft", "No article was generated by the agent.")
 
             return {
                 "status": "success",
+                "degraded": degraded,
                 "data": {
                     # This is the key your news_router.py is looking for
                     "article_draft": article,
@@ -57,6 +69,8 @@ class NewsArticleWorkflowAgent:
                 }
             }
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"Error in NewsArticleWorkflowAgent: {e}")
             return {
@@ -0,0 +1,214 @@
+"""
+Deterministic citation and length checks for news drafts.
+
+The drafting prompt asks the model to cite facts with the ``[S#]`` markers
+produced by ``topic_research``. Most of what the copy editor LLM used to
+verify can be answered locally: which markers exist, which sentences carry
+figures or quotes without a marker, and whether the draft is near the
+requested length. Only the ambiguous findings are forwarded to the LLM.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set
+
+from common.sections import split_sections
+
+SOURCE_LINE_PATTERN = re.compile(r"^\[S(\d+)\]", re.MULTILINE)
+CITATION_PATTERN = re.compile(r"\[S(\d+)\]")
+NUMBER_PATTERN = re.compile(r"\d")
+QUOTE_PATTERN = re.compile(r"[\"“”]")
+SENTENCE_SPLIT_PATTERN = re.compile(r"(?<=[.!?])\s+(?=[A-Z\"“\[])")
+LIST_MARKER_PATTERN = re.compile(r"^\s*(?:[-*+]|\d+[.)])\s+")
+MARKDOWN_PATTERN = re.compile(r"[*_`>#]")
+
+# Drafts are accepted when they land within this fraction of the target length.
+WORD_COUNT_TOLERANCE = 0.25
+
+# Completion budget for a draft: Markdown and [S#] markers cost extra tokens per word.
+TOKENS_PER_WORD = 1.6
+MIN_DRAFT_TOKENS = 1500
+MAX_DRAFT_TOKENS = 8192
+
+# Issues that cannot be fixed by rewriting individual sections.
+GLOBAL_ISSUE_KINDS = {"word_count", "missing_citations"}
+
+
+@dataclass
+class CitationIssue:
+    kind: str  # "uncited_claim" | "unknown_source" | "missing_citations" | "word_count"
+    message: str
+    sentence: str = ""
+    section: Optional[int] = None  # ``split_sections`` index, so revisions can target it
+
+    @property
+    def needs_judgement(self) -> bool:
+        """Uncited claims may be common knowledge; everything else is a hard failure."""
+        return self.kind == "uncited_claim"
+
+
+@dataclass
+class CitationReport:
+    source_ids: Set[int] = field(default_factory=set)
+    cited_ids: Set[int] = field(default_factory=set)
+    word_count: int = 0
+    target_word_count: int = 0
+    issues: List[CitationIssue] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.issues
+
+    @property
+    def hard_issues(self) -> List[CitationIssue]:
+        return [issue for issue in self.issues if not issue.needs_judgement]
+
+    @property
+    def soft_issues(self) -> List[CitationIssue]:
+        return [issue for issue in self.issues if issue.needs_judgement]
+
+    def format_issues(self, issues: List[CitationIssue] | None = None) -> str:
+        """Bulleted list suitable for prompts and compliance reports."""
+        selected = self.issues if issues is None else issues
+        lines = []
+        for issue in selected:
+            prefix = f"Section {issue.section}: " if issue.section else ""
+            if issue.sentence:
+                lines.append(f'- {prefix}{issue.message}: "{issue.sentence}"')
+            else:
+                lines.append(f"- {prefix}{issue.message}")
+        return "\n".join(lines)
+
+    def to_compliance_report(self) -> str:
+        """Render the deterministic result in the same shape as the LLM reviewer."""
+        if self.passed:
+            return (
+                "Verdict: APPROVED\n"
+                "Observations: No issues. "
+                f"(Deterministic check: {len(self.cited_ids)} of {len(self.source_ids)} "
+                f"sources cited, {self.word_count} words.)"
+            )
+        return "Verdict: REVISION_NEEDED\nObservations:\n" + self.format_issues()
+
+
+def parse_source_ids(research_notes: str | None) -> Set[int]:
+    """Return the ``[S#]`` ids defined at the start of research note lines."""
+    return {int(match) for match in SOURCE_LINE_PATTERN.findall(research_notes or "")}
+
+
+def split_sentences(draft: str) -> List[str]:
+    """Split body text into sentences, skipping headings and blank lines."""
+    sentences: List[str] = []
+    for raw_line in draft.splitlines():
+        line = raw_line.strip()
+        if not line or line.startswith("#"):
+            continue
+        line = LIST_MARKER_PATTERN.sub("", line)
+        for sentence in SENTENCE_SPLIT_PATTERN.split(line):
+            sentence = sentence.strip()
+            if sentence:
+                sentences.append(sentence)
+    return sentences
+
+
+def count_words(draft: str) -> int:
+    """Count words the reader sees, ignoring citation markers and Markdown syntax."""
+    text = CITATION_PATTERN.sub(" ", draft)
+    text = MARKDOWN_PATTERN.sub(" ", text)
+    return len(text.split())
+
+
+def needs_citation(sentence: str) -> bool:
+    """Sentences with figures or direct quotes must carry a source marker."""
+    text = CITATION_PATTERN.sub("", sentence)
+    return bool(NUMBER_PATTERN.search(text) or QUOTE_PATTERN.search(text))
+
+
+def check_citations(
+    draft: str | None,
+    research_notes: str | None,
+    target_word_count: int,
+    tolerance: float = WORD_COUNT_TOLERANCE,
+) -> CitationReport:
+    """Validate ``[S#]`` usage and length of a news draft without calling an LLM."""
+    draft = draft or ""
+    report = CitationReport(
+        source_ids=parse_source_ids(research_notes),
+        word_count=count_words(draft),
+        target_word_count=target_word_count,
+    )
+
+    for section in split_sections(draft):
+        for sentence in split_sentences(section.text):
+            cited = {int(match) for match in CITATION_PATTERN.findall(sentence)}
+            report.cited_ids |= cited
+
+            unknown = sorted(cited - report.source_ids)
+            if unknown:
+                markers = ", ".join(f"[S{idx}]" for idx in unknown)
+                report.issues.append(
+                    CitationIssue(
+                        kind="unknown_source",
+                        message=f"Cites {markers}, which is not in the research",
+                        sentence=sentence,
+                        section=section.index,
+                    )
+                )
+            elif not cited and report.source_ids and needs_citation(sentence):
+                report.issues.append(
+                    CitationIssue(
+                        kind="uncited_claim",
+                        message="Figure or quote without an [S#] citation",
+                        sentence=sentence,
+                        section=section.index,
+                    )
+                )
+
+    if report.source_ids and not report.cited_ids:
+        report.issues.append(
+            CitationIssue(
+                kind="missing_citations",
+                message="The draft does not cite any of the research sources",
+            )
+        )
+
+    if target_word_count > 0:
+        # Never demand more than the largest draft budget can hold.
+        reachable = min(target_word_count, int(MAX_DRAFT_TOKENS / TOKENS_PER_WORD))
+        low = int(reachable * (1 - tolerance))
+        high = int(target_word_count * (1 + tolerance))
+        if not low <= report.word_count <= high:
+            report.issues.append(
+                CitationIssue(
+                    kind="word_count",
+                    message=(
+                        f"Draft is {report.word_count} words; target is "
+                        f"{target_word_count} (accepted range {low}-{high})"
+                    ),
+                )
+            )
+
+    return report
+
+
+def draft_token_budget(target_word_count: int, tolerance: float = WORD_COUNT_TOLERANCE) -> int:
+    """``max_tokens`` that lets a draft reach the top of the accepted length range.
+
+    A fixed budget silently truncates long articles below the range, so they
+    fail the length check however often they are rewritten.
+    """
+    high = target_word_count * (1 + tolerance)
+    return max(MIN_DRAFT_TOKENS, min(MAX_DRAFT_TOKENS, int(high * TOKENS_PER_WORD)))
+
+
+def summarize_report(report: CitationReport) -> Dict[str, int]:
+    """Compact counters for logging."""
+    return {
+        "sources": len(report.source_ids),
+        "cited": len(report.cited_ids),
+        "words": report.word_count,
+        "hard_issues": len(report.hard_issues),
+        "soft_issues": len(report.soft_issues),
+    }
@@ -1,28 +1,56 @@
 from typing import Dict, Any
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel, Field
-from groq import Groq
-from langchain_tavily import TavilySearch
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
 
+from common.metrics import time_upstream
+from common.sections import (
+    Section,
+    find_flagged_sections,
+    outline,
+    revise_sections,
+    section_token_budget,
+    split_sections,
+)
+from llm import FAST_MODEL, FULL_MODEL, JUDGE_ROLE, LazyClient, hedged_create, route, skip_optional
+
+from .citation_checker import (
+    GLOBAL_ISSUE_KINDS,
+    check_citations,
+    draft_token_budget,
+    summarize_report,
+)
+
 load_dotenv()
 
 # -------------------------------
 # Initialize Groq client
 # -------------------------------
-client = Groq()  # Uses GROQ_API_KEY from environment
-research_client = Groq()  # Smaller agent for research (llama-3.1-8b-instant)
-
-# --- Initialize Tavily Search Tool ---
-if not os.environ.get("TAVILY_API_KEY"):
-    print("WARN: TAVILY_API_KEY not set. Web research will fail.")
-search_tool = TavilySearch(max_results=5)
-
-def generate(prompt: str, max_tokens=512, temperature=0.7) -> str:
-    """Use Groq API to generate text from prompt."""
-    completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
+client = LazyClient()  # Uses GROQ_API_KEY from environment, created on first call
+research_client = LazyClient()  # Smaller agent for research (llama-3.1-8b-instant)
+
+# --- Tavily Search Tool (created on first search) ---
+@lru_cache(maxsize=1)
+def get_search_tool():
+    from langchain_tavily import TavilySearch
+
+    if not os.environ.get("TAVILY_API_KEY"):
+        print("WARN: TAVILY_API_KEY not set. Web research will fail.")
+    return TavilySearch(max_results=5)
+
+
+def generate(prompt: str, max_tokens=512, temperature=0.7, critical=True, hedge=False) -> str:
+    """Use Groq API to generate text from prompt.
+
+    Non-critical calls move to the fast model with fewer tokens in degraded mode.
+    ``hedge`` sends a duplicate request when the call runs into the latency tail.
+    """
+    model, max_tokens = route(FULL_MODEL, max_tokens, critical=critical)
+    create = (lambda **kw: hedged_create(client, **kw)) if hedge else client.chat.completions.create
+    completion = create(
+        model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=temperature,
         max_completion_tokens=max_tokens,
@@ -31,11 +59,12 @@ def generate(prompt: str, max_tokens=512, temperature=0.7) -> str:
     )
     return completion.choices[0].message.content.strip()
 
-def generate_research(prompt: str, max_tokens=512, temperature=0.7) -> str:
-    """Use Groq API (fast model) for research."""
+def generate_research(prompt: str, max_tokens=512, temperature=0.7, model=FAST_MODEL) -> str:
+    """Use Groq API (fast model, or ``model``) for research and reviews."""
     # This is now a fallback, but we keep it
+    model, max_tokens = route(model, max_tokens)
     completion = research_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
+        model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=temperature,
         max_tokens=max_tokens,
@@ -74,7 +103,8 @@ def topic_research(state: NewsArticleState) -> Dict[str, Any]:
     
     try:
         # Use the prompt to search the web
-        results = search_tool.invoke(prompt)
+        with time_upstream("tavily", "search"):
+            results = get_search_tool().invoke(prompt)
         
         # Format the results into a clean string
         formatted_sources = []
@@ -136,39 +166,49 @@ Guidelines:
   3. Body (Develop the story, citing sources)
   4. Conclusion (Summarize or provide outlook)
 """
-    return {"article_draft": generate(prompt, 1500)}
+    return {"article_draft": generate(prompt, draft_token_budget(state.word_count), hedge=True)}
 
 
 def compliance_review(state: NewsArticleState) -> Dict[str, Any]:
-    """Step 3: Review the draft for accuracy and tone."""
+    """Step 3: Review the draft for citations, length, accuracy and tone.
+
+    The deterministic citation checker runs first. Clean drafts are approved
+    without an LLM call, hard failures (unknown sources, wrong length) go
+    straight to revision, and the LLM only judges the flagged uncited claims.
+    Every finding carries a "Section N" label so the revision can target it.
+    """
     print("--- REVIEWING DRAFT ---")
+    if skip_optional("news compliance review"):
+        return {"compliance_report": None}
+
+    report = check_citations(state.article_draft, state.research_notes, state.word_count)
+    print(f"Citation check: {summarize_report(report)}")
+
+    if report.passed or report.hard_issues:
+        return {"compliance_report": report.to_compliance_report()}
+
     prompt = f"""
 You are a meticulous Copy Editor.
 
-Review the following news article for:
-- Factual accuracy (check against the research)
-- Journalistic objectivity (ensure the tone is not overly biased)
-- Clarity and readability for the target {state.audience}
-- **Crucially: Ensure [S#] citations are used for claims from the research.**
+An automated check flagged these sentences from a news article for the
+{state.audience} audience because they contain figures or quotes without an
+[S#] citation:
+{report.format_issues(report.soft_issues)}
 
-Article Draft:
-{state.article_draft}
-
-Research Insights:
+Available sources:
 {state.research_notes}
 
 Task:
+Decide which flagged sentences need a citation or correction. Ignore claims
+that are common knowledge or not taken from the research.
 Return a report (in plain English) with two sections:
 1. Verdict: Must be one of - APPROVED or REVISION_NEEDED
-2. Observations: If REVISION_NEEDED, provide a bulleted list of specific changes. If APPROVED, say "No issues."
+2. Observations: If REVISION_NEEDED, provide a bulleted list of specific changes, each starting with its "Section N:" label and quoting the sentence. If APPROVED, say "No issues."
 """
-    return {"compliance_report": generate_research(prompt, 512)} # Use fast model for review
+    return {"compliance_report": generate_research(prompt, 512, model=JUDGE_ROLE)}
 
 
-def revision_step(state: NewsArticleState) -> Dict[str, Any]:
-    """Step 4 (if needed): Revise the article based on feedback."""
-    print("--- REVISING DRAFT ---")
-    
+def _rewrite_full_article(state: NewsArticleState) -> str:
     prompt = f"""
 You are a Journalist revising an article based on your editor's feedback.
 
@@ -185,9 +225,57 @@ Ensure the new draft is {state.word_count} words, maintains the {state.tone} ton
 Original Research (for reference):
 {state.research_notes}
 """
-    # Overwrite the old draft with the new, revised version
+    return generate(prompt, draft_token_budget(state.word_count))
+
+
+def revision_step(state: NewsArticleState) -> Dict[str, Any]:
+    """Step 4 (if needed): Revise only the sections the feedback points at.
+
+    Length and missing-citation problems affect the whole article and fall
+    back to a full rewrite; everything else is fixed section by section.
+    """
+    print("--- REVISING DRAFT ---")
+    sections = split_sections(state.article_draft or "")
+    flagged = find_flagged_sections(sections, state.compliance_report or "")
+    report = check_citations(state.article_draft, state.research_notes, state.word_count)
+    global_issue = any(issue.kind in GLOBAL_ISSUE_KINDS for issue in report.issues)
+
+    if global_issue or not flagged:
+        print("Revising the full article.")
+        return {
+            "article_draft": _rewrite_full_article(state),
+            "revision_count": state.revision_count + 1,
+        }
+
+    article_outline = outline(sections)
+
+    def rewrite(section: Section) -> str:
+        prompt = f"""
+You are a Journalist revising one section of a news article based on your editor's feedback.
+
+Article outline:
+{article_outline}
+
+Section {section.index} (revise this):
+{section.text.strip()}
+
+Editor's Feedback:
+{state.compliance_report}
+
+Original Research (for reference):
+{state.research_notes}
+
+Task:
+Rewrite ONLY this section to address the feedback that applies to it.
+Keep its heading, keep roughly the same length, maintain the {state.tone} tone and CITE facts with the [S#] markers.
+Return only the revised section in Markdown, without commentary.
+"""
+        return generate(prompt, section_token_budget(section))
+
+    article, revised = revise_sections(sections, flagged, rewrite)
+    print(f"Revised sections {revised} of {len(sections)}.")
     return {
-        "article_draft": generate(prompt, 1500),
+        "article_draft": article,
         "revision_count": state.revision_count + 1,
     }
 
@@ -209,7 +297,13 @@ def should_revise(state: NewsArticleState) -> str:
         print("Max revisions reached. Finalizing.")
         return "finalize"
     
+    if not state.compliance_report:
+        print("Compliance review skipped. Routing to finalize.")
+        return "finalize"
+
     if "REVISION_NEEDED" in state.compliance_report.upper():
+        if skip_optional("news revision"):
+            return "finalize"
         print("Compliance check failed. Routing to revision.")
         return "revise"
     else:
@@ -1,6 +1,7 @@
 from fastapi import APIRouter, HTTPException, Request
-from .agent_news_workflow import NewsArticleWorkflowAgent
-import uuid
+from api.agent_manager import AgentUnavailableError, agent_manager, retry_headers
+from common.deadline import DeadlineExceeded
+from common.threads import resolve_thread_id
 
 # -------------------------------
 # Normalize frontend input for News
@@ -21,12 +22,39 @@ def normalize_news_input(payload: dict) -> dict:
 # -------------------------------
 router = APIRouter(tags=["News"])
 
-agent = NewsArticleWorkflowAgent()
-agent.compile()
-
 # -------------------------------
 # News Article Generation Endpoint
 # -------------------------------
+async def run_news_workflow(payload: dict, on_progress=None) -> dict:
+    """Normalize a frontend payload and run the news workflow (shared with the job queue)."""
+    # Use thread_id from payload if provided, else create a new one.
+    # Reusing a threadId resumes a failed run from its checkpoint.
+    thread_id = resolve_thread_id(payload)
+
+    normalized_payload = normalize_news_input(payload)
+    normalized_payload["threadId"] = thread_id # Pass thread_id to the agent
+    print("Normalized news payload:", normalized_payload)  # Debug log
+
+    # Call the news agent
+    async with agent_manager.alease("news") as agent:
+        result = await agent.ainvoke(
+            normalized_payload, thread_id=thread_id, on_progress=on_progress
+        )
+
+    # Check for errors returned from the agent
+    if result.get("status") == "error":
+         raise Exception(result.get("message", "Unknown agent error"))
+
+    # Return the 'generated_article' key, as expected by the frontend
+    return {
+        "status": "success",
+        "threadId": thread_id,
+        "degraded": result.get("degraded", False),
+        "generated_article": result.get("data", {}).get("article_draft", "No article generated"),
+        "received_data": normalized_payload
+    }
+
+
 @router.post("/generate-news-article")
 async def generate_news_article(request: Request):
     """Receives frontend JSON, normalizes it, and runs the news article workflow."""
@@ -34,28 +62,12 @@ async def generate_news_article(request: Request):
         payload = await request.json()
         print("Received news payload:", payload)  # Debug log
 
-        # Use thread_id from payload if provided, else create a new one
-        thread_id = payload.get("threadId") or str(uuid.uuid4())
-        
-        normalized_payload = normalize_news_input(payload)
-        normalized_payload["threadId"] = thread_id # Pass thread_id to the agent
-        print("Normalized news payload:", normalized_payload)  # Debug log
-
-        # Call the news agent
-        result = await agent.ainvoke(normalized_payload, thread_id=thread_id)
-
-        # Check for errors returned from the agent
-        if result.get("status") == "error":
-             raise Exception(result.get("message", "Unknown agent error"))
-
-        # Return the 'generated_article' key, as expected by the frontend
-        return {
-            "status": "success",
-            "threadId": thread_id,
-            "generated_article": result.get("data", {}).get("article_draft", "No article generated"),
-            "received_data": normalized_payload
-        }
+        return await run_news_workflow(payload)
 
+    except AgentUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_headers(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print(f"Error in /generate-news-article: {e}")
         raise HTTPException(status_code=500, detail=str(e))
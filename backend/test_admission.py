@@ -0,0 +1,113 @@
+"""Endpoint admission: queueing, 429/503 rejections and Retry-After (common/admission.py)."""
+
+import asyncio
+
+import pytest
+
+from common.admission import (
+    MAX_RETRY_AFTER_SECONDS,
+    AdmissionController,
+    AdmissionControlMiddleware,
+    EndpointLimiter,
+    Rejected,
+    parse_limits,
+)
+
+
+def test_parse_limits():
+    assert parse_limits("/generate-blog=4:8, /x-post/ideas/=8,bad,/y=x:1") == {
+        "/generate-blog": (4, 8),
+        "/x-post/ideas": (8, 0),
+    }
+
+
+def test_full_queue_is_rejected_with_429():
+    async def scenario():
+        limiter = EndpointLimiter("/a", max_concurrent=1, max_queue=1)
+        await limiter.acquire(1)
+        waiter = asyncio.create_task(limiter.acquire(1))
+        await asyncio.sleep(0)
+        assert limiter.waiting == 1
+        with pytest.raises(Rejected) as info:
+            await limiter.acquire(1)
+        limiter.release(2.0)
+        await waiter  # the queued request gets the freed slot
+        return info.value, limiter
+
+    rejection, limiter = asyncio.run(scenario())
+    assert rejection.status_code == 429
+    assert 1 <= rejection.retry_after <= MAX_RETRY_AFTER_SECONDS
+    assert (limiter.in_flight, limiter.rejected_429) == (1, 1)
+
+
+def test_queue_timeout_is_rejected_with_503():
+    async def scenario():
+        limiter = EndpointLimiter("/a", max_concurrent=1, max_queue=4)
+        await limiter.acquire(1)
+        with pytest.raises(Rejected) as info:
+            await limiter.acquire(0.01)
+        return info.value, limiter
+
+    rejection, limiter = asyncio.run(scenario())
+    assert rejection.status_code == 503
+    assert (limiter.waiting, limiter.rejected_503) == (0, 1)
+
+
+def test_retry_after_tracks_run_time_and_backlog():
+    limiter = EndpointLimiter("/a", max_concurrent=2, max_queue=8)
+    limiter.avg_seconds = 5.0
+    assert limiter.retry_after() == 5
+    limiter.in_flight, limiter.waiting = 2, 6
+    assert limiter.retry_after() == 20
+    limiter.avg_seconds = 1000.0
+    assert limiter.retry_after() == MAX_RETRY_AFTER_SECONDS
+
+
+def test_exempt_and_ungoverned_paths():
+    controller = AdmissionController(limits={"/work": (1, 0)})
+    assert controller.limiter_for("/health/agents") is None
+    assert controller.limiter_for("/ping") is None
+    assert controller.limiter_for("/other") is None
+    assert controller.limiter_for("/work/") is controller.endpoints["/work"]
+
+
+def _call(middleware, path="/work"):
+    """Return a coroutine sending one HTTP request through the middleware, and its sent messages."""
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "method": "POST", "path": path}
+    return middleware(scope, receive, send), sent
+
+
+def test_middleware_sends_retry_after_when_full():
+    async def scenario():
+        release = asyncio.Event()
+
+        async def app(scope, receive, send):
+            await release.wait()
+            await send({"type": "http.response.start", "status": 200, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+
+        controller = AdmissionController(limits={"/work": (1, 0)}, max_inflight=4, queue_timeout=1)
+        middleware = AdmissionControlMiddleware(app, controller)
+        first, first_sent = _call(middleware)
+        running = asyncio.create_task(first)
+        await asyncio.sleep(0)
+        second, second_sent = _call(middleware)
+        await second
+        release.set()
+        await running
+        return first_sent, second_sent, controller
+
+    first_sent, second_sent, controller = asyncio.run(scenario())
+    assert first_sent[0]["status"] == 200
+    start = second_sent[0]
+    assert start["status"] == 429
+    assert dict(start["headers"])[b"retry-after"].isdigit()
+    assert controller.endpoints["/work"].in_flight == 0
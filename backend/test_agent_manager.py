@@ -0,0 +1,83 @@
+"""Agent leases, busy/unavailable errors and their 503 responses (api/agent_manager.py)."""
+
+import threading
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from api.agent_manager import (
+    BUILD_RETRY_SECONDS,
+    MAX_RETRY_AFTER_SECONDS,
+    AgentBusyError,
+    AgentManager,
+    AgentUnavailableError,
+    retry_headers,
+)
+
+
+def _hold(manager: AgentManager, name: str, release: threading.Event) -> threading.Thread:
+    held = threading.Event()
+
+    def run():
+        with manager.lease(name):
+            held.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=run)
+    thread.start()
+    held.wait(5)
+    return thread
+
+
+def test_busy_lease_carries_retry_after():
+    manager = AgentManager({"a": object}, limits={"a": 1}, queue_timeout=0.01)
+    release = threading.Event()
+    thread = _hold(manager, "a", release)
+    try:
+        with pytest.raises(AgentBusyError) as info:
+            with manager.lease("a"):
+                pass
+    finally:
+        release.set()
+        thread.join()
+    assert 1 <= info.value.retry_after <= MAX_RETRY_AFTER_SECONDS
+    assert retry_headers(info.value) == {"Retry-After": str(info.value.retry_after)}
+    assert manager.health()["a"]["rejected"] == 1
+
+
+def test_retry_after_follows_run_time_and_backlog():
+    manager = AgentManager({"a": object}, limits={"a": 2})
+    manager.health_state["a"].avg_run_seconds = 20.0
+    assert manager.retry_after("a") == 20
+    manager.health_state["a"].in_flight = 2
+    manager.health_state["a"].waiting = 4
+    assert manager.retry_after("a") == 60
+    manager.health_state["a"].avg_run_seconds = 1000.0
+    assert manager.retry_after("a") == MAX_RETRY_AFTER_SECONDS
+
+
+def test_failed_build_retry_after_matches_the_retry_window():
+    def broken():
+        raise RuntimeError("no key")
+
+    manager = AgentManager({"a": broken})
+    for _ in range(2):  # the build, then the fast-fail window
+        with pytest.raises(AgentUnavailableError) as info:
+            manager.get("a")
+        assert 0 < info.value.retry_after <= BUILD_RETRY_SECONDS
+
+
+def test_router_503_sends_retry_after(monkeypatch):
+    from api.agent_manager import agent_manager
+    from blog.router import router
+
+    def busy(name):
+        raise AgentBusyError("at capacity", retry_after=7)
+
+    monkeypatch.setattr(agent_manager, "alease", busy)
+    app = FastAPI()
+    app.include_router(router)
+    response = TestClient(app).post("/generate-blog", json={"topic": "Queues"})
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "7"
@@ -0,0 +1,118 @@
+"""Stored brand profiles: keys, freshness, refresh and background warm-up (blog/brand_profile_store.py)."""
+
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from blog.brand_profile_store import BrandProfileStore, profile_key
+from common.deadline import DeadlineMiddleware, current_deadline, deadline_scope
+from llm import is_degraded
+from llm.degradation import DegradationPolicy, degraded_run
+
+VOICE = "Playful, short sentences."
+
+
+class Research:
+    def __init__(self, reply: str = "Profile") -> None:
+        self.reply = reply
+        self.calls = []
+
+    def __call__(self, brand_name, brand_voice):
+        self.calls.append((brand_name, brand_voice))
+        return f"{self.reply} {len(self.calls)}"
+
+
+@pytest.fixture
+def store(tmp_path):
+    return BrandProfileStore(str(tmp_path / "brands.db"), ttl_days=1)
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    import blog.router as blog_router
+
+    monkeypatch.setattr(blog_router, "get_brand_profile_store", lambda: store)
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware)
+    app.include_router(blog_router.router)
+    return TestClient(app)
+
+
+def _wait_for(store, name, voice, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        profile = store.get(name, voice)
+        if profile is not None:
+            return profile
+        time.sleep(0.01)
+    return None
+
+
+def test_keys_ignore_case_punctuation_and_spacing():
+    assert profile_key("Acme, Inc.", "Warm  tone") == profile_key("acme inc", "warm tone")
+    assert profile_key("Acme", "Warm tone") != profile_key("Acme", "Dry tone")
+
+
+def test_research_runs_once_while_fresh(store):
+    research = Research()
+    first = store.get_or_create("Acme", VOICE, research)
+    assert store.get_or_create("ACME", VOICE, research).profile == first.profile == "Profile 1"
+    assert len(research.calls) == 1
+
+    refreshed = store.get_or_create("Acme", VOICE, research, force_refresh=True)
+    assert refreshed.profile == "Profile 2"
+    assert refreshed.created_at == first.created_at
+
+
+def test_stale_profiles_are_researched_again(store):
+    research = Research()
+    profile = store.get_or_create("Acme", VOICE, research)
+    assert store.is_fresh(profile)
+    profile.refreshed_at -= store.ttl_seconds + 1
+    assert not store.is_fresh(profile)
+
+    expired = BrandProfileStore(str(store.path), ttl_days=0)
+    assert expired.get_or_create("Acme", VOICE, research).profile == "Profile 2"
+
+
+def test_refresh_endpoint_replaces_the_profile(client, store, fake_llm):
+    store.save("Acme", VOICE, "Old profile")
+    fake_llm.responder = lambda kwargs: "New profile"
+    response = client.post("/brand-profiles/refresh", json={"brand_name": "Acme", "brand_voice": VOICE})
+    assert response.status_code == 200
+    assert response.json()["profile"]["profile"] == "New profile"
+    assert store.get("Acme", VOICE).profile == "New profile"
+    assert len(fake_llm.calls) == 1
+
+
+def test_saving_a_voice_warms_the_profile(client, store, fake_llm):
+    def responder(kwargs):
+        time.sleep(0.1)  # still researching after the response is sent
+        return "Warm profile"
+
+    fake_llm.responder = responder
+    payload = {"brand_name": "Acme", "brand_voice": VOICE}
+    response = client.post("/brand-profiles", json=payload)
+    assert response.status_code == 202
+    assert response.json() == {"status": "warming"}
+    assert _wait_for(store, "Acme", VOICE).profile == "Warm profile"
+
+    response = client.post("/brand-profiles", json=payload)
+    assert response.json()["status"] == "ready"
+    assert len(fake_llm.calls) == 1
+
+
+def test_warm_up_runs_outside_the_request_context(store):
+    seen = {}
+
+    def research(brand_name, brand_voice):
+        seen.update(deadline=current_deadline(), degraded=is_degraded())
+        return "Profile"
+
+    with deadline_scope(60) as deadline, degraded_run(DegradationPolicy(mode="on")):
+        deadline.cancel()  # the client has gone away
+        profile = store.warm_up("Acme", VOICE, research).result(timeout=5)
+    assert profile.profile == "Profile"
+    assert seen == {"deadline": None, "degraded": False}
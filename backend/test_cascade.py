@@ -0,0 +1,103 @@
+"""Fast-model-first cascades and their escalation metrics (llm/cascade.py)."""
+
+import uuid
+
+import pytest
+
+from llm import FakeChatClient
+from llm.cascade import (
+    CascadeMetrics,
+    CascadeStep,
+    all_of,
+    cascade_metrics,
+    forbid,
+    require_verdict,
+    run_cascade,
+    word_range,
+)
+from llm.degradation import FAST_MODEL, FULL_MODEL, DegradationPolicy, degraded_run
+
+REVIEW = require_verdict("APPROVED", "REVISION_NEEDED")
+MESSAGES = [{"role": "user", "content": "Review this draft."}]
+
+
+def _step(validator=REVIEW) -> CascadeStep:
+    # A unique name keeps the shared metrics separate per test.
+    return CascadeStep(f"test.{uuid.uuid4().hex[:8]}", validator)
+
+
+def _replies(**by_model):
+    return FakeChatClient(lambda kwargs: by_model[kwargs["model"]])
+
+
+def test_validators():
+    assert REVIEW("Verdict: approved") is None
+    assert REVIEW("Looks fine") == "missing_verdict"
+    assert word_range(2, 3)("one") == "too_short"
+    assert word_range(2, 3)("one two three four") == "too_long"
+    assert forbid("as an AI")("As an AI model, I think") == "contains:as an AI"
+    assert forbid("AI")("Email the FAIR team") is None
+    assert all_of(REVIEW, word_range(1, 2))("APPROVED but too long") == "too_long"
+
+
+def test_fast_model_answer_is_kept_when_valid():
+    client = _replies(**{FAST_MODEL: "APPROVED", FULL_MODEL: "unused"})
+    step = _step()
+    assert run_cascade(client, step, MESSAGES) == "APPROVED"
+    assert [call["model"] for call in client.calls] == [FAST_MODEL]
+    assert cascade_metrics.snapshot()[step.name]["escalations"] == 0
+
+
+def test_invalid_fast_answer_escalates():
+    client = _replies(**{FAST_MODEL: "Looks fine to me", FULL_MODEL: "REVISION_NEEDED"})
+    step = _step()
+    assert run_cascade(client, step, MESSAGES) == "REVISION_NEEDED"
+    stats = cascade_metrics.snapshot()[step.name]
+    assert stats["reasons"] == {"missing_verdict": 1}
+    assert stats["served_by"] == {FULL_MODEL: 1}
+
+
+def test_last_model_output_is_returned_even_if_invalid():
+    client = _replies(**{FAST_MODEL: "no", FULL_MODEL: "still no"})
+    step = _step()
+    assert run_cascade(client, step, MESSAGES) == "still no"
+    assert cascade_metrics.snapshot()[step.name]["unresolved"] == 1
+
+
+def test_fast_model_errors_escalate_but_last_model_errors_raise():
+    def responder(kwargs):
+        if kwargs["model"] == FAST_MODEL:
+            raise ConnectionError("rate limited")
+        return "APPROVED"
+
+    step = _step()
+    assert run_cascade(FakeChatClient(responder), step, MESSAGES) == "APPROVED"
+    assert cascade_metrics.snapshot()[step.name]["reasons"] == {"error:ConnectionError": 1}
+
+    def always_fail(kwargs):
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        run_cascade(FakeChatClient(always_fail), _step(), MESSAGES)
+
+
+def test_disabled_steps_go_straight_to_the_last_model(monkeypatch):
+    step = _step()
+    monkeypatch.setenv("LLM_CASCADE_DISABLED", f"other,{step.name}")
+    client = _replies(**{FAST_MODEL: "APPROVED", FULL_MODEL: "APPROVED"})
+    run_cascade(client, step, MESSAGES)
+    assert [call["model"] for call in client.calls] == [FULL_MODEL]
+
+
+def test_degraded_runs_never_escalate():
+    client = _replies(**{FAST_MODEL: "no verdict", FULL_MODEL: "APPROVED"})
+    with degraded_run(DegradationPolicy(mode="on")):
+        assert run_cascade(client, _step(), MESSAGES) == "no verdict"
+    assert [call["model"] for call in client.calls] == [FAST_MODEL]
+
+
+def test_escalation_rate():
+    metrics = CascadeMetrics()
+    metrics.record("s", FAST_MODEL, [], resolved=True)
+    metrics.record("s", FULL_MODEL, ["too_short"], resolved=True)
+    assert metrics.snapshot()["s"]["escalation_rate"] == 0.5
@@ -0,0 +1,99 @@
+"""SQLite checkpointing, resume and pruning (common/checkpoint.py)."""
+
+from typing import Optional
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+from pydantic import BaseModel
+
+from common.checkpoint import STORED_RESULT_STEP, SqliteCheckpointSaver, run_checkpointed
+from common.threads import reuse_finished_runs
+
+
+class State(BaseModel):
+    topic: str = ""
+    research: Optional[str] = None
+    draft: Optional[str] = None
+
+
+@pytest.fixture
+def saver(tmp_path):
+    return SqliteCheckpointSaver(str(tmp_path / "checkpoints.db"))
+
+
+def _app(saver, calls, fail_draft=None):
+    def research(state):
+        calls.append("research")
+        return {"research": f"notes on {state.topic}"}
+
+    def draft(state):
+        calls.append("draft")
+        if fail_draft and fail_draft.pop():
+            raise RuntimeError("429 from upstream")
+        return {"draft": f"draft from {state.research}"}
+
+    graph = StateGraph(State)
+    graph.add_node("research", research)
+    graph.add_node("draft", draft)
+    graph.add_edge(START, "research")
+    graph.add_edge("research", "draft")
+    graph.add_edge("draft", END)
+    return graph.compile(checkpointer=saver)
+
+
+def _rows(saver, table, thread_id):
+    return saver._conn.execute(f"SELECT COUNT(*) FROM {table} WHERE thread_id = ?", (thread_id,)).fetchone()[0]
+
+
+def test_failed_run_resumes_from_the_last_completed_node(saver):
+    calls = []
+    app = _app(saver, calls, fail_draft=[True])
+    with pytest.raises(RuntimeError):
+        run_checkpointed(app, State(topic="chips"), "t1")
+    result = run_checkpointed(app, State(topic="chips"), "t1")
+    assert result["draft"] == "draft from notes on chips"
+    assert calls == ["research", "draft", "draft"]
+
+
+def test_finished_thread_runs_again_by_default(saver):
+    calls = []
+    app = _app(saver, calls)
+    run_checkpointed(app, State(topic="chips"), "t2")
+    run_checkpointed(app, State(topic="chips"), "t2")
+    assert calls == ["research", "draft"] * 2
+
+
+def test_stored_result_is_opt_in_and_reported(saver):
+    calls, steps = [], []
+    app = _app(saver, calls)
+    first = run_checkpointed(app, State(topic="chips"), "t3")
+    with reuse_finished_runs():
+        again = run_checkpointed(app, State(topic="chips"), "t3", on_progress=steps.append)
+    assert again == first
+    assert steps == [STORED_RESULT_STEP]
+    assert calls == ["research", "draft"]
+
+
+def test_different_inputs_start_fresh(saver):
+    calls = []
+    app = _app(saver, calls)
+    run_checkpointed(app, State(topic="chips"), "t4")
+    with reuse_finished_runs():
+        result = run_checkpointed(app, State(topic="batteries"), "t4")
+    assert result["research"] == "notes on batteries"
+    assert calls.count("research") == 2
+
+
+def test_only_the_latest_checkpoint_is_kept(saver):
+    run_checkpointed(_app(saver, []), State(topic="chips"), "t5")
+    assert _rows(saver, "checkpoints", "t5") == 1
+
+
+def test_stale_threads_are_pruned(saver):
+    run_checkpointed(_app(saver, []), State(topic="chips"), "old")
+    run_checkpointed(_app(saver, []), State(topic="chips"), "new")
+    saver._conn.execute("UPDATE threads SET updated_at = 0 WHERE thread_id = 'old'")
+    assert saver.prune() == 1
+    assert _rows(saver, "checkpoints", "old") == 0
+    assert _rows(saver, "writes", "old") == 0
+    assert _rows(saver, "checkpoints", "new") == 1
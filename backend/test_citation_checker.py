@@ -0,0 +1,71 @@
+"""Deterministic news citation and length checks (news/citation_checker.py)."""
+
+from news.citation_checker import (
+    MAX_DRAFT_TOKENS,
+    TOKENS_PER_WORD,
+    check_citations,
+    count_words,
+    draft_token_budget,
+)
+
+RESEARCH = "[S1] Budget report\nSnippet: ...\n\n[S2] Interview\nSnippet: ..."
+
+
+def _draft(words: int) -> str:
+    body = " ".join(["word"] * (words - 4))
+    return f"# Headline\n\nSales grew [S1]. {body}"
+
+
+def test_clean_draft_passes():
+    draft = "# Title\n\nRevenue rose 12% last year [S1]. The CEO said growth will continue [S2]."
+    report = check_citations(draft, RESEARCH, target_word_count=0)
+    assert report.passed
+    assert report.cited_ids == {1, 2}
+
+
+def test_unknown_source_is_a_hard_issue():
+    report = check_citations("Revenue rose 12% [S7].", RESEARCH, target_word_count=0)
+    assert [issue.kind for issue in report.hard_issues] == ["unknown_source"]
+
+
+def test_uncited_figure_needs_judgement():
+    draft = "Revenue rose 12% last year. Growth will continue [S1]."
+    report = check_citations(draft, RESEARCH, target_word_count=0)
+    assert [issue.kind for issue in report.soft_issues] == ["uncited_claim"]
+    assert not report.hard_issues
+
+
+def test_no_citations_at_all():
+    report = check_citations("A plain story without sources.", RESEARCH, target_word_count=0)
+    assert "missing_citations" in {issue.kind for issue in report.issues}
+
+
+def test_word_count_ignores_markers_and_markdown():
+    assert count_words("# Title\n\n**Bold** claim [S1]") == 3
+
+
+def test_word_count_range_boundaries():
+    # Target 2000, tolerance 25%: 1500-2500 words are accepted.
+    for words, ok in ((1499, False), (1500, True), (2500, True), (2501, False)):
+        report = check_citations(_draft(words), RESEARCH, target_word_count=2000)
+        assert ("word_count" not in {i.kind for i in report.issues}) is ok, words
+
+
+def test_draft_budget_reaches_the_top_of_the_range():
+    # The old fixed 1500-token budget capped drafts near 1100 words.
+    assert draft_token_budget(500) == 1500
+    assert draft_token_budget(2000) >= 2500 * TOKENS_PER_WORD
+    assert draft_token_budget(100_000) == MAX_DRAFT_TOKENS
+
+
+def test_targets_beyond_the_budget_are_not_demanded():
+    reachable = int(MAX_DRAFT_TOKENS / TOKENS_PER_WORD)
+    report = check_citations(_draft(int(reachable * 0.8)), RESEARCH, target_word_count=100_000)
+    assert "word_count" not in {issue.kind for issue in report.issues}
+
+
+def test_draft_article_requests_enough_tokens(fake_llm):
+    from news.news_workflow_model import NewsArticleState, draft_article
+
+    draft_article(NewsArticleState(prompt="Chip exports", word_count=2000, research_notes=RESEARCH))
+    assert fake_llm.calls[-1]["max_completion_tokens"] == draft_token_budget(2000)
@@ -0,0 +1,147 @@
+"""Request deadlines: per-endpoint budgets and propagation to LLM calls (common/deadline.py)."""
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from common.deadline import (
+    DeadlineExceeded,
+    DeadlineMiddleware,
+    RequestCancelled,
+    current_deadline,
+    deadline_scope,
+    in_request_context,
+    parse_deadlines,
+    time_short,
+)
+
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+def test_parse_deadlines():
+    assert parse_deadlines("/a=300, /b/=45.5,bad,/c=x,/d=0") == {"/a": 300.0, "/b": 45.5}
+
+
+def _deadline_for(path, headers=(), deadlines=None):
+    """Run one request through the middleware and return the deadline the app saw."""
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["deadline"] = current_deadline()
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        pass
+
+    middleware = DeadlineMiddleware(app, deadlines)
+    scope = {"type": "http", "path": path, "headers": list(headers)}
+    asyncio.run(middleware(scope, receive, send))
+    return seen["deadline"]
+
+
+def test_endpoint_defaults(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_SECONDS", "180")
+    assert _deadline_for("/generate-blog").seconds == 180
+    assert _deadline_for("/generate-youtube-script").seconds == 600
+    assert _deadline_for("/x-post/generate/stream").seconds == 600
+    assert _deadline_for("/jobs/123") is None
+    assert _deadline_for("/health/agents") is None
+
+
+def test_env_overrides_endpoint_defaults(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINES", "/youtube-blog=90")
+    assert _deadline_for("/youtube-blog").seconds == 90
+
+
+def test_timeout_header_is_capped(monkeypatch):
+    monkeypatch.setenv("REQUEST_DEADLINE_MAX_SECONDS", "600")
+    header = lambda value: [(b"x-request-timeout", value)]
+    assert _deadline_for("/generate-blog", header(b"30")).seconds == 30
+    assert _deadline_for("/generate-blog", header(b"5000")).seconds == 600
+    assert _deadline_for("/slow", header(b"5000"), deadlines={"/slow": 900}).seconds == 900
+    assert _deadline_for("/generate-blog", header(b"soon")).seconds == 180
+
+
+def test_disconnect_cancels_the_deadline():
+    seen = {}
+
+    async def app(scope, receive, send):
+        await receive()  # the body
+        await receive()  # waits for the disconnect
+        seen["deadline"] = current_deadline()
+
+    messages = iter([{"type": "http.request", "body": b""}, {"type": "http.disconnect"}])
+
+    async def receive():
+        return next(messages)
+
+    async def send(message):
+        pass
+
+    scope = {"type": "http", "path": "/generate-blog", "headers": []}
+    asyncio.run(DeadlineMiddleware(app)(scope, receive, send))
+    assert seen["deadline"].cancelled
+    with pytest.raises(RequestCancelled):
+        seen["deadline"].check()
+
+
+def test_deadline_reaches_worker_threads():
+    with deadline_scope(60) as deadline:
+        with ThreadPoolExecutor(1) as pool:
+            assert pool.submit(in_request_context(current_deadline)).result() is deadline
+    with deadline_scope(10) as outer:
+        with deadline_scope(100) as inner:
+            assert inner is outer  # a nested scope never extends the deadline
+
+
+def test_time_short_protects_required_steps():
+    assert not time_short()
+    with deadline_scope(5):
+        assert time_short(reserve=30)
+        assert not time_short(reserve=1)
+
+
+def test_llm_calls_get_the_remaining_time(fake_llm):
+    from llm import get_client
+
+    with deadline_scope(50):
+        get_client().chat.completions.create(model="m", messages=MESSAGES)
+    assert 0 < fake_llm.calls[-1]["timeout"] <= 50
+
+    with deadline_scope(0.5):
+        with pytest.raises(DeadlineExceeded):
+            get_client().chat.completions.create(model="m", messages=MESSAGES)
+    assert len(fake_llm.calls) == 1
+
+
+def test_background_tasks_keep_the_deadline_after_the_response(fake_llm):
+    from fastapi import BackgroundTasks, FastAPI
+    from fastapi.testclient import TestClient
+
+    from llm import get_client
+
+    outcome = {}
+
+    def warm_up():
+        time.sleep(0.1)  # let the server report the finished response as a disconnect
+        try:
+            get_client().chat.completions.create(model="m", messages=MESSAGES)
+            outcome["deadline_cancelled"] = current_deadline().cancelled
+        except Exception as exc:
+            outcome["error"] = exc
+
+    app = FastAPI()
+    app.add_middleware(DeadlineMiddleware)
+
+    @app.post("/work")
+    def work(payload: dict, background_tasks: BackgroundTasks):
+        background_tasks.add_task(warm_up)
+        return {"status": "accepted"}
+
+    assert TestClient(app).post("/work", json={"topic": "x"}).status_code == 200
+    assert outcome == {"deadline_cancelled": False}
+    assert len(fake_llm.calls) == 1
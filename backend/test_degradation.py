@@ -0,0 +1,100 @@
+"""Latency-driven degraded mode, model routing and optional steps (llm/degradation.py)."""
+
+import time
+
+from common.deadline import deadline_scope
+from llm.degradation import (
+    FAST_MODEL,
+    FULL_MODEL,
+    MIN_MAX_TOKENS,
+    DegradationPolicy,
+    degradation_policy,
+    degraded_run,
+    full_quality,
+    is_degraded,
+    percentile,
+    route,
+    skip_optional,
+)
+
+WINDOW = 0.1
+
+
+def _auto_policy() -> DegradationPolicy:
+    return DegradationPolicy(
+        mode="auto", enter_seconds=1.0, exit_seconds=0.5, window_seconds=WINDOW, min_samples=5
+    )
+
+
+def _observe(policy, seconds, times=5, model=FULL_MODEL):
+    for _ in range(times):
+        policy.observe(model, seconds)
+
+
+def _next_window():
+    time.sleep(WINDOW * 1.5)
+
+
+def test_percentile():
+    assert percentile([], 95) is None
+    assert percentile([3, 1, 2], 50) == 2
+    assert percentile(range(1, 101), 95) == 95
+
+
+def test_enters_and_leaves_at_the_p95_thresholds():
+    policy = _auto_policy()
+    _observe(policy, 3.0, times=4)
+    assert not policy.active()  # too few samples to judge
+
+    _observe(policy, 3.0, times=1)
+    assert policy.active()
+    assert policy.snapshot()["degraded_since"] is not None
+
+    _next_window()
+    _observe(policy, 0.8)  # between the exit and enter thresholds
+    assert policy.active()
+
+    _next_window()
+    _observe(policy, 0.3)
+    assert not policy.active()
+    assert policy.snapshot()["degraded"] is False
+
+
+def test_only_the_watched_model_counts():
+    policy = _auto_policy()
+    _observe(policy, 5.0, times=10, model=FAST_MODEL)
+    assert not policy.active()
+    assert policy.snapshot()["models"][FAST_MODEL]["samples"] == 10
+
+
+def test_forced_modes_and_run_counts():
+    forced = DegradationPolicy(mode="on")
+    with degraded_run(forced) as degraded:
+        assert degraded and is_degraded()
+    assert not is_degraded()
+    assert (forced.total_runs, forced.degraded_runs) == (1, 1)
+
+    off = DegradationPolicy(mode="off")
+    _observe(off, 100.0, times=20)
+    with degraded_run(off) as degraded:
+        assert not degraded
+
+
+def test_route_moves_non_critical_calls_to_the_fast_model():
+    assert route(FULL_MODEL, 1000) == (FULL_MODEL, 1000)
+    with degraded_run(DegradationPolicy(mode="on")):
+        reduced = max(MIN_MAX_TOKENS, int(1000 * degradation_policy.max_tokens_factor))
+        assert route(FULL_MODEL, 1000) == (FAST_MODEL, reduced)
+        assert route(FULL_MODEL, 100) == (FAST_MODEL, 100)  # never raised to the floor
+        assert route(FULL_MODEL, 1000, critical=True) == (FULL_MODEL, 1000)
+        assert route("other-model", 1000) == ("other-model", reduced)
+        with full_quality():
+            assert route(FULL_MODEL, 1000) == (FULL_MODEL, 1000)
+
+
+def test_skip_optional():
+    assert not skip_optional("review")
+    with degraded_run(DegradationPolicy(mode="on")):
+        assert skip_optional("review")
+    with deadline_scope(5):  # less than the reserve for optional steps
+        assert skip_optional("review")
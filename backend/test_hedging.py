@@ -0,0 +1,112 @@
+"""Hedged completions: when a duplicate is sent, who wins, and the hedge budget (llm/hedging.py)."""
+
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm import FakeChatClient
+from llm.degradation import DegradationPolicy
+from llm.hedging import MIN_SAMPLES, HedgePolicy, hedged_create
+
+MODEL = "test-model"
+REQUEST = {"model": MODEL, "messages": [{"role": "user", "content": "draft"}]}
+
+
+def _policy(**kwargs) -> HedgePolicy:
+    latency = DegradationPolicy(mode="off")
+    for _ in range(MIN_SAMPLES):
+        latency.observe(MODEL, 0.05)
+    return HedgePolicy(latency=latency, enabled=True, min_delay=0.05, **kwargs)
+
+
+def _content(response) -> str:
+    return response.choices[0].message.content
+
+
+class SlowFirstClient:
+    """The first request stalls until released; later ones answer at once."""
+
+    def __init__(self) -> None:
+        self.release = threading.Event()
+        self.threads = []
+        self.responses = []
+        self.lock = threading.Lock()
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def create(self, **kwargs):
+        with self.lock:
+            number = len(self.threads)
+            self.threads.append(threading.current_thread())
+        if number == 0:
+            self.release.wait(5)
+        response = SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=f"reply {number}"))],
+            closed=False,
+        )
+        response.close = lambda: setattr(response, "closed", True)
+        self.responses.append(response)
+        return response
+
+
+def test_no_samples_means_no_hedge():
+    client = FakeChatClient()
+    policy = HedgePolicy(latency=DegradationPolicy(mode="off"), enabled=True)
+    hedged_create(client, policy, **REQUEST)
+    assert len(client.calls) == 1
+    assert policy.snapshot()["calls"] == 0
+
+
+def test_fast_primary_is_not_hedged():
+    client = FakeChatClient(lambda kwargs: "quick")
+    policy = _policy(max_rate=1.0)
+    assert _content(hedged_create(client, policy, **REQUEST)) == "quick"
+    assert len(client.calls) == 1
+    assert policy.snapshot()["hedged"] == 0
+
+
+def test_slow_primary_loses_to_the_hedge_and_is_closed():
+    client = SlowFirstClient()
+    policy = _policy(max_rate=1.0)
+    assert _content(hedged_create(client, policy, **REQUEST)) == "reply 1"
+    assert policy.snapshot()["hedge_wins"] == 1
+
+    client.release.set()
+    deadline = time.monotonic() + 5
+    while len(client.responses) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    loser = next(r for r in client.responses if _content(r) == "reply 0")
+    assert loser.closed
+
+
+def test_calls_over_budget_run_on_the_callers_thread():
+    client = SlowFirstClient()
+    client.release.set()
+    policy = _policy(max_rate=0.0)
+    hedged_create(client, policy, **REQUEST)
+    assert client.threads == [threading.current_thread()]
+    assert policy.snapshot()["over_budget"] == 1
+
+
+def test_failed_primary_waits_for_the_hedge():
+    attempts = []
+
+    def responder(kwargs):
+        attempts.append(1)
+        if len(attempts) == 1:
+            time.sleep(0.2)
+            raise ConnectionError("reset")
+        return "hedge"
+
+    policy = _policy(max_rate=1.0)
+    assert _content(hedged_create(FakeChatClient(responder), policy, **REQUEST)) == "hedge"
+
+
+def test_both_failing_raises():
+    def responder(kwargs):
+        time.sleep(0.1)
+        raise ConnectionError("down")
+
+    with pytest.raises(ConnectionError):
+        hedged_create(FakeChatClient(responder), _policy(max_rate=1.0), **REQUEST)
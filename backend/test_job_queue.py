@@ -0,0 +1,171 @@
+"""Durable job store and /jobs submission (jobs/)."""
+
+import threading
+import time
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from pydantic import BaseModel, ValidationError
+
+from api.agent_manager import AgentBusyError
+from jobs.router import router
+from jobs.store import FAILED, QUEUED, RUNNING, SUCCEEDED, JobStore
+from jobs.worker import RETRY_MAX_SECONDS, JobQueue, retry_delay
+from jobs.workflows import WORKFLOWS, JobWorkflow
+
+
+@pytest.fixture
+def store(tmp_path):
+    return JobStore(str(tmp_path / "jobs.db"))
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_claims_oldest_first_and_counts_attempts(store):
+    first = store.enqueue("blog", {"n": 1})
+    store.enqueue("blog", {"n": 2})
+    job = store.claim_next()
+    assert job["id"] == first
+    assert job["status"] == RUNNING and job["attempts"] == 1
+    assert store.count_by_status() == {QUEUED: 1, RUNNING: 1}
+
+
+def test_concurrent_workers_never_share_a_job(store):
+    ids = {store.enqueue("news", {"n": n}) for n in range(40)}
+    claimed, lock = [], threading.Lock()
+
+    def worker():
+        while (job := store.claim_next()) is not None:
+            with lock:
+                claimed.append(job["id"])
+
+    threads = [threading.Thread(target=worker) for _ in range(6)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(claimed) == sorted(ids)
+
+
+def test_interrupted_jobs_are_requeued_until_the_attempt_cap(store):
+    job_id = store.enqueue("blog", {})
+    for attempt in range(1, 3):
+        assert store.claim_next()["attempts"] == attempt
+        assert store.requeue_interrupted(max_attempts=3) == (1, 0)
+
+    assert store.claim_next()["attempts"] == 3
+    assert store.requeue_interrupted(max_attempts=3) == (0, 1)
+    job = store.get(job_id)
+    assert job["status"] == FAILED
+    assert "Interrupted" in job["error"]
+    assert store.claim_next() is None
+
+
+def test_results_and_failures_are_stored(store):
+    ok, bad = store.enqueue("blog", {}), store.enqueue("blog", {})
+    store.claim_next(), store.claim_next()
+    store.mark_succeeded(ok, {"status": "success"})
+    store.mark_failed(bad, "boom")
+    assert store.get(ok)["result"] == {"status": "success"}
+    assert store.get(bad)["error"] == "boom"
+
+
+def test_retry_delay_backs_off_and_honours_retry_after():
+    assert retry_delay(1) < retry_delay(2) < retry_delay(3)
+    assert retry_delay(20) == RETRY_MAX_SECONDS
+    assert retry_delay(1, retry_after=120) == 120
+
+
+def _run_flaky(store, monkeypatch, outcomes):
+    """Submit a job whose runs return or raise ``outcomes`` in turn; execute it until it settles."""
+    outcomes = iter(outcomes)
+
+    def run(payload, on_progress):
+        outcome = next(outcomes)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+
+    monkeypatch.setitem(WORKFLOWS, "flaky", JobWorkflow(run=run))
+    monkeypatch.setenv("JOB_MAX_ATTEMPTS", "3")
+    queue = JobQueue(store)
+    job_id = queue.submit("flaky", {})
+    delays = []
+    while (job := store.claim_next()) is not None:
+        queue._execute(job)
+        job = store.get(job_id)
+        if job["status"] == QUEUED:
+            delays.append(job["run_after"] - time.time())
+            store.retry_later(job_id, job["error"], 0)  # skip the wait
+    return store.get(job_id), delays
+
+
+def test_transient_failures_are_retried_with_backoff(store, monkeypatch):
+    job, delays = _run_flaky(
+        store,
+        monkeypatch,
+        [AgentBusyError("busy", retry_after=30), {"status": "error", "message": "503"}, {"status": "success"}],
+    )
+    assert job["status"] == SUCCEEDED and job["attempts"] == 3
+    assert delays[0] > 25  # the agent's Retry-After
+    assert 0 < delays[1] <= retry_delay(2)
+
+
+def test_transient_failures_stop_at_the_attempt_cap(store, monkeypatch):
+    job, delays = _run_flaky(store, monkeypatch, [ConnectionError("reset")] * 3)
+    assert job["status"] == FAILED and len(delays) == 2
+    assert "gave up after 3" in job["error"]
+
+
+def test_invalid_payloads_fail_without_a_retry(store, monkeypatch):
+    class Payload(BaseModel):
+        n: int
+
+    with pytest.raises(ValidationError) as invalid:
+        Payload(n="many")
+    job, delays = _run_flaky(store, monkeypatch, [invalid.value])
+    assert job["status"] == FAILED and job["attempts"] == 1 and delays == []
+
+
+def test_delayed_jobs_wait_for_their_turn(store):
+    job_id = store.enqueue("blog", {})
+    store.claim_next()
+    store.retry_later(job_id, "busy", 60)
+    assert store.claim_next() is None
+    assert store.get(job_id)["status"] == QUEUED
+
+
+@pytest.mark.parametrize("body", ["[1, 2]", '"text"', "not json"])
+def test_non_object_bodies_are_rejected(client, body):
+    response = client.post("/jobs/blog", content=body, headers={"content-type": "application/json"})
+    assert response.status_code == 422
+
+
+@pytest.mark.parametrize(
+    "workflow, payload",
+    [
+        ("news", {"prompt": "x", "articleWordCount": "many"}),
+        ("youtube-script", {"prompt": "x", "subscribers": {"bad": "type"}}),
+        ("x-post", {"keywords": "not-a-list"}),
+    ],
+)
+def test_invalid_payloads_fail_at_submit(client, workflow, payload):
+    assert client.post(f"/jobs/{workflow}", json=payload).status_code == 422
+
+
+def test_unknown_workflow(client):
+    assert client.post("/jobs/nope", json={}).status_code == 404
+
+
+def test_valid_submission_is_queued(client):
+    response = client.post("/jobs/news", json={"prompt": "Chip exports", "articleWordCount": 600})
+    assert response.status_code == 202
+    job = client.get(f"/jobs/{response.json()['jobId']}").json()
+    assert job["status"] == QUEUED
+    assert job["workflow"] == "news"
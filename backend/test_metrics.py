@@ -0,0 +1,148 @@
+"""Sharded metrics, scrape-time callbacks and the /metrics endpoint (common/metrics.py, health/metrics.py)."""
+
+import threading
+import uuid
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.metrics import CONTENT_TYPE, MetricsMiddleware, Registry, record_cache
+
+THREADS = 8
+INCREMENTS = 1000
+
+
+def _run_threads(target, count=THREADS):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+
+def _samples(text: str) -> dict:
+    """``name{labels}`` -> value for every sample line of an exposition."""
+    samples = {}
+    for line in text.splitlines():
+        if line and not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_counter_shards_add_up_across_threads():
+    counter = Registry().counter("jobs_total", "Jobs.", ("kind",))
+
+    def work():
+        for _ in range(INCREMENTS):
+            counter.inc(kind="a")
+        counter.inc(2, kind="b")
+
+    _run_threads(work)
+    expected = {("a",): THREADS * INCREMENTS, ("b",): THREADS * 2}
+    assert counter.values() == expected
+    # Shards of finished threads are retired once, never counted twice.
+    assert counter.values() == expected
+
+
+def test_live_and_finished_threads_are_both_counted():
+    counter = Registry().counter("events_total", "Events.")
+    started, release = threading.Event(), threading.Event()
+
+    def live():
+        counter.inc(5)
+        started.set()
+        release.wait(5)
+
+    thread = threading.Thread(target=live)
+    thread.start()
+    started.wait(5)
+    counter.inc()
+    assert counter.values() == {(): 6}
+    release.set()
+    thread.join()
+    assert counter.values() == {(): 6}
+
+
+def test_gauge_moves_between_threads():
+    gauge = Registry().gauge("in_flight", "Work in flight.")
+    _run_threads(lambda: gauge.inc())
+    _run_threads(lambda: gauge.dec())
+    with gauge.track():
+        assert gauge.render()[-1] == "in_flight 1"
+    assert gauge.render()[-1] == "in_flight 0"
+
+
+def test_histogram_exposition():
+    histogram = Registry().histogram("latency_seconds", "Latency.", ("route",), buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 3.0):
+        histogram.observe(value, route="/a")
+    assert histogram.render() == [
+        "# HELP latency_seconds Latency.",
+        "# TYPE latency_seconds histogram",
+        'latency_seconds_bucket{route="/a",le="0.1"} 1',
+        'latency_seconds_bucket{route="/a",le="1"} 3',
+        'latency_seconds_bucket{route="/a",le="+Inf"} 4',
+        'latency_seconds_sum{route="/a"} 4.05',
+        'latency_seconds_count{route="/a"} 4',
+    ]
+
+
+def test_callback_metrics_are_read_at_scrape_time():
+    registry = Registry()
+    state = {"queued": 2}
+    registry.callback(
+        "queue_depth", "Waiting work.", lambda: [(("blog",), state["queued"]), (("news",), None)],
+        labelnames=("agent",),
+    )
+    registry.callback("broken", "Fails to collect.", lambda: 1 / 0)
+    registry.counter("after_total", "Rendered after the broken collector.").inc()
+
+    assert _samples(registry.render()) == {'queue_depth{agent="blog"}': 2, "after_total": 1}
+    state["queued"] = 7
+    assert _samples(registry.render())['queue_depth{agent="blog"}'] == 7
+
+    registry.callback("queue_depth", "Replaced.", lambda: [(("x",), 1)], labelnames=("agent",))
+    assert 'queue_depth{agent="x"} 1' in registry.render()
+
+
+def test_label_values_are_escaped():
+    counter = Registry().counter("odd_total", "Odd labels.", ("value",))
+    counter.inc(value='say "hi"\nnow')
+    assert counter.render()[-1] == 'odd_total{value="say \\"hi\\"\\nnow"} 1'
+
+
+def test_metrics_endpoint_reports_scraped_totals():
+    from health.router import router
+
+    route = f"/probe-{uuid.uuid4().hex[:8]}/{{item}}"
+    cache = f"test.{uuid.uuid4().hex[:8]}"
+    app = FastAPI()
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(router)
+    app.get(route)(lambda item: {"item": item})
+
+    client = TestClient(app)
+
+    def hit(number):
+        client.get(route.replace("{item}", str(number)))
+        record_cache(cache, hits=1)
+
+    _run_threads(lambda: [hit(n) for n in range(5)], count=4)
+    record_cache(cache, misses=4)
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == CONTENT_TYPE
+    text = response.text
+    assert "# TYPE http_requests_total counter" in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
+    assert "# TYPE agent_queue_depth gauge" in text  # health.metrics callbacks
+
+    samples = _samples(text)
+    labels = f'method="GET",route="{route}"'
+    assert samples[f'http_requests_total{{{labels},status="200"}}'] == 20
+    assert samples[f'http_request_duration_seconds_count{{{labels}}}'] == 20
+    assert samples[f'cache_lookups_total{{cache="{cache}",result="hit"}}'] == 20
+    assert samples[f'cache_hit_ratio{{cache="{cache}"}}'] == 20 / 24
+    assert samples["degraded_mode"] in (0, 1)
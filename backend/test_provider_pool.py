@@ -0,0 +1,139 @@
+"""Role routing, failover and ejection across LLM backends (llm/providers.py)."""
+
+import pytest
+
+from llm import JUDGE_ROLE, FakeChatClient, ProviderPool
+from llm.degradation import FAST_MODEL, FULL_MODEL
+from llm.providers import (
+    EJECT_AFTER_FAILURES,
+    Backend,
+    NoBackendAvailableError,
+    backend_from_env,
+    resolve_role,
+)
+
+MODELS = {"writer": "big", "fast": "small", JUDGE_ROLE: "reviewer"}
+MESSAGES = [{"role": "user", "content": "hi"}]
+
+
+class UpstreamError(Exception):
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+        headers = {"retry-after": str(retry_after)} if retry_after is not None else {}
+        self.response = type("Response", (), {"headers": headers})()
+
+
+def _backend(name, responder=None, **kwargs):
+    fake = FakeChatClient(responder or (lambda request: f"{name}:{request['model']}"))
+    backend = Backend(name, lambda: fake, models=kwargs.pop("models", MODELS), kind="fake", **kwargs)
+    return backend, fake
+
+
+def _failing(status_code, retry_after=None):
+    def responder(request):
+        raise UpstreamError(status_code, retry_after)
+
+    return responder
+
+
+def _reply(pool, model="writer"):
+    return pool.chat.completions.create(model=model, messages=MESSAGES).choices[0].message.content
+
+
+def test_roles_resolve_from_names_and_model_ids():
+    assert resolve_role(JUDGE_ROLE) == "judge"
+    assert resolve_role(FAST_MODEL) == "fast"
+    assert resolve_role(FULL_MODEL) == "writer"
+    assert resolve_role("something-else") == "writer"
+
+
+def test_each_role_uses_the_backend_model():
+    backend, fake = _backend("a")
+    pool = ProviderPool([backend])
+    assert _reply(pool, JUDGE_ROLE) == "a:reviewer"
+    assert _reply(pool, FAST_MODEL) == "a:small"
+
+
+def test_backends_without_the_role_are_skipped():
+    writer_only, _ = _backend("w", models={"writer": "big"})
+    with pytest.raises(NoBackendAvailableError):
+        _reply(ProviderPool([writer_only]), JUDGE_ROLE)
+
+
+def test_retryable_errors_fail_over():
+    broken, _ = _backend("broken", _failing(503), weight=1000)
+    healthy, _ = _backend("healthy", weight=0.001)
+    pool = ProviderPool([broken, healthy])
+    assert _reply(pool) == "healthy:big"
+    assert pool.snapshot()["broken"]["failures"] == 1
+
+
+def test_bad_requests_are_not_retried():
+    bad, _ = _backend("bad", _failing(400), weight=1000)
+    other, other_fake = _backend("other", weight=0.001)
+    with pytest.raises(UpstreamError):
+        _reply(ProviderPool([bad, other]))
+    assert other_fake.calls == []
+    assert bad.consecutive_failures == 0
+
+
+def test_repeated_failures_eject_the_backend():
+    flaky, flaky_fake = _backend("flaky", _failing(500), weight=1000)
+    healthy, _ = _backend("healthy", weight=0.001)
+    pool = ProviderPool([flaky, healthy])
+    for _ in range(EJECT_AFTER_FAILURES):
+        _reply(pool)
+    assert not flaky.healthy()
+    assert pool.snapshot()["flaky"]["ejections"] == 1
+    calls = len(flaky_fake.calls)
+    _reply(pool)
+    assert len(flaky_fake.calls) == calls  # skipped while ejected
+
+
+def test_retry_after_ejects_at_once():
+    limited, _ = _backend("limited", _failing(429, retry_after=12), weight=1000)
+    healthy, _ = _backend("healthy", weight=0.001)
+    pool = ProviderPool([limited, healthy])
+    _reply(pool)
+    assert 0 < pool.snapshot()["limited"]["ejected_for_seconds"] <= 12
+
+
+def test_everything_ejected_still_tries_one_backend():
+    only, fake = _backend("only", _failing(500))
+    pool = ProviderPool([only])
+    for _ in range(EJECT_AFTER_FAILURES):
+        with pytest.raises(UpstreamError):
+            _reply(pool)
+    fake.responder = lambda request: "recovered"
+    assert _reply(pool) == "recovered"
+    assert only.consecutive_failures == 0
+
+
+def test_env_backend_parses_the_judge_role(monkeypatch):
+    monkeypatch.setenv("LLM_BACKEND_LOCAL_KIND", "fake")
+    monkeypatch.setenv("LLM_BACKEND_LOCAL_MODELS", "fast=small,judge=reviewer,bogus=x")
+    backend = backend_from_env("local")
+    assert backend.models == {"fast": "small", "judge": "reviewer"}
+
+
+def test_reviews_are_sent_to_the_judge_role():
+    from llm import clients
+    from news.news_workflow_model import NewsArticleState, compliance_review
+
+    backend, fake = _backend("local", lambda request: "Verdict: APPROVED\nObservations: No issues.")
+    saved = dict(clients._clients)
+    clients.set_client(ProviderPool([backend]))
+    try:
+        compliance_review(
+            NewsArticleState(
+                article_draft="Revenue rose 12% last year. Growth continues [S1].",
+                research_notes="[S1] Report",
+                word_count=0,
+            )
+        )
+    finally:
+        with clients._clients_lock:
+            clients._clients.clear()
+            clients._clients.update(saved)
+    assert [call["model"] for call in fake.calls] == ["reviewer"]
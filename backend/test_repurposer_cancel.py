@@ -0,0 +1,51 @@
+"""Cancelling a streamed repurposer run between nodes (contentRepurposer/agent_content_repurposer_workflow.py)."""
+
+import threading
+import uuid
+
+import pytest
+
+from common.deadline import RequestCancelled
+from contentRepurposer.agent_content_repurposer_workflow import ContentRepurposerAgent
+from contentRepurposer.schemas import RepurposerInput
+
+
+def _input() -> RepurposerInput:
+    return RepurposerInput(
+        article_text=f"A short article about {uuid.uuid4().hex}.", threadId=uuid.uuid4().hex
+    )
+
+
+def test_cancel_stops_before_the_branches(fake_llm):
+    cancel = threading.Event()
+    events = []
+
+    def on_event(event, data):
+        events.append(event)
+        cancel.set()  # the client disconnects after the digest event
+
+    with pytest.raises(RequestCancelled):
+        ContentRepurposerAgent().invoke(_input(), on_event=on_event, cancel=cancel)
+    assert events == ["digest"]
+    assert fake_llm.calls == []
+
+
+def test_already_cancelled_run_does_not_start(fake_llm):
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(RequestCancelled):
+        ContentRepurposerAgent().invoke(_input(), cancel=cancel)
+    assert fake_llm.calls == []
+
+
+def test_uncancelled_run_completes(fake_llm):
+    fake_llm.responder = lambda kwargs: (
+        '{"twitter": "t", "linkedin": "l", "instagram": "i"}'
+        if "social media manager" in kwargs["messages"][-1]["content"]
+        else '{"people": [], "organizations": [], "topics": []}'
+        if "data analyst" in kwargs["messages"][-1]["content"]
+        else "text"
+    )
+    result = ContentRepurposerAgent().invoke(_input(), cancel=threading.Event())
+    assert result["repurposed_content"]["summary"] == "text"
+    assert len(fake_llm.calls) == 4
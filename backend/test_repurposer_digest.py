@@ -0,0 +1,101 @@
+"""Repurposer digest map/reduce and its caches (contentRepurposer/digest.py, repurposer_cache.py)."""
+
+import uuid
+
+from contentRepurposer.digest import (
+    ParagraphDigest,
+    article_content_key,
+    build_digest,
+    pack_chunks,
+    split_paragraphs,
+)
+from contentRepurposer.repurposer_cache import RepurposerCache, output_key
+
+
+def _article(n: int, edit: str = "") -> str:
+    return "\n\n".join(
+        f"Paragraph {i} explains point {i} in detail{edit if i == 0 else ''}. " + "Filler words. " * 40
+        for i in range(n)
+    )
+
+
+class Extractor:
+    def __init__(self, fail: bool = False) -> None:
+        self.paragraphs = []
+        self.fail = fail
+
+    def __call__(self, paragraphs, index, total):
+        self.paragraphs.extend(paragraphs)
+        if self.fail:
+            return [None] * len(paragraphs)
+        return [ParagraphDigest(key_points=[p.split(".")[0]], topics=["points"]) for p in paragraphs]
+
+
+def test_split_and_pack_respect_budgets():
+    paragraphs = split_paragraphs("One.\n\n\nTwo. Three.\n\n" + "Long sentence here. " * 50, max_tokens=100)
+    assert paragraphs[:2] == ["One.", "Two. Three."]
+    assert len(paragraphs) > 3  # the oversized paragraph was split by sentence
+    assert pack_chunks(["a" * 400, "b" * 400, "c" * 400], max_tokens=250) == [[0, 1], [2]]
+
+
+def test_short_articles_skip_the_digest():
+    extractor = Extractor()
+    assert build_digest("A short article.", extractor, budget=1200) is None
+    assert extractor.paragraphs == []
+
+
+def test_rerun_only_extracts_changed_paragraphs(tmp_path):
+    cache = RepurposerCache(str(tmp_path / "cache.db"))
+    first = Extractor()
+    digest = build_digest(_article(12), first, budget=200, cache=cache)
+    assert len(first.paragraphs) == 12 and digest.reused_paragraphs == 0
+
+    second = Extractor()
+    digest = build_digest(_article(12, edit=" and more"), second, budget=200, cache=cache)
+    assert len(second.paragraphs) == 1
+    assert digest.reused_paragraphs == 11
+
+
+def test_failed_extractions_fall_back_and_are_not_cached(tmp_path):
+    cache = RepurposerCache(str(tmp_path / "cache.db"))
+    digest = build_digest(_article(6), Extractor(fail=True), budget=200, cache=cache)
+    assert digest.key_points[0].startswith("Paragraph 0 explains point 0")
+    retry = Extractor()
+    build_digest(_article(6), retry, budget=200, cache=cache)
+    assert len(retry.paragraphs) == 6
+
+
+def test_short_article_key_follows_paragraphs():
+    article = "First paragraph about “queues”.\n\nSecond paragraph."
+    assert article_content_key(article, None) == article_content_key(
+        'first   paragraph about "queues".\n\n\n**Second** paragraph.', None
+    )
+    assert article_content_key(article, None) != article_content_key(
+        article.replace("Second", "Another"), None
+    )
+
+
+def test_long_article_key_follows_the_digest(tmp_path):
+    cache = RepurposerCache(str(tmp_path / "cache.db"))
+    original = build_digest(_article(6), Extractor(), budget=200, cache=cache)
+    # The edit is past the extracted lead sentence, so the digest is unchanged.
+    edited = build_digest(_article(6).replace("Filler words.", "Filler text.", 1), Extractor(), budget=200, cache=cache)
+    assert original.reused_paragraphs == 0 and edited.reused_paragraphs == 5
+    assert article_content_key("", original) == article_content_key("", edited)
+    assert output_key("summary", "x") != output_key("faq_section", "x")
+
+
+def test_branch_outputs_are_reused_for_unchanged_content(fake_llm):
+    from contentRepurposer.content_repurposer_workflow_model import (
+        RepurposerState,
+        digest_article,
+        generate_summary,
+    )
+
+    fake_llm.responder = lambda kwargs: "A summary."
+    topic = uuid.uuid4().hex
+    for article in (f"Notes on {topic}.\n\nSecond paragraph.", f"notes on  {topic}.\n\n\nSecond paragraph."):
+        state = RepurposerState(article_text=article)
+        state.content_key = digest_article(state)["content_key"]
+        assert generate_summary(state) == {"summary": "A summary."}
+    assert len(fake_llm.calls) == 1
@@ -0,0 +1,82 @@
+"""Section splitting, review parsing and targeted revision (common/sections.py)."""
+
+from common.sections import find_flagged_sections, revise_sections, split_sections
+
+ARTICLE = """# Chip exports rise
+
+Exports grew sharply this quarter [S1].
+
+## Background
+
+The policy changed last year and 40% of vendors adapted.
+
+## Outlook
+
+Analysts expect growth to continue [S2].
+"""
+
+
+def test_split_keeps_text_intact():
+    sections = split_sections(ARTICLE)
+    assert [s.index for s in sections] == [1, 2, 3]
+    assert sections[1].heading == "## Background"
+    assert "".join(s.text for s in sections) == ARTICLE
+
+
+def test_section_references():
+    sections = split_sections(ARTICLE * 2)  # six sections
+    cases = {
+        "Sections to revise: 2, 3 and 5": {2, 3, 5},
+        "Section 4 needs a source.": {4},
+        "sections 1 and 2": {1, 2},
+        "Sections: 2, and 6": {2, 6},
+        "Section #3": {3},
+    }
+    for review, expected in cases.items():
+        assert find_flagged_sections(sections, review) == expected, review
+
+
+def test_stray_letters_are_not_section_numbers():
+    sections = split_sections(ARTICLE)
+    # "and", "a", "n", "d" used to be swallowed by a [\d,\sand] class.
+    assert find_flagged_sections(sections, "Sections and a nd details are fine.") == set()
+    assert find_flagged_sections(sections, "Section 9 is out of range") == set()
+
+
+def test_quoted_sentences_flag_their_section():
+    review = 'Observations:\n- "The policy changed last year and 40% of vendors adapted."'
+    assert find_flagged_sections(split_sections(ARTICLE), review) == {2}
+
+
+def test_revise_sections_splices_only_flagged():
+    sections = split_sections(ARTICLE)
+    rewritten, revised = revise_sections(sections, {2}, lambda s: "## Background\n\nREWRITTEN")
+    assert revised == [2]
+    assert "REWRITTEN" in rewritten
+    assert "Exports grew sharply" in rewritten and "Analysts expect" in rewritten
+    assert "40% of vendors" not in rewritten
+
+
+def test_news_citation_issues_carry_section_labels():
+    from news.citation_checker import check_citations
+
+    report = check_citations(ARTICLE, "[S1] a\n[S2] b", target_word_count=0)
+    assert [issue.section for issue in report.issues] == [2]
+    assert "Section 2:" in report.to_compliance_report()
+    assert find_flagged_sections(split_sections(ARTICLE), report.to_compliance_report()) == {2}
+
+
+def test_news_revision_rewrites_only_the_flagged_section(fake_llm):
+    from news.news_workflow_model import NewsArticleState, revision_step
+
+    fake_llm.responder = lambda kwargs: "## Background\n\nThe policy changed last year [S1]."
+    state = NewsArticleState(
+        article_draft=ARTICLE,
+        research_notes="[S1] a\n[S2] b",
+        compliance_report="Verdict: REVISION_NEEDED\nObservations:\n- Section 2: add a citation",
+        word_count=0,
+    )
+    result = revision_step(state)
+    assert len(fake_llm.calls) == 1
+    assert "Exports grew sharply this quarter [S1]." in result["article_draft"]
+    assert "The policy changed last year [S1]." in result["article_draft"]
@@ -0,0 +1,77 @@
+# test_startup_time.py
+"""
+Import-time benchmark for the FastAPI app.
+
+Agents, LLM clients and heavy SDKs are loaded on first use (see
+api/agent_manager.py), so importing ``main`` should stay fast and must not
+pull them in. Run with ``python -m pytest test_startup_time.py`` or
+``python test_startup_time.py`` from backend/.
+
+STARTUP_IMPORT_BUDGET_SECONDS overrides the time budget on slow machines.
+"""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent
+IMPORT_BUDGET_SECONDS = float(os.getenv("STARTUP_IMPORT_BUDGET_SECONDS", 1.0))
+RUNS = 3
+
+# Modules that only the workflows need; importing the app must not load them.
+DEFERRED_MODULES = [
+    "langgraph",
+    "langchain_core",
+    "groq",
+    "langchain_tavily",
+    "langchain_community",
+    "yt_dlp",
+]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({
+    "seconds": elapsed,
+    "loaded": [m for m in %r if m in sys.modules],
+}))
+""" % (DEFERRED_MODULES,)
+
+
+def measure_import() -> dict:
+    """Import ``main`` in a fresh interpreter and report time and loaded modules."""
+    env = {**os.environ, "GROQ_API_KEY": os.getenv("GROQ_API_KEY", "test"),
+           "TAVILY_API_KEY": os.getenv("TAVILY_API_KEY", "test")}
+    env.pop("AGENT_WARMUP", None)
+    output = subprocess.run(
+        [sys.executable, "-c", _PROBE],
+        cwd=BACKEND_DIR,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_import_main_within_budget():
+    # Best of a few runs so a cold disk cache does not fail the check.
+    best = min(measure_import()["seconds"] for _ in range(RUNS))
+    assert best < IMPORT_BUDGET_SECONDS, (
+        f"import main took {best:.2f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)"
+    )
+
+
+def test_import_main_defers_heavy_modules():
+    loaded = measure_import()["loaded"]
+    assert not loaded, f"imported at startup: {', '.join(loaded)}"
+
+
+if __name__ == "__main__":
+    result = measure_import()
+    print(f"import main: {result['seconds']:.2f}s (budget {IMPORT_BUDGET_SECONDS:.2f}s)")
+    print("Deferred modules loaded at startup:", result["loaded"] or "none")
@@ -0,0 +1,106 @@
+"""JSON repair, schema validation and retries (llm/structured.py)."""
+
+import json
+from typing import List
+
+import pytest
+from pydantic import BaseModel
+
+from llm import FakeChatClient
+from llm.structured import (
+    StructuredOutputError,
+    StructuredOutputMetrics,
+    complete_json,
+    parse_structured,
+    repair_json,
+    structured_output_metrics,
+)
+
+
+class Ideas(BaseModel):
+    ideas: List[str]
+
+
+def test_repair_strips_fences_and_prose():
+    assert repair_json('Sure! ```json\n{"ideas": ["a"]}\n``` Hope it helps.') == {"ideas": ["a"]}
+    assert repair_json('Here you go: {"ideas": ["a", "b",]} thanks') == {"ideas": ["a", "b"]}
+
+
+def test_repair_closes_truncated_json():
+    assert repair_json('{"ideas": ["a", "b"') == {"ideas": ["a", "b"]}
+    assert repair_json('{"ideas": ["a", "unfinished str') == {"ideas": ["a", "unfinished str"]}
+    assert repair_json('[{"x": 1}, {"x": 2}, {"x"') == [{"x": 1}, {"x": 2}]
+
+
+def test_repair_ignores_brackets_inside_strings():
+    assert repair_json('{"text": "use } and ] freely", "n": 1} trailing') == {
+        "text": "use } and ] freely",
+        "n": 1,
+    }
+
+
+def test_repair_gives_up_without_json():
+    with pytest.raises(json.JSONDecodeError):
+        repair_json("no structured content here")
+
+
+def test_parse_structured_reports_repairs():
+    assert parse_structured('{"ideas": ["a"]}', Ideas) == (Ideas(ideas=["a"]), False)
+    assert parse_structured('```json\n{"ideas": ["a"]}```', Ideas) == (Ideas(ideas=["a"]), True)
+
+
+def test_complete_json_retries_with_the_validation_error():
+    replies = iter(['{"ideas": "not a list"}', '{"ideas": ["fixed"]}'])
+    client = FakeChatClient(lambda kwargs: next(replies))
+    result = complete_json(
+        client, model="m", messages=[{"role": "user", "content": "ideas"}], schema=Ideas
+    )
+    assert result == Ideas(ideas=["fixed"])
+    assert len(client.calls) == 2
+    assert client.calls[0]["response_format"] == {"type": "json_object"}
+    feedback = client.calls[1]["messages"][-1]["content"]
+    assert "not valid for the requested schema" in feedback
+
+
+def test_complete_json_raises_after_retries():
+    client = FakeChatClient(lambda kwargs: "I cannot help with that.")
+    with pytest.raises(StructuredOutputError) as info:
+        complete_json(
+            client, model="m", messages=[{"role": "user", "content": "x"}], schema=Ideas, retries=2
+        )
+    assert len(client.calls) == 3
+    assert info.value.raw == "I cannot help with that."
+
+
+def test_complete_json_uses_groq_failed_generation():
+    class JsonModeError(Exception):
+        status_code = 400
+        body = {"error": {"failed_generation": '{"ideas": ["recovered"]'}}
+
+    def reject(kwargs):
+        raise JsonModeError()
+
+    result = complete_json(
+        FakeChatClient(reject), model="m", messages=[{"role": "user", "content": "x"}], schema=Ideas
+    )
+    assert result == Ideas(ideas=["recovered"])
+
+
+def test_metrics_rates():
+    metrics = StructuredOutputMetrics()
+    for outcome in ("requests", "parsed", "requests", "retried", "repaired", "requests", "retried", "failed"):
+        metrics.record("Ideas", outcome)
+    stats = metrics.snapshot()["Ideas"]
+    assert stats["parse_failure_rate"] == round(4 / 5, 4)
+    assert stats["unrecovered_rate"] == round(1 / 3, 4)
+
+
+def test_complete_json_records_outcomes():
+    before = structured_output_metrics.snapshot().get("Ideas", {}).get("repaired", 0)
+    complete_json(
+        FakeChatClient(lambda kwargs: 'Result: {"ideas": ["a"]}'),
+        model="m",
+        messages=[{"role": "user", "content": "x"}],
+        schema=Ideas,
+    )
+    assert structured_output_metrics.snapshot()["Ideas"]["repaired"] == before + 1
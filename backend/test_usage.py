@@ -0,0 +1,96 @@
+"""Token usage attribution, the per-request ledger and tenant labels (llm/usage.py)."""
+
+import asyncio
+import json
+
+from llm.usage import (
+    DEFAULT_TENANT,
+    OTHER_TENANT,
+    TenantPolicy,
+    UsageLedger,
+    UsageMiddleware,
+    _ledger,
+    current_ledger,
+    usage_metrics,
+    usage_scope,
+)
+
+MESSAGES = [{"role": "user", "content": "x" * 400}]
+
+
+def test_tenant_ids_are_validated():
+    policy = TenantPolicy(allowed=[])
+    assert policy.resolve(None) == DEFAULT_TENANT
+    assert policy.resolve("acme-corp_1.eu") == "acme-corp_1.eu"
+    assert policy.resolve("acme corp") == OTHER_TENANT
+    assert policy.resolve("x" * 65) == OTHER_TENANT
+    assert policy.resolve('evil"} 1\n') == OTHER_TENANT
+
+
+def test_allow_list_buckets_unknown_tenants():
+    policy = TenantPolicy(allowed=["acme"])
+    assert policy.resolve("acme") == "acme"
+    assert policy.resolve("globex") == OTHER_TENANT
+
+
+def test_distinct_tenants_are_capped():
+    policy = TenantPolicy(allowed=[], max_tenants=2)
+    assert [policy.resolve(t) for t in ("a", "b", "c", "a")] == ["a", "b", OTHER_TENANT, "a"]
+
+
+def test_allow_list_from_env(monkeypatch):
+    monkeypatch.setenv("USAGE_TENANTS", "acme, globex")
+    assert TenantPolicy().allowed == {"acme", "globex"}
+
+
+def test_calls_are_attributed(fake_llm):
+    from llm import get_client
+
+    ledger = UsageLedger("acme")
+    token = _ledger.set(ledger)
+    try:
+        with usage_scope(workflow="blog", step="draft"):
+            get_client().chat.completions.create(model="m", messages=MESSAGES)
+    finally:
+        _ledger.reset(token)
+    summary = ledger.summary()
+    assert summary["tenant"] == "acme"
+    assert summary["calls"] == 1 and summary["prompt_tokens"] == 100
+    assert list(summary["by_node"]) == ["draft"]
+    assert usage_metrics.snapshot()["tenant"]["acme"]["calls"] >= 1
+
+
+def _request(headers, body=b'{"status": "ok"}', content_type=b"application/json"):
+    seen = {}
+    sent = []
+
+    async def app(scope, receive, send):
+        seen["tenant"] = current_ledger().tenant
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", content_type)]})
+        await send({"type": "http.response.body", "body": body})
+
+    async def receive():
+        return {"type": "http.request", "body": b""}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {"type": "http", "path": "/x", "headers": list(headers)}
+    asyncio.run(UsageMiddleware(app, TenantPolicy(allowed=["acme"]))(scope, receive, send))
+    return seen["tenant"], sent
+
+
+def test_middleware_resolves_the_tenant_header():
+    assert _request([(b"x-tenant-id", b"acme")])[0] == "acme"
+    assert _request([(b"x-tenant-id", b"unknown")])[0] == OTHER_TENANT
+    assert _request([])[0] == DEFAULT_TENANT
+
+
+def test_usage_is_added_to_json_responses_on_request():
+    _, sent = _request([(b"x-include-usage", b"true")])
+    body = json.loads(sent[-1]["body"])
+    assert body["status"] == "ok" and body["usage"]["calls"] == 0
+    assert dict(sent[0]["headers"])[b"content-length"] == str(len(sent[-1]["body"])).encode()
+
+    _, sent = _request([(b"x-include-usage", b"true")], body=b"data: x\n\n", content_type=b"text/event-stream")
+    assert sent[-1]["body"] == b"data: x\n\n"
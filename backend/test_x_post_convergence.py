@@ -0,0 +1,173 @@
+"""Convergence detection and the X post optimisation loop (x_post/convergence.py, x_post/agent.py)."""
+
+import json
+
+import pytest
+
+from x_post.convergence import (
+    STOP_APPROVED,
+    STOP_CONVERGED,
+    STOP_DEADLINE,
+    STOP_PLATEAU,
+    ConvergenceTracker,
+    edit_similarity,
+    post_similarity,
+)
+
+POST = "Cut LLM latency in half with request hedging. Read the guide #AI"
+
+
+def test_similarity_measures():
+    assert edit_similarity("abc", "abc") == 1.0
+    assert edit_similarity("abcd", "abce") == pytest.approx(0.75)
+    assert post_similarity(POST, POST) == 1.0
+
+
+def test_near_identical_posts_converge():
+    tracker = ConvergenceTracker()
+    tracker.observe(POST, 3)
+    assert tracker.stop_reason() is None
+    tracker.observe(POST + "!", 3)
+    assert tracker.stop_reason() == STOP_CONVERGED
+
+
+def test_reordered_posts_are_not_converged():
+    reordered = "Read the guide #AI. Request hedging can cut LLM latency in half"
+    assert post_similarity(POST, reordered) < 0.7
+    tracker = ConvergenceTracker()
+    tracker.observe(POST, 3)
+    tracker.observe(reordered, 3)
+    assert tracker.stop_reason() is None
+
+
+def test_score_plateau():
+    tracker = ConvergenceTracker(similarity_threshold=1.01, plateau_rounds=2)
+    for post, score in (("a b c", 3), ("d e f", 4), ("g h i", 4), ("j k l", 3)):
+        tracker.observe(post, score)
+    assert tracker.stop_reason() == STOP_PLATEAU
+
+
+def test_deadline_stops_before_an_overrunning_round():
+    tracker = ConvergenceTracker(deadline_seconds=0.0)
+    tracker.observe("a b c", 3)
+    assert tracker.stop_reason() == STOP_DEADLINE
+
+
+# ---------------------------------------------------------------------------
+# Loop
+# ---------------------------------------------------------------------------
+def _responder(evaluation, post=POST):
+    def respond(kwargs):
+        system = kwargs["messages"][0]["content"]
+        if "grades X posts" in system:
+            return json.dumps(evaluation)
+        return post
+
+    return respond
+
+
+def _payload(**overrides):
+    from x_post.schemas import XPostInput
+
+    fields = {"topic": "LLM latency", "objective": "clicks", "audience": "engineers", "keywords": ["latency"]}
+    return XPostInput(**{**fields, **overrides})
+
+
+def _evaluator_calls(fake):
+    return [c for c in fake.calls if "grades X posts" in c["messages"][0]["content"]]
+
+
+def test_loop_stops_when_the_post_stops_changing(fake_llm):
+    from x_post.agent import XPostAgent
+
+    fake_llm.responder = _responder({"verdict": "REVISE", "score": 3, "observations": "ok", "action_items": []})
+    result = XPostAgent().invoke(_payload(max_iterations=5))
+    assert result["audit_trail"]["stop_reason"] == STOP_CONVERGED
+    assert result["audit_trail"]["total_iterations"] == 2
+
+
+def test_loop_stops_on_approval(fake_llm):
+    from x_post.agent import XPostAgent
+
+    fake_llm.responder = _responder({"verdict": "APPROVED", "score": 5, "observations": "great", "action_items": []})
+    result = XPostAgent().invoke(_payload(max_iterations=3))
+    assert result["audit_trail"]["stop_reason"] == STOP_APPROVED
+    assert result["final_post"] == POST
+
+
+def test_rule_failures_skip_the_llm_evaluator(fake_llm):
+    from x_post.agent import XPostAgent
+
+    fake_llm.responder = _responder({"verdict": "APPROVED", "score": 5, "observations": "", "action_items": []})
+    result = XPostAgent().invoke(_payload(keywords=["throughput"], max_iterations=1))
+    assert _evaluator_calls(fake_llm) == []
+    assert result["iterations"][0]["evaluator_source"] == "rules"
+
+
+# ---------------------------------------------------------------------------
+# Tournament
+# ---------------------------------------------------------------------------
+def _tournament_responder(scores):
+    """Drafts name their sampling temperature; the judge scores each draft from ``scores``."""
+
+    def respond(kwargs):
+        # A repair retry appends messages after the system and user prompts.
+        system, user = kwargs["messages"][0]["content"], kwargs["messages"][1]["content"]
+        if "grades X posts" in system:
+            draft = user.split("Draft to evaluate:", 1)[1].strip()
+            score = scores.get(draft)
+            if score is None:
+                return "no verdict today"
+            verdict = "APPROVED" if score >= 4 else "REVISE"
+            return json.dumps({"verdict": verdict, "score": score, "observations": draft, "action_items": []})
+        if "copy editor" in system:
+            return "Optimized post on latency"
+        return f"Draft at {kwargs['temperature']} on latency"
+
+    return respond
+
+
+def _generator_calls(fake):
+    return [c for c in fake.calls if "growth marketer" in c["messages"][0]["content"]]
+
+
+def test_tournament_keeps_the_judges_pick(fake_llm):
+    from x_post.agent import XPostAgent
+
+    scores = {"Draft at 0.5 on latency": 2, "Draft at 0.75 on latency": 5, "Draft at 1.0 on latency": 3}
+    fake_llm.responder = _tournament_responder(scores)
+    result = XPostAgent().invoke(_payload(mode="tournament", candidates=3, max_iterations=2))
+
+    candidates = result["iterations"][0]["candidates"]
+    assert [c["score"] for c in candidates] == [2, 5, 3]
+    assert [c.get("winner", False) for c in candidates] == [False, True, False]
+    assert result["final_post"] == "Draft at 0.75 on latency"
+    assert result["audit_trail"]["stop_reason"] == STOP_APPROVED
+    # The approved winner is kept as is: no optimizer call.
+    assert len(fake_llm.calls) == 6
+
+
+def test_degraded_tournament_falls_back_to_a_single_draft(fake_llm, monkeypatch):
+    from llm import degradation_policy
+    from x_post.agent import XPostAgent
+
+    monkeypatch.setattr(degradation_policy, "mode", "on")
+    fake_llm.responder = _tournament_responder({"Optimized post on latency": 5, "Draft at 0.8 on latency": 3})
+    result = XPostAgent().invoke(_payload(mode="tournament", candidates=4, max_iterations=1))
+    assert result["degraded"]
+    assert len(_generator_calls(fake_llm)) == 1
+    assert result["iterations"][0]["candidates"] == []
+
+
+def test_tournament_survives_a_failed_judge(fake_llm):
+    from x_post.agent import XPostAgent
+
+    fake_llm.responder = _tournament_responder({})
+    result = XPostAgent().invoke(_payload(mode="tournament", candidates=2, max_iterations=1))
+
+    record = result["iterations"][0]
+    assert record["evaluator_source"] == "unparsed"
+    assert [c["score"] for c in record["candidates"]] == [3, 3]
+    assert record["candidates"][0]["winner"]  # ties go to the first draft
+    assert record["generator_output"] == "Draft at 0.5 on latency"
+    assert record["optimized_post"] == "Optimized post on latency"
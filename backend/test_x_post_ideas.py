@@ -0,0 +1,95 @@
+"""Trending idea cache and the /x-post/ideas endpoint (x_post/idea_cache.py, x_post/router.py)."""
+
+import threading
+import time
+from contextlib import contextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from x_post.idea_cache import TrendingIdeaCache, trending_idea_cache
+from x_post.router import router
+
+IDEAS = [{"headline": "Hedge your LLM calls"}]
+
+
+def test_concurrent_misses_share_one_fetch():
+    calls = []
+
+    def fetch(keywords, count):
+        calls.append(keywords)
+        time.sleep(0.05)
+        return IDEAS
+
+    cache = TrendingIdeaCache(fetch, ttl_seconds=60, prewarm_interval=0)
+    threads = [threading.Thread(target=cache.get, args=(["ai", "LLM"], 4)) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    # Keyword order and case do not matter.
+    assert cache.peek(["llm", "AI"], 4) == IDEAS
+
+
+def test_empty_results_are_not_cached():
+    cache = TrendingIdeaCache(lambda keywords, count: [], ttl_seconds=60, prewarm_interval=0)
+    assert cache.get(["ai"], 4) == []
+    assert cache.peek(["ai"], 4) is None
+
+
+def test_prewarm_covers_default_and_popular_sets():
+    cache = TrendingIdeaCache(lambda keywords, count: IDEAS, ttl_seconds=60, prewarm_interval=0, prewarm_top=1)
+    for _ in range(3):
+        cache.get(["rust"], 4)
+    cache.get(["go"], 4)
+    assert cache.prewarm_keys() == [((), 4), (("rust",), 4)]
+
+
+def test_request_counts_stay_bounded():
+    cache = TrendingIdeaCache(
+        lambda keywords, count: IDEAS, ttl_seconds=60, prewarm_interval=0, prewarm_top=1, max_tracked=10
+    )
+    for _ in range(4):
+        cache.get(["rust"], 4)
+    for n in range(50):
+        cache.get([f"spam-{n}"], 4)
+    assert len(cache._requests) <= 10
+    assert len(cache._keywords) <= 10
+    assert cache.prewarm_keys()[1] == (("rust",), 4)
+
+    cache.prewarm()  # 4 -> 2, the single requests are forgotten
+    assert dict(cache._requests) == {(("rust",), 4): 2}
+    cache.decay()
+    cache.decay()
+    assert not cache._requests and not cache._keywords
+    assert cache.prewarm_keys() == [((), 4)]
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+def test_cached_ideas_are_served_without_an_agent_slot(client, monkeypatch):
+    from api.agent_manager import agent_manager
+
+    monkeypatch.setattr(trending_idea_cache, "fetch", lambda keywords, count: IDEAS)
+    trending_idea_cache.get(["latency"], 3)
+
+    leases = []
+
+    @contextmanager
+    def lease(name):
+        leases.append(name)
+        yield type("Agent", (), {"generate_trending_ideas": lambda self, p: {"ideas": []}})()
+
+    monkeypatch.setattr(agent_manager, "lease", lease)
+    assert client.post("/x-post/ideas", json={"keywords": ["latency"], "count": 3}).json() == {"ideas": IDEAS}
+    assert leases == []
+
+    client.post("/x-post/ideas", json={"keywords": ["uncached"], "count": 3})
+    assert leases == ["x-post"]
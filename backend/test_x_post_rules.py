@@ -0,0 +1,35 @@
+"""Local rule checks for X post drafts (x_post/rules.py)."""
+
+from x_post.rules import check_post, count_emojis
+
+POST = "Cut LLM latency in half with request hedging. Read the guide #AI"
+
+
+def test_compliant_post_passes_untouched():
+    check = check_post(POST, word_limit=280, keywords=["latency", "#AI"], call_to_action="Read the guide")
+    assert check.passed and check.post == POST and not check.repairs
+
+
+def test_mechanical_problems_are_repaired():
+    draft = '"' + POST.replace(" #AI", "") + ' 🚀🔥✨"'
+    check = check_post(draft, word_limit=280, keywords=["#AI", "#LLM"])
+    assert check.passed
+    assert check.post.endswith("#AI #LLM")
+    assert count_emojis(check.post) == 1
+    assert "appended hashtags #AI, #LLM" in check.repairs
+
+
+def test_long_posts_are_trimmed_at_a_sentence_boundary():
+    draft = "First sentence is short. " + "word " * 80
+    check = check_post(draft, word_limit=120, keywords=[])
+    assert check.passed
+    assert len(check.post) <= 120
+    assert check.post.startswith("First sentence is short.")
+
+
+def test_missing_keyword_and_cta_are_violations():
+    check = check_post(POST, word_limit=280, keywords=["throughput"], call_to_action="Book a demo")
+    assert not check.passed
+    assert len(check.violations) == 2
+    evaluation = check.as_evaluation()
+    assert evaluation["verdict"] == "REVISE" and evaluation["source"] == "rules"
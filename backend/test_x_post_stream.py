@@ -0,0 +1,106 @@
+"""Streamed X post runs and their cancel endpoint (x_post/router.py, common/streaming.py)."""
+
+import json
+from contextlib import contextmanager
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from common.streaming import cancel_registry
+from x_post.router import router
+
+POST = "Cut LLM latency in half with request hedging. Read the guide #AI"
+APPROVED = {"verdict": "APPROVED", "score": 5, "observations": "great", "action_items": []}
+PAYLOAD = {"topic": "LLM latency", "objective": "clicks", "audience": "engineers", "keywords": ["latency"]}
+
+
+@pytest.fixture
+def client(monkeypatch, fake_llm):
+    from api.agent_manager import agent_manager
+    from x_post.agent import XPostAgent
+
+    agent = XPostAgent()
+
+    @contextmanager
+    def lease(name):
+        yield agent
+
+    monkeypatch.setattr(agent_manager, "get", lambda name: agent)
+    monkeypatch.setattr(agent_manager, "lease", lease)
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+
+@pytest.fixture
+def run_ids(monkeypatch):
+    """Ids of the runs opened during the test."""
+    opened = []
+    open_run = cancel_registry.open
+
+    def record():
+        run_id, cancel = open_run()
+        opened.append(run_id)
+        return run_id, cancel
+
+    monkeypatch.setattr(cancel_registry, "open", record)
+    return opened
+
+
+def _events(body: str):
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def _responder(kwargs):
+    if "grades X posts" in kwargs["messages"][0]["content"]:
+        return json.dumps(APPROVED)
+    return POST
+
+
+def test_stream_reports_each_stage_then_the_result(client, fake_llm, run_ids):
+    fake_llm.responder = _responder
+    response = client.post("/x-post/generate/stream", json={**PAYLOAD, "max_iterations": 3})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["started", "generator", "evaluator", "optimizer", "result"]
+    assert events[0][1] == {"runId": run_ids[0]}
+    assert events[1][1] == {"iteration": 1, "draft": POST}
+    assert events[2][1]["verdict"] == "APPROVED"
+    result = events[-1][1]
+    assert result["final_post"] == POST
+    assert result["audit_trail"]["stop_reason"] == "approved"
+    # The run is closed once the stream ends.
+    assert client.post(f"/x-post/generate/stream/{run_ids[0]}/cancel").status_code == 404
+
+
+def test_cancel_endpoint_stops_the_run(client, fake_llm, run_ids):
+    cancel_responses = []
+
+    def responder(kwargs):
+        if "grades X posts" in kwargs["messages"][0]["content"]:
+            return json.dumps({**APPROVED, "verdict": "REVISE", "score": 2})
+        if not cancel_responses:
+            # The user presses cancel while the first draft is being written.
+            cancel_responses.append(client.post(f"/x-post/generate/stream/{run_ids[0]}/cancel"))
+        return POST
+
+    fake_llm.responder = responder
+    response = client.post("/x-post/generate/stream", json={**PAYLOAD, "max_iterations": 5})
+
+    assert cancel_responses[0].json() == {"status": "cancelling", "runId": run_ids[0]}
+    events = _events(response.text)
+    assert [name for name, _ in events] == ["started", "generator", "result"]
+    assert events[-1][1]["audit_trail"]["stop_reason"] == "cancelled"
+    assert len(fake_llm.calls) == 1  # nothing after the cancel reached upstream
+
+
+def test_unknown_run_cannot_be_cancelled(client):
+    assert client.post("/x-post/generate/stream/nope/cancel").status_code == 404
@@ -0,0 +1,102 @@
+"""Longform YouTube script planning and revision (youtube/youtube_script_model.py)."""
+
+import re
+
+import pytest
+
+from youtube.youtube_script_model import (
+    FALLBACK_BEAT_MINUTES,
+    MIN_SCRIPT_TOKENS,
+    TOKENS_PER_WORD,
+    WORDS_PER_MINUTE,
+    YoutubeScript,
+    generate_script,
+    outline_script,
+    revision_step,
+    script_token_budget,
+)
+
+OUTLINE = {
+    "title": "How chips are made",
+    "hook": "A wafer worth a house",
+    "intro": "What we will cover",
+    "body": [
+        {"title": "Sand to silicon", "points": "purification", "minutes": 4},
+        {"title": "Lithography", "points": "EUV", "minutes": 4},
+        {"title": "Packaging", "points": "chiplets", "minutes": 4},
+    ],
+    "outro": "Subscribe",
+}
+MARKERS = [
+    "[HOOK]",
+    "[INTRO]",
+    "[SCENE CHANGE] BODY 1: Sand to silicon",
+    "[SCENE CHANGE] BODY 2: Lithography",
+    "[SCENE CHANGE] BODY 3: Packaging",
+    "[OUTRO / CTA]",
+]
+
+
+def _section_writer(kwargs):
+    prompt = kwargs["messages"][-1]["content"]
+    marker = re.search(r'Write ONLY the section "(.+?)"', prompt).group(1)
+    return f"{marker}\n" + " ".join(["line"] * 300)
+
+
+def _section_reviser(kwargs):
+    prompt = kwargs["messages"][-1]["content"]
+    section = prompt.split("(revise this):\n", 1)[1]
+    return section.splitlines()[0] + "\nREVISED"
+
+
+def test_longform_sections_are_written_in_order(fake_llm):
+    fake_llm.responder = _section_writer
+    draft = generate_script(YoutubeScript(videoType="longform", script_outline=OUTLINE))["script_draft"]
+    positions = [draft.index(marker) for marker in MARKERS]
+    assert positions == sorted(positions)
+    assert len(fake_llm.calls) == len(MARKERS)
+
+
+def test_unflagged_longform_revision_keeps_every_section(fake_llm):
+    fake_llm.responder = _section_writer
+    state = YoutubeScript(videoType="longform", script_outline=OUTLINE)
+    draft = generate_script(state)["script_draft"]
+    fake_llm.calls.clear()
+
+    fake_llm.responder = _section_reviser
+    result = revision_step(
+        state.model_copy(update={
+            "script_draft": draft,
+            "compliance_report": "Verdict: REVISION_NEEDED\n- Tighten the pacing overall.",
+        })
+    )
+    revised = result["script_draft"]
+    assert all(marker in revised for marker in MARKERS)
+    assert revised.count("REVISED") == len(MARKERS)
+    # One bounded call per section, never a single whole-script rewrite.
+    assert len(fake_llm.calls) == len(MARKERS)
+    assert all(call["max_completion_tokens"] <= 2048 for call in fake_llm.calls)
+
+
+def test_one_pass_script_budget_scales_with_duration(fake_llm):
+    assert script_token_budget(WORDS_PER_MINUTE) == MIN_SCRIPT_TOKENS
+    generate_script(YoutubeScript(videoType="shortform", prompt="a 5 minutes explainer"))
+    assert fake_llm.calls[-1]["max_completion_tokens"] == script_token_budget(5 * WORDS_PER_MINUTE)
+
+
+def test_empty_outline_falls_back_to_short_beats(fake_llm):
+    fake_llm.responder = lambda kwargs: '{"title": "Chips", "body": []}'
+    state = YoutubeScript(videoType="longform", prompt="How chips are made")
+    outline = outline_script(state)["script_outline"]
+    beats = outline["body"]
+    assert len(beats) > 1
+    assert all(beat["minutes"] <= FALLBACK_BEAT_MINUTES + 0.5 for beat in beats)
+    assert sum(beat["minutes"] for beat in beats) == pytest.approx(12)
+
+    fake_llm.calls.clear()
+    fake_llm.responder = _section_writer
+    generate_script(state.model_copy(update={"script_outline": outline}))
+    assert len(fake_llm.calls) == len(beats) + 3
+    for call in fake_llm.calls:
+        words = int(re.search(r"~(\d+) words", call["messages"][-1]["content"]).group(1))
+        assert call["max_completion_tokens"] >= words * TOKENS_PER_WORD
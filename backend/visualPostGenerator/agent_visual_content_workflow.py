@@ -1,12 +1,10 @@
-from typing import Dict, Any
-from pydantic import BaseModel
+from typing import Dict, Any, Optional
+
+from common.checkpoint import get_checkpointer, resolve_thread_id, run_checkpointed
+from common.deadline import DeadlineExceeded
 from .visual_content_workflow_model import build_visual_content_graph, VisualPostState
+from .schemas import VisualPostInput
 
-# Pydantic model to validate the input from the frontend
-class VisualPostInput(BaseModel):
-    image_base64: str
-    context: str
-    platform: str
 
 class VisualContentAgent:
     """
@@ -18,7 +16,7 @@ class VisualContentAgent:
         """
         Initializes the agent by building and compiling the LangGraph workflow.
         """
-        self.graph = build_visual_content_graph()
+        self.graph = build_visual_content_graph(checkpointer=get_checkpointer())
 
     def invoke(self, data: VisualPostInput) -> Dict[str, Any]:
         """
@@ -43,7 +41,8 @@ class VisualContentAgent:
 
             # 2. Run the graph
             # This will execute the full chain: BLIP -> Groq
-            final_state = self.graph.invoke(initial_state)
+            thread_id = resolve_thread_id({"threadId": data.threadId})
+            final_state = run_checkpointed(self.graph, initial_state, thread_id)
 
             # 3. Extract the final post
             generated_post = final_state.get("final_post")
@@ -53,6 +52,8 @@ class VisualContentAgent:
             # 4. Return the response in the format the frontend expects
             return {"generated_post": generated_post}
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"Error during visual content workflow: {e}")
             # Return an error key so the router can catch it
@@ -1,22 +1,15 @@
 from fastapi import APIRouter, HTTPException
-from .agent_visual_content_workflow import VisualContentAgent, VisualPostInput
+from api.agent_manager import AgentBusyError, AgentUnavailableError, agent_manager, retry_headers
+from common.deadline import DeadlineExceeded
+from .schemas import VisualPostInput
 
 # -------------------------------
-# Initialize Router & Agent
+# Initialize Router
 # -------------------------------
 router = APIRouter(tags=["Visual Content Generator"])
 
-# Initialize the agent
-# This is a crucial step: it loads the models into memory
-# *once* when the server starts.
-try:
-    # --- THIS IS THE FIX ---
-    visual_agent = VisualContentAgent()
-    # -----------------------
-except Exception as e:
-    print(f"CRITICAL ERROR: Failed to initialize VisualContentAgent: {e}")
-    print("This is likely due to a model failing to load. Check previous errors.")
-    visual_agent = None
+# The agent (and its models) is built once, on the first request, by the
+# agent manager; set AGENT_WARMUP to build it at startup instead.
 
 
 # -------------------------------
@@ -33,19 +26,14 @@ def generate_visual_post(input_data: VisualPostInput):
 
     Returns a single generated post.
     """
-    if visual_agent is None:
-        raise HTTPException(
-            status_code=500,
-            detail="Visual agent is not available. Check server logs for model loading errors.",
-        )
-
     try:
         # Debug log
         print(f"Received visual post request for platform: {input_data.platform}")
 
         # Use the synchronous 'invoke' method
         # FastAPI will handle this in a threadpool
-        result = visual_agent.invoke(input_data)
+        with agent_manager.lease("visual-post") as visual_agent:
+            result = visual_agent.invoke(input_data)
 
         # The agent's invoke method returns an "error" key on failure
         if "error" in result:
@@ -55,6 +43,19 @@ def generate_visual_post(input_data: VisualPostInput):
         # Success: return the generated post
         return {"status": "success", "generated_post": result.get("generated_post")}
 
+    except AgentBusyError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_headers(e))
+    except AgentUnavailableError as e:
+        print(f"CRITICAL ERROR: Failed to initialize VisualContentAgent: {e}")
+        raise HTTPException(
+            status_code=503,
+            detail="Visual agent is not available. Check server logs for model loading errors.",
+            headers=retry_headers(e),
+        )
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"Unhandled error in /generate-visual-post: {e}")
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,9 @@
+from typing import Optional
+from pydantic import BaseModel
+
+# Pydantic model to validate the input from the frontend
+class VisualPostInput(BaseModel):
+    image_base64: str
+    context: str
+    platform: str
+    threadId: Optional[str] = None  # reuse to resume a failed run
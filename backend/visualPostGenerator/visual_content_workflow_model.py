@@ -2,9 +2,11 @@ import requests  # <-- Added
 from typing import Dict, Any, List
 from langgraph.graph import StateGraph, START, END
 from pydantic import BaseModel
-from groq import Groq
 from dotenv import load_dotenv
-from langchain_community.tools.tavily_search import TavilySearchResults
+from functools import lru_cache
+
+from common.metrics import time_upstream
+from llm import LazyClient
 
 # Removed torch, PIL, and transformers imports
 
@@ -21,9 +23,13 @@ MODAL_VISION_ENDPOINT = (
 # -------------------------------
 # 2. INITIALIZE CLIENTS (Groq & Tavily)
 # -------------------------------
-client = Groq()
-# As requested, not touching Tavily
-search_tool = TavilySearchResults(max_results=3)
+client = LazyClient()
+# As requested, not touching Tavily (only deferring it until the first search)
+@lru_cache(maxsize=1)
+def get_search_tool():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    return TavilySearchResults(max_results=3)
 
 
 def generate_fast_response(prompt: str, max_tokens=1024, temperature=0.7) -> str:
@@ -94,10 +100,11 @@ def extract_image_caption(state: VisualPostState) -> Dict[str, Any]:
         }
 
         # Call your Modal endpoint
-        response = requests.post(MODAL_VISION_ENDPOINT, json=payload, timeout=30)
+        with time_upstream("caption", "modal"):
+            response = requests.post(MODAL_VISION_ENDPOINT, json=payload, timeout=30)
 
-        # Raise an error if the request failed
-        response.raise_for_status()
+            # Raise an error if the request failed
+            response.raise_for_status()
 
         result = response.json()
         caption = result.get("caption")
@@ -128,7 +135,8 @@ def research_platform_trends(state: VisualPostState) -> Dict[str, Any]:
         query = f"latest {state.platform} trends for {state.context}"
 
         # This code still uses the old Tavily package, as requested
-        results: List[Dict] = search_tool.invoke(query)
+        with time_upstream("tavily", "search"):
+            results: List[Dict] = get_search_tool().invoke(query)
 
         # This line will likely fail, but was not touched per your instruction
         formatted_trends = "\n".join(
@@ -183,7 +191,7 @@ def generate_platform_post(state: VisualPostState) -> Dict[str, Any]:
 # -------------------------------
 # 6. BUILD THE GRAPH
 # -------------------------------
-def build_visual_content_graph() -> StateGraph:
+def build_visual_content_graph(checkpointer=None) -> StateGraph:
     """Builds the parallel workflow."""
 
     graph = StateGraph(VisualPostState)
@@ -206,4 +214,4 @@ def build_visual_content_graph() -> StateGraph:
     # 4. The final node ends the graph
     graph.add_edge("generate_platform_post", END)
 
-    return graph.compile()
\ No newline at end of file
+    return graph.compile(checkpointer=checkpointer)
\ No newline at end of file
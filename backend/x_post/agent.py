@@ -1,158 +1,258 @@
 from __future__ import annotations
 
 import json
-from typing import Any, Dict, List, Optional
-
-from groq import Groq
-from pydantic import BaseModel, Field
-
-
-class HumanFeedback(BaseModel):
-    """Represents human feedback that can be injected into any iteration."""
-
-    author: str = Field(
-        default="strategist",
-        description="Name or role for attribution in the feedback thread.",
-    )
-    message: str = Field(..., description="Specific guidance for the optimizer.")
-    iteration: Optional[int] = Field(
-        default=None,
-        ge=1,
-        description="Target iteration. Leave empty to apply to every loop.",
-    )
-
-
-class XPostInput(BaseModel):
-    """Request body coming from the frontend."""
-
-    topic: str = Field(..., description="Main subject or hook for the post.")
-    objective: str = Field(
-        ...,
-        description="What success looks like for this post (e.g., clicks, hype).",
-    )
-    audience: str = Field(..., description="Intended audience details.")
-    tone: str = Field(default="Bold", description="Stylistic direction.")
-    brand_voice: str = Field(
-        default="Witty, high-signal startup voice",
-        description="Optional brand voice references.",
-    )
-    call_to_action: Optional[str] = Field(
-        default=None, description="CTA to highlight inside the copy."
-    )
-    product_details: Optional[str] = Field(
-        default=None, description="Feature details or proof points."
-    )
-    keywords: List[str] = Field(
-        default_factory=list, description="Terms/hashtags that must appear."
-    )
-    word_limit: int = Field(
-        default=280,
-        ge=120,
-        le=400,
-        description="Character budget for an X post.",
-    )
-    max_iterations: int = Field(
-        default=2,
-        ge=1,
-        le=5,
-        description="Number of generator/evaluator/optimizer loops to run.",
-    )
-    human_feedback: List[HumanFeedback] = Field(
-        default_factory=list,
-        description="Optional operator instructions to blend into optimization.",
-    )
-
-
-class XPostIdeaRequest(BaseModel):
-    """Request schema for the trending idea generator."""
-
-    keywords: List[str] = Field(
-        default_factory=list,
-        description="Optional keywords or niches to bias the trending ideas.",
-    )
-    count: int = Field(
-        default=4,
-        ge=1,
-        le=6,
-        description="How many idea cards to generate.",
-    )
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Literal, Optional
+
+from pydantic import BaseModel, ConfigDict, Field, field_validator
+
+from common.deadline import current_deadline, in_request_context
+from llm import (
+    JUDGE_ROLE,
+    StructuredOutputError,
+    complete_json,
+    degraded_run,
+    get_client,
+    is_degraded,
+    route,
+    usage_scope,
+)
+
+from .convergence import (
+    STOP_APPROVED,
+    STOP_CANCELLED,
+    STOP_MAX_ITERATIONS,
+    ConvergenceTracker,
+)
+from .idea_cache import TrendingIdeaCache
+from .rules import RuleCheck, check_post
+from .schemas import HumanFeedback, XPostIdeaRequest, XPostInput
+
+EventCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class PostEvaluation(BaseModel):
+    """Evaluator output schema."""
+
+    verdict: Literal["APPROVED", "REVISE"]
+    score: int = Field(..., ge=1, le=5)
+    observations: str = ""
+    action_items: List[str] = Field(default_factory=list)
+
+    @field_validator("verdict", mode="before")
+    @classmethod
+    def _normalize_verdict(cls, value: Any) -> Any:
+        if isinstance(value, str):
+            return "APPROVED" if value.strip().upper().startswith("APPROVE") else "REVISE"
+        return value
+
+    @field_validator("score", mode="before")
+    @classmethod
+    def _round_score(cls, value: Any) -> Any:
+        return round(value) if isinstance(value, float) else value
+
+
+class TrendingIdea(BaseModel):
+    model_config = ConfigDict(extra="allow")
+
+    id: str = ""
+    headline: str
+    topic: str = ""
+    summary: str = ""
+    suggested_objective: str = ""
+    suggested_audience: str = ""
+    tone: str = ""
+    call_to_action: str = ""
+    keywords: List[str] = Field(default_factory=list)
+    hashtags: List[str] = Field(default_factory=list)
+    sample_tweet: str
+
+
+class TrendingIdeaSet(BaseModel):
+    ideas: List[TrendingIdea] = Field(..., min_length=1)
 
 
 class XPostAgent:
     """Runs a small LangChain-free loop across three Groq-hosted models."""
 
-    def __init__(self) -> None:
-        self.client = Groq()
+    def __init__(self, idea_cache: Optional[TrendingIdeaCache] = None) -> None:
+        self.client = get_client()
         self.generator_model = "llama-3.3-70b-versatile"
-        self.evaluator_model = "llama-3.1-8b-instant"
+        self.evaluator_model = JUDGE_ROLE  # the 8B model unless a backend maps it
         self.optimizer_model = "llama-3.3-70b-versatile"
         self.approval_threshold = 4
+        self.idea_cache = idea_cache or TrendingIdeaCache(self.request_trending_ideas)
+
+    def invoke(
+        self,
+        payload: XPostInput,
+        on_progress: Optional[Callable[[str], None]] = None,
+        on_event: Optional[EventCallback] = None,
+        cancel: Optional[threading.Event] = None,
+    ) -> Dict[str, Any]:
+        """Entry-point used by the FastAPI router, the SSE stream and the job queue.
+
+        ``on_event`` receives a ``generator``/``evaluator``/``optimizer`` event
+        as each stage finishes. Setting ``cancel`` stops the loop before its
+        next upstream call.
+
+        In degraded mode (slow upstream) tournaments run a single draft and
+        the optimizer moves to the fast model; the result is flagged ``degraded``.
+        """
+        with degraded_run() as degraded:
+            result = self._run_loop(payload, on_progress, on_event, cancel)
+        result["degraded"] = degraded
+        return result
+
+    def _run_loop(
+        self,
+        payload: XPostInput,
+        on_progress: Optional[Callable[[str], None]],
+        on_event: Optional[EventCallback],
+        cancel: Optional[threading.Event],
+    ) -> Dict[str, Any]:
+        report = on_progress or (lambda step: None)
+        emit = on_event or (lambda event, data: None)
+        # The request deadline bounds the loop too; a client disconnect cancels it.
+        deadline = current_deadline()
+        deadline_seconds = payload.deadline_seconds
+        if deadline is not None:
+            deadline_seconds = min(deadline_seconds or deadline.remaining(), deadline.remaining())
+
+        def cancelled() -> bool:
+            return (cancel is not None and cancel.is_set()) or (
+                deadline is not None and deadline.cancelled
+            )
 
-    def invoke(self, payload: XPostInput) -> Dict[str, Any]:
-        """Entry-point used by the FastAPI router."""
         iterations: List[Dict[str, Any]] = []
         feedback_threads: List[Dict[str, Any]] = []
 
         current_post: Optional[str] = None
+        tracker = ConvergenceTracker(deadline_seconds=deadline_seconds)
+        stop_reason = STOP_MAX_ITERATIONS
 
         for iteration in range(1, payload.max_iterations + 1):
-            generated = self._generate_post(
-                payload, previous_post=current_post, round_number=iteration
-            )
+            if cancelled():
+                stop_reason = STOP_CANCELLED
+                break
 
-            evaluation = self._evaluate_post(payload, generated, iteration)
+            candidates: List[Dict[str, Any]] = []
+            if payload.mode == "tournament" and not is_degraded():
+                generated, evaluation, rule_check, candidates = self._run_tournament(
+                    payload, previous_post=current_post, round_number=iteration
+                )
+                report(f"iteration_{iteration}:generator")
+            else:
+                generated = self._generate_post(
+                    payload, previous_post=current_post, round_number=iteration
+                )
+                report(f"iteration_{iteration}:generator")
+                emit("generator", {"iteration": iteration, "draft": generated})
+                if cancelled():
+                    stop_reason = STOP_CANCELLED
+                    break
+                generated, evaluation, rule_check = self._score_post(
+                    payload, generated, iteration
+                )
+
+            if candidates:
+                emit(
+                    "generator",
+                    {"iteration": iteration, "draft": generated, "candidates": candidates},
+                )
+            report(f"iteration_{iteration}:evaluator")
+            emit(
+                "evaluator",
+                {
+                    "iteration": iteration,
+                    "score": evaluation["score"],
+                    "verdict": evaluation["verdict"],
+                    "observations": evaluation["observations"],
+                    "action_items": evaluation.get("action_items", []),
+                    "source": evaluation.get("source", "llm"),
+                    "rule_repairs": rule_check.repairs,
+                },
+            )
             human_feedback = self._collect_human_feedback(
                 payload.human_feedback, iteration
             )
 
-            optimized = self._optimize_post(
-                payload=payload,
-                latest_draft=generated,
-                evaluation=evaluation,
-                human_feedback=human_feedback,
-                previous_best=current_post,
-            )
+            if candidates and self._should_stop(evaluation) and not human_feedback:
+                # The tournament winner is already approved; skip the optimizer call.
+                optimized = generated
+            elif cancelled():
+                stop_reason = STOP_CANCELLED
+                break
+            else:
+                optimized = self._optimize_post(
+                    payload=payload,
+                    latest_draft=generated,
+                    evaluation=evaluation,
+                    human_feedback=human_feedback,
+                    previous_best=current_post,
+                )
 
             if not optimized:
                 optimized = generated
+            else:
+                optimized = self._check_rules(payload, optimized).post
+            report(f"iteration_{iteration}:optimizer")
+            similarity = tracker.observe(optimized, evaluation["score"])
+
+            record = {
+                "iteration": iteration,
+                "generator_output": generated,
+                "evaluator_score": evaluation["score"],
+                "evaluator_verdict": evaluation["verdict"],
+                "evaluator_notes": evaluation["observations"],
+                "evaluator_action_items": evaluation.get("action_items", []),
+                "evaluator_source": evaluation.get("source", "llm"),
+                "rule_repairs": rule_check.repairs,
+                "human_feedback": human_feedback,
+                "optimized_post": optimized,
+                "candidates": candidates,
+                "similarity_to_previous": (
+                    round(similarity, 3) if similarity is not None else None
+                ),
+            }
+            iterations.append(record)
 
-            iterations.append(
-                {
-                    "iteration": iteration,
-                    "generator_output": generated,
-                    "evaluator_score": evaluation["score"],
-                    "evaluator_verdict": evaluation["verdict"],
-                    "evaluator_notes": evaluation["observations"],
-                    "evaluator_action_items": evaluation.get("action_items", []),
-                    "human_feedback": human_feedback,
-                    "optimized_post": optimized,
-                }
-            )
-
-            feedback_threads.append(
+            new_feedback = [
                 {
                     "source": "evaluator",
                     "iteration": iteration,
                     "message": evaluation["observations"],
                     "score": evaluation["score"],
                 }
-            )
+            ]
             for fb in human_feedback:
-                feedback_threads.append(
+                new_feedback.append(
                     {
                         "source": f"human:{fb.get('author', 'strategist')}",
                         "iteration": iteration,
                         "message": fb["message"],
                     }
                 )
+            feedback_threads.extend(new_feedback)
+            emit(
+                "optimizer",
+                {"iteration": iteration, "record": record, "feedback_threads": new_feedback},
+            )
 
             current_post = optimized
 
             if self._should_stop(evaluation):
+                stop_reason = STOP_APPROVED
                 break
+            if iteration < payload.max_iterations:
+                reason = tracker.stop_reason()
+                if reason:
+                    stop_reason = reason
+                    break
 
         return {
-            "status": "success",
+            "status": "cancelled" if stop_reason == STOP_CANCELLED else "success",
             "final_post": current_post,
             "iterations": iterations,
             "feedback_threads": feedback_threads,
@@ -167,6 +267,9 @@ class XPostAgent:
                 },
                 "total_iterations": len(iterations),
                 "word_limit": payload.word_limit,
+                "mode": payload.mode,
+                "stop_reason": stop_reason,
+                "elapsed_seconds": round(tracker.elapsed(), 2),
             },
         }
 
@@ -178,12 +281,69 @@ class XPostAgent:
         score = evaluation.get("score", 0)
         return score >= self.approval_threshold and verdict.startswith("approve")
 
+    def _run_tournament(
+        self,
+        payload: XPostInput,
+        *,
+        previous_post: Optional[str],
+        round_number: int,
+    ) -> tuple[str, Dict[str, Any], RuleCheck, List[Dict[str, Any]]]:
+        """Generate N drafts concurrently, score them concurrently, return the winner."""
+        temperatures = self._candidate_temperatures(payload.candidates)
+
+        with ThreadPoolExecutor(max_workers=payload.candidates) as pool:
+            drafts = list(
+                pool.map(
+                    in_request_context(
+                        lambda temperature: self._generate_post(
+                            payload,
+                            previous_post=previous_post,
+                            round_number=round_number,
+                            temperature=temperature,
+                        )
+                    ),
+                    temperatures,
+                )
+            )
+            scored = list(
+                pool.map(
+                    in_request_context(lambda draft: self._score_post(payload, draft, round_number)),
+                    drafts,
+                )
+            )
+        drafts = [draft for draft, _, _ in scored]
+        evaluations = [evaluation for _, evaluation, _ in scored]
+
+        candidates = [
+            {
+                "post": draft,
+                "temperature": temperature,
+                "score": evaluation["score"],
+                "verdict": evaluation["verdict"],
+            }
+            for draft, temperature, evaluation in zip(drafts, temperatures, evaluations)
+        ]
+        winner = max(
+            range(len(drafts)),
+            key=lambda idx: (self._should_stop(evaluations[idx]), evaluations[idx]["score"]),
+        )
+        candidates[winner]["winner"] = True
+        return drafts[winner], evaluations[winner], scored[winner][2], candidates
+
+    @staticmethod
+    def _candidate_temperatures(count: int) -> List[float]:
+        """Spread sampling temperatures so tournament drafts actually differ."""
+        low, high = 0.5, 1.0
+        step = (high - low) / (count - 1)
+        return [round(low + step * idx, 2) for idx in range(count)]
+
     def _generate_post(
         self,
         payload: XPostInput,
         *,
         previous_post: Optional[str],
         round_number: int,
+        temperature: Optional[float] = None,
     ) -> str:
         system_prompt = (
             "You are a growth marketer who writes concise, viral-ready posts for X."
@@ -214,14 +374,34 @@ and ensure the copy is <= {payload.word_limit} characters.
                 f"{previous_post}\n"
             )
 
-        return self._chat_completion(
-            model=self.generator_model,
-            system=system_prompt,
-            user=base_prompt,
-            temperature=0.8 if round_number == 1 else 0.6,
-            max_tokens=600,
+        with usage_scope(step="generator"):
+            return self._chat_completion(
+                model=self.generator_model,
+                system=system_prompt,
+                user=base_prompt,
+                temperature=temperature
+                if temperature is not None
+                else (0.8 if round_number == 1 else 0.6),
+                max_tokens=600,
+            )
+
+    def _check_rules(self, payload: XPostInput, draft: str) -> RuleCheck:
+        return check_post(
+            draft,
+            word_limit=payload.word_limit,
+            keywords=payload.keywords,
+            call_to_action=payload.call_to_action,
         )
 
+    def _score_post(
+        self, payload: XPostInput, draft: str, iteration: int
+    ) -> tuple[str, Dict[str, Any], RuleCheck]:
+        """Run the local rule check first; only compliant drafts reach the LLM evaluator."""
+        rule_check = self._check_rules(payload, draft)
+        if not rule_check.passed:
+            return rule_check.post, rule_check.as_evaluation(), rule_check
+        return rule_check.post, self._evaluate_post(payload, rule_check.post, iteration), rule_check
+
     def _evaluate_post(
         self, payload: XPostInput, draft: str, iteration: int
     ) -> Dict[str, Any]:
@@ -251,29 +431,29 @@ Context:
 Draft to evaluate:
 {draft}
 """
-        response = self._chat_completion(
-            model=self.evaluator_model,
-            system=system_prompt,
-            user=user_prompt,
-            temperature=0.2,
-            max_tokens=500,
-        )
-
         try:
-            parsed = json.loads(response)
-        except json.JSONDecodeError:
-            parsed = {
+            with usage_scope(step="evaluator"):
+                evaluation = complete_json(
+                    self.client,
+                    model=self.evaluator_model,
+                    messages=[
+                        {"role": "system", "content": system_prompt},
+                        {"role": "user", "content": user_prompt},
+                    ],
+                    schema=PostEvaluation,
+                    temperature=0.2,
+                    max_tokens=500,
+                )
+        except StructuredOutputError as exc:
+            # Unscorable even after repair and a retry: keep iterating with a neutral score.
+            return {
                 "verdict": "REVISE",
                 "score": 3,
-                "observations": response,
+                "observations": exc.raw,
                 "action_items": [],
+                "source": "unparsed",
             }
-
-        parsed.setdefault("verdict", "REVISE")
-        parsed.setdefault("score", 3)
-        parsed.setdefault("observations", "")
-        parsed.setdefault("action_items", [])
-        return parsed
+        return evaluation.model_dump()
 
     def _collect_human_feedback(
         self, feedback_items: List[HumanFeedback], iteration: int
@@ -344,21 +524,31 @@ Rewrite the post so it:
 Return ONLY the improved X post text, no markdown fences, commentary, or numbering.
 """
 
-        return self._chat_completion(
-            model=self.optimizer_model,
-            system=system_prompt,
-            user=user_prompt,
-            temperature=0.4,
-            max_tokens=600,
-        )
+        model, max_tokens = route(self.optimizer_model, 600)
+        with usage_scope(step="optimizer"):
+            return self._chat_completion(
+                model=model,
+                system=system_prompt,
+                user=user_prompt,
+                temperature=0.4,
+                max_tokens=max_tokens,
+            )
 
     def generate_trending_ideas(self, payload: XPostIdeaRequest) -> Dict[str, Any]:
-        """Produce trending idea cards that the frontend can surface."""
+        """Produce trending idea cards that the frontend can surface.
 
-        keywords = ", ".join(payload.keywords) if payload.keywords else "None"
+        Served from ``idea_cache`` when the same keyword set was generated recently.
+        """
+        ideas = self.idea_cache.get(payload.keywords, payload.count)
+        if not ideas:
+            ideas = self._fallback_ideas(payload.keywords)
+        return {"ideas": ideas}
+
+    def request_trending_ideas(self, keywords: List[str], count: int) -> List[Dict[str, Any]]:
+        keyword_text = ", ".join(keywords) if keywords else "None"
         mode_instructions = (
             "Focus on emerging X trends using the provided keywords."
-            if payload.keywords
+            if keywords
             else "Pull from general startup + AI culture topics trending today."
         )
 
@@ -383,9 +573,9 @@ Return ONLY the improved X post text, no markdown fences, commentary, or numberi
         prompt = f"""
 You are a trend-spotting social strategist.
 
-Produce {payload.count} **distinct** X post ideas. {mode_instructions}
+Produce {count} **distinct** X post ideas. {mode_instructions}
 
-Keywords or themes to include when relevant: {keywords}
+Keywords or themes to include when relevant: {keyword_text}
 
 Return STRICT JSON that matches this schema (no markdown, no prose):
 {json.dumps(schema, indent=2)}
@@ -397,41 +587,41 @@ Constraints:
 - Summaries must reference why the topic is trending **right now** (news hook, release, etc.).
 """
 
-        raw = self._chat_completion(
-            model=self.generator_model,
-            system="You craft structured responses for growth teams.",
-            user=prompt,
-            temperature=0.65,
-            max_tokens=1200,
-        )
-
-        ideas: List[Dict[str, Any]]
         try:
-            parsed = json.loads(raw)
-            ideas = parsed.get("ideas", [])
-            if not isinstance(ideas, list):
-                ideas = []
-        except json.JSONDecodeError:
-            ideas = []
-
-        if not ideas:
-            ideas = [
-                {
-                    "id": "fallback-idea",
-                    "headline": "AI builders chase latency-free stacks",
-                    "topic": "Ultra-fast inference week",
-                    "summary": "Founders brag about 30ms generation demos after Groq's latest benchmarks shocked dev Twitter.",
-                    "suggested_objective": "Drive signups to our infra explainer or waitlist.",
-                    "suggested_audience": "Infra-minded AI founders and engineers",
-                    "tone": "Confident, technical flex",
-                    "call_to_action": "Drop your latency wins + read the breakdown",
-                    "keywords": payload.keywords or ["AI infra", "low latency"],
-                    "hashtags": ["#AI", "#Startups"],
-                    "sample_tweet": "Dev Twitter is bragging about <50ms LLM calls. We just shipped the guide on how. Drop your latency wins + snag the blueprint. ⚡️",
-                }
-            ]
-
-        return {"ideas": ideas}
+            with usage_scope(step="ideas"):
+                idea_set = complete_json(
+                    self.client,
+                    model=self.generator_model,
+                    messages=[
+                        {"role": "system", "content": "You craft structured responses for growth teams."},
+                        {"role": "user", "content": prompt},
+                    ],
+                    schema=TrendingIdeaSet,
+                    temperature=0.65,
+                    max_tokens=1200,
+                    top_p=0.9,
+                )
+        except StructuredOutputError:
+            return []
+        return [idea.model_dump() for idea in idea_set.ideas]
+
+    @staticmethod
+    def _fallback_ideas(keywords: List[str]) -> List[Dict[str, Any]]:
+        return [
+            {
+                "id": "fallback-idea",
+                "headline": "AI builders chase latency-free stacks",
+                "topic": "Ultra-fast inference week",
+                "summary": "Founders brag about 30ms generation demos after Groq's latest benchmarks shocked dev Twitter.",
+                "suggested_objective": "Drive signups to our infra explainer or waitlist.",
+                "suggested_audience": "Infra-minded AI founders and engineers",
+                "tone": "Confident, technical flex",
+                "call_to_action": "Drop your latency wins + read the breakdown",
+                "keywords": keywords or ["AI infra", "low latency"],
+                "hashtags": ["#AI", "#Startups"],
+                "sample_tweet": "Dev Twitter is bragging about <50ms LLM calls. We just shipped the guide on how. Drop your latency wins + snag the blueprint. ⚡️",
+            }
+        ]
 
     def _chat_completion(
         self,
@@ -457,4 +647,11 @@ Constraints:
         return content.strip() if content else ""
 
 
-__all__ = ["XPostAgent", "XPostInput", "HumanFeedback", "XPostIdeaRequest"]
+__all__ = [
+    "XPostAgent",
+    "XPostInput",
+    "HumanFeedback",
+    "XPostIdeaRequest",
+    "PostEvaluation",
+    "TrendingIdeaSet",
+]
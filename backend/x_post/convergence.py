@@ -0,0 +1,119 @@
+"""
+Early-exit signals for the X post optimisation loop.
+
+The loop used to run until the evaluator approved or ``max_iterations`` ran
+out, even when the optimizer kept returning the same post. The tracker
+compares successive optimized posts (normalised edit distance, weighted with
+token-set overlap), watches for a score plateau and enforces an optional wall-clock
+deadline, and reports why the loop should stop.
+"""
+
+from __future__ import annotations
+
+import re
+import time
+from typing import List, Optional
+
+TOKEN_PATTERN = re.compile(r"[#@]?\w+")
+
+# Successive posts at least this similar are considered converged.
+SIMILARITY_THRESHOLD = 0.92
+# Stop when the best score has not improved for this many rounds.
+PLATEAU_ROUNDS = 2
+# Share of edit similarity in post_similarity. Edit distance is order-aware;
+# token overlap alone would call a reordered post identical.
+EDIT_WEIGHT = 0.75
+
+STOP_APPROVED = "approved"
+STOP_CONVERGED = "converged"
+STOP_PLATEAU = "score_plateau"
+STOP_DEADLINE = "deadline"
+STOP_MAX_ITERATIONS = "max_iterations"
+STOP_CANCELLED = "cancelled"
+
+
+def _normalize(text: str) -> str:
+    return " ".join(text.lower().split())
+
+
+def edit_similarity(a: str, b: str) -> float:
+    """1 - Levenshtein distance / length of the longer string."""
+    a, b = _normalize(a), _normalize(b)
+    if not a and not b:
+        return 1.0
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, start=1):
+        current = [i]
+        for j, char_b in enumerate(b, start=1):
+            current.append(
+                min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char_a != char_b))
+            )
+        previous = current
+    return 1.0 - previous[-1] / max(len(a), len(b))
+
+
+def token_set_similarity(a: str, b: str) -> float:
+    """Jaccard overlap of the word/hashtag sets."""
+    tokens_a = set(TOKEN_PATTERN.findall(a.lower()))
+    tokens_b = set(TOKEN_PATTERN.findall(b.lower()))
+    if not tokens_a and not tokens_b:
+        return 1.0
+    return len(tokens_a & tokens_b) / len(tokens_a | tokens_b)
+
+
+def post_similarity(a: str, b: str) -> float:
+    """Order-aware similarity: mostly edit distance, nudged by shared tokens."""
+    return EDIT_WEIGHT * edit_similarity(a, b) + (1 - EDIT_WEIGHT) * token_set_similarity(a, b)
+
+
+class ConvergenceTracker:
+    """Tracks successive iterations and decides when more rounds cannot help."""
+
+    def __init__(
+        self,
+        *,
+        deadline_seconds: Optional[float] = None,
+        similarity_threshold: float = SIMILARITY_THRESHOLD,
+        plateau_rounds: int = PLATEAU_ROUNDS,
+    ) -> None:
+        self.started_at = time.monotonic()
+        self.deadline_seconds = deadline_seconds
+        self.similarity_threshold = similarity_threshold
+        self.plateau_rounds = plateau_rounds
+        self.posts: List[str] = []
+        self.scores: List[float] = []
+        self.round_durations: List[float] = []
+        self._round_started = self.started_at
+        self._last_similarity: Optional[float] = None
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def observe(self, post: str, score: float) -> Optional[float]:
+        """Record a finished round. Returns similarity to the previous post, if any."""
+        now = time.monotonic()
+        self.round_durations.append(now - self._round_started)
+        self._round_started = now
+
+        similarity = post_similarity(self.posts[-1], post) if self.posts else None
+        self.posts.append(post)
+        self.scores.append(score)
+        self._last_similarity = similarity
+        return similarity
+
+    def stop_reason(self) -> Optional[str]:
+        """Reason to stop after the latest round, or ``None`` to keep going."""
+        if self._last_similarity is not None and self._last_similarity >= self.similarity_threshold:
+            return STOP_CONVERGED
+
+        if len(self.scores) > self.plateau_rounds:
+            best_before = max(self.scores[: -self.plateau_rounds])
+            if max(self.scores[-self.plateau_rounds :]) <= best_before:
+                return STOP_PLATEAU
+
+        if self.deadline_seconds is not None and self.round_durations:
+            # Do not start a round that is expected to overrun the deadline.
+            expected = sum(self.round_durations) / len(self.round_durations)
+            if self.elapsed() + expected > self.deadline_seconds:
+                return STOP_DEADLINE
+        return None
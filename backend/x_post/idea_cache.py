@@ -0,0 +1,208 @@
+"""
+Short-lived cache and background pre-warming for X trending ideas.
+
+Most visitors open the idea generator with no keywords or with the same few
+popular ones, and each request used to cost a fresh 70B call. Idea sets are
+cached per normalised keyword set and ``count`` for a short TTL, and a daemon
+thread regenerates the default set plus the most requested keyword sets
+before they expire, so ``/x-post/ideas`` usually answers from memory.
+
+Request counts come from client input, so they are bounded: each pre-warm
+cycle halves them and forgets sets that reach zero, and the table is trimmed
+to the most requested sets whenever it outgrows ``max_tracked``.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from cachetools import TTLCache
+
+from common.metrics import record_cache
+
+IdeaKey = Tuple[Tuple[str, ...], int]
+Ideas = List[Dict[str, Any]]
+
+DEFAULT_TTL_SECONDS = 900.0
+DEFAULT_MAXSIZE = 128
+DEFAULT_PREWARM_TOP = 3
+DEFAULT_COUNT = 4
+DEFAULT_MAX_TRACKED = 512
+
+
+def normalize_keywords(keywords: List[str]) -> Tuple[str, ...]:
+    """Case, ``#`` and order-insensitive keyword set."""
+    cleaned = {" ".join(k.lower().lstrip("#").split()) for k in keywords}
+    return tuple(sorted(k for k in cleaned if k))
+
+
+def idea_cache_key(keywords: List[str], count: int) -> IdeaKey:
+    return normalize_keywords(keywords), count
+
+
+class TrendingIdeaCache:
+    """TTL cache in front of ``fetch(keywords, count)`` with a pre-warm scheduler."""
+
+    def __init__(
+        self,
+        fetch: Callable[[List[str], int], Ideas],
+        *,
+        ttl_seconds: Optional[float] = None,
+        maxsize: int = DEFAULT_MAXSIZE,
+        prewarm_interval: Optional[float] = None,
+        prewarm_top: Optional[int] = None,
+        max_tracked: int = DEFAULT_MAX_TRACKED,
+    ) -> None:
+        self.logger = logging.getLogger("TrendingIdeaCache")
+        self.fetch = fetch
+        self.ttl_seconds = ttl_seconds or float(
+            os.getenv("X_IDEAS_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)
+        )
+        # Refresh before entries expire so popular sets never go cold.
+        self.prewarm_interval = (
+            prewarm_interval
+            if prewarm_interval is not None
+            else float(os.getenv("X_IDEAS_PREWARM_INTERVAL_SECONDS", self.ttl_seconds * 0.8))
+        )
+        self.prewarm_top = (
+            prewarm_top
+            if prewarm_top is not None
+            else int(os.getenv("X_IDEAS_PREWARM_TOP", DEFAULT_PREWARM_TOP))
+        )
+        self.max_tracked = max(max_tracked, self.prewarm_top + 1)
+        self._cache: TTLCache = TTLCache(maxsize=maxsize, ttl=self.ttl_seconds)
+        self._lock = threading.Lock()
+        self._key_locks: Dict[IdeaKey, threading.Lock] = {}
+        self._requests: Counter = Counter()
+        self._keywords: Dict[IdeaKey, List[str]] = {}
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------ #
+    # Lookups
+    # ------------------------------------------------------------------ #
+    def get(self, keywords: List[str], count: int) -> Ideas:
+        """Cached ideas for the keyword set, generating them on a miss."""
+        key = idea_cache_key(keywords, count)
+        with self._lock:
+            self._track(key, keywords)
+            cached = self._cache.get(key)
+        record_cache("x_post.ideas", hits=int(cached is not None), misses=int(cached is None))
+        if cached is not None:
+            return cached
+        return self._refresh(key, keywords, only_if_missing=True)
+
+    def peek(self, keywords: List[str], count: int) -> Optional[Ideas]:
+        """Cached ideas for the keyword set, or ``None``; never calls upstream.
+
+        Only hits are counted here; a miss is counted by the ``get`` that follows.
+        """
+        key = idea_cache_key(keywords, count)
+        with self._lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._track(key, keywords)
+        if cached is not None:
+            record_cache("x_post.ideas", hits=1)
+        return cached
+
+    def _track(self, key: IdeaKey, keywords: List[str]) -> None:
+        """Count a request for ``key``; call with ``self._lock`` held."""
+        self._requests[key] += 1
+        self._keywords.setdefault(key, list(keywords))
+        if len(self._requests) > self.max_tracked:
+            # Trim to half so the sort runs once per many new sets, not per request.
+            self._forget_except(dict(self._requests.most_common(self.max_tracked // 2)))
+
+    def _forget_except(self, counts: Dict[IdeaKey, int]) -> None:
+        """Keep only ``counts``; call with ``self._lock`` held."""
+        self._requests = Counter(counts)
+        self._keywords = {key: self._keywords[key] for key in counts if key in self._keywords}
+        # Locks are only needed for sets that are still tracked or cached.
+        self._key_locks = {
+            key: lock
+            for key, lock in self._key_locks.items()
+            if key in counts or key in self._cache or lock.locked()
+        }
+
+    def decay(self) -> None:
+        """Halve every request count and forget sets that reach zero."""
+        with self._lock:
+            self._forget_except({key: n // 2 for key, n in self._requests.items() if n // 2})
+
+    def _refresh(self, key: IdeaKey, keywords: List[str], *, only_if_missing: bool) -> Ideas:
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Concurrent misses for the same set wait for a single upstream call.
+        with key_lock:
+            if only_if_missing:
+                with self._lock:
+                    cached = self._cache.get(key)
+                if cached is not None:
+                    return cached
+            ideas = self.fetch(keywords, key[1])
+            if ideas:
+                # Empty results (parse failures) are never cached.
+                with self._lock:
+                    self._cache[key] = ideas
+            return ideas
+
+    # ------------------------------------------------------------------ #
+    # Pre-warming
+    # ------------------------------------------------------------------ #
+    def prewarm_keys(self) -> List[IdeaKey]:
+        """The default (no keyword) set plus the most requested keyword sets."""
+        default = idea_cache_key([], DEFAULT_COUNT)
+        with self._lock:
+            popular = [key for key, _ in self._requests.most_common() if key != default]
+        return [default] + popular[: self.prewarm_top]
+
+    def prewarm(self) -> None:
+        for key in self.prewarm_keys():
+            if self._stop.is_set():
+                return
+            with self._lock:
+                keywords = self._keywords.get(key, list(key[0]))
+            try:
+                self._refresh(key, keywords, only_if_missing=False)
+            except Exception as exc:
+                self.logger.warning(f"Pre-warming trending ideas {key} failed: {exc}")
+        self.decay()
+
+    def start(self) -> None:
+        if self._thread is not None or self.prewarm_interval <= 0:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run_scheduler, name="x-ideas-prewarm", daemon=True
+        )
+        self._thread.start()
+        self.logger.info(
+            f"Pre-warming trending ideas every {self.prewarm_interval:.0f}s."
+        )
+
+    def stop(self, timeout: float = 5.0) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def _run_scheduler(self) -> None:
+        while not self._stop.is_set():
+            self.prewarm()
+            self._stop.wait(self.prewarm_interval)
+
+
+def _fetch_with_registered_agent(keywords: List[str], count: int) -> Ideas:
+    # Resolved per call so the cache (and its scheduler) can start before the agent exists.
+    from api.agent_manager import agent_manager
+
+    return agent_manager.get("x-post").request_trending_ideas(keywords, count)
+
+
+# Shared instance used by the registered X post agent and started with the app
+trending_idea_cache = TrendingIdeaCache(_fetch_with_registered_agent)
@@ -1,40 +1,80 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
 
-from .agent import XPostAgent, XPostIdeaRequest, XPostInput
+from api.agent_manager import AgentBusyError, AgentUnavailableError, agent_manager, retry_headers
+from common.deadline import DeadlineExceeded
+from common.streaming import SSE_HEADERS, SSE_MEDIA_TYPE, cancel_registry, stream_run
+
+from .idea_cache import trending_idea_cache
+from .schemas import XPostIdeaRequest, XPostInput
 
 router = APIRouter(prefix="/x-post", tags=["X Workflow"])
 
-try:
-    agent = XPostAgent()
-except Exception as exc:  # pragma: no cover - initialization errors logged only
+
+def _unavailable(exc: AgentUnavailableError) -> HTTPException:
+    if isinstance(exc, AgentBusyError):
+        return HTTPException(status_code=503, detail=str(exc), headers=retry_headers(exc))
     print(f"CRITICAL: Failed to initialize XPostAgent -> {exc}")
-    agent = None
+    return HTTPException(
+        status_code=503,
+        detail="X Post workflow is not available. Check backend logs.",
+        headers=retry_headers(exc),
+    )
 
 
 @router.post("/generate")
 def generate_x_post(payload: XPostInput):
-    if agent is None:
-        raise HTTPException(
-            status_code=500,
-            detail="X Post workflow is not available. Check backend logs.",
-        )
-
     try:
-        return agent.invoke(payload)
+        with agent_manager.lease("x-post") as agent:
+            return agent.invoke(payload)
+    except AgentUnavailableError as exc:
+        raise _unavailable(exc) from exc
+    except DeadlineExceeded as exc:
+        raise HTTPException(status_code=504, detail=str(exc)) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
 
+@router.post("/generate/stream")
+async def stream_x_post(payload: XPostInput, request: Request):
+    """Same loop as /generate, streamed as SSE events per stage.
+
+    Events: ``started`` (runId), ``generator``, ``evaluator``, ``optimizer``
+    per iteration, then ``result`` (the /generate response) or ``error``.
+    Disconnecting or calling the cancel endpoint stops further upstream calls.
+    """
+    try:
+        # Build the agent up front so an unavailable workflow is a 503, not an SSE error.
+        agent_manager.get("x-post")
+    except AgentUnavailableError as exc:
+        raise _unavailable(exc) from exc
+
+    def run(emit, cancel):
+        with agent_manager.lease("x-post") as agent:
+            return agent.invoke(payload, on_event=emit, cancel=cancel)
+
+    events = stream_run(request, run)
+    return StreamingResponse(events, media_type=SSE_MEDIA_TYPE, headers=SSE_HEADERS)
+
+
+@router.post("/generate/stream/{run_id}/cancel")
+def cancel_x_post_stream(run_id: str):
+    if not cancel_registry.cancel(run_id):
+        raise HTTPException(status_code=404, detail=f"No active run '{run_id}'.")
+    return {"status": "cancelling", "runId": run_id}
+
+
 @router.post("/ideas")
 def generate_x_post_ideas(payload: XPostIdeaRequest):
-    if agent is None:
-        raise HTTPException(
-            status_code=500,
-            detail="X Post workflow is not available. Check backend logs.",
-        )
-
+    # Cache hits need no agent slot; only a miss competes with generate runs.
+    cached = trending_idea_cache.peek(payload.keywords, payload.count)
+    if cached:
+        return {"ideas": cached}
     try:
-        return agent.generate_trending_ideas(payload)
+        with agent_manager.lease("x-post") as agent:
+            return agent.generate_trending_ideas(payload)
+    except AgentUnavailableError as exc:
+        raise _unavailable(exc) from exc
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc)) from exc
 
@@ -0,0 +1,144 @@
+"""
+Deterministic pre-evaluation for X post drafts.
+
+Hard constraints (character budget, required keywords/hashtags, emoji
+count, CTA presence) do not need a model to check. ``check_post`` verifies
+them, repairs the mechanical ones in place (trimming, hashtag appends, emoji
+removal) and reports what is left, so the LLM evaluator only scores drafts
+that already satisfy the brief.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+MAX_EMOJIS = 1
+
+EMOJI_PATTERN = re.compile(
+    "(?:[\U0001F1E6-\U0001F1FF]{2}"
+    "|[\U0001F300-\U0001FAFF\u2600-\u27BF\u2B00-\u2BFF]"
+    "[\U0001F3FB-\U0001F3FF]?\uFE0F?"
+    "(?:\u200D[\U0001F300-\U0001FAFF\u2600-\u27BF][\U0001F3FB-\U0001F3FF]?\uFE0F?)*)"
+)
+FENCE_PATTERN = re.compile(r"^```[a-z]*\s*|\s*```$")
+SENTENCE_END_PATTERN = re.compile(r"[.!?](?=\s|$)")
+WORD_PATTERN = re.compile(r"[a-z0-9']+")
+CTA_STOPWORDS = {"the", "a", "an", "to", "and", "or", "our", "your", "for", "of", "on", "in", "now"}
+
+
+@dataclass
+class RuleCheck:
+    post: str
+    violations: List[str] = field(default_factory=list)
+    repairs: List[str] = field(default_factory=list)
+
+    @property
+    def passed(self) -> bool:
+        return not self.violations
+
+    def as_evaluation(self) -> Dict[str, Any]:
+        """Evaluation dict in the same shape as the LLM evaluator's output."""
+        return {
+            "verdict": "REVISE",
+            "score": max(1, 3 - len(self.violations)),
+            "observations": "Rule check failed: " + "; ".join(self.violations),
+            "action_items": list(self.violations),
+            "source": "rules",
+        }
+
+
+def count_emojis(text: str) -> int:
+    return len(EMOJI_PATTERN.findall(text))
+
+
+def _contains(text: str, term: str) -> bool:
+    return term.lower() in text.lower()
+
+
+def _cta_present(text: str, call_to_action: Optional[str]) -> bool:
+    """A CTA counts as present when most of its meaningful words appear in the post."""
+    if not call_to_action:
+        return True
+    words = {w for w in WORD_PATTERN.findall(call_to_action.lower()) if w not in CTA_STOPWORDS}
+    if not words:
+        return True
+    found = set(WORD_PATTERN.findall(text.lower()))
+    return len(words & found) / len(words) >= 0.5
+
+
+def _strip_wrapping(text: str) -> str:
+    text = FENCE_PATTERN.sub("", text.strip())
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "\"'":
+        text = text[1:-1]
+    return text.strip()
+
+
+def _drop_extra_emojis(text: str, keep: int) -> str:
+    seen = 0
+
+    def replace(match: re.Match) -> str:
+        nonlocal seen
+        seen += 1
+        return match.group(0) if seen <= keep else ""
+
+    return re.sub(r"[ \t]{2,}", " ", EMOJI_PATTERN.sub(replace, text)).strip()
+
+
+def _trim_to_limit(body: str, suffix: str, limit: int) -> Optional[str]:
+    """Cut ``body`` at the last sentence (or word) boundary so ``body + suffix`` fits."""
+    budget = limit - len(suffix)
+    if budget <= 0:
+        return None
+    if len(body) <= budget:
+        return body + suffix
+    head = body[:budget]
+    sentence_ends = [m.end() for m in SENTENCE_END_PATTERN.finditer(head)]
+    if sentence_ends and sentence_ends[-1] >= budget // 2:
+        return head[: sentence_ends[-1]].rstrip() + suffix
+    cut = head.rsplit(" ", 1)[0].rstrip(" ,;:-")
+    return (cut + "…" + suffix) if cut and len(cut) + 1 <= budget else None
+
+
+def check_post(
+    draft: str,
+    *,
+    word_limit: int,
+    keywords: List[str],
+    call_to_action: Optional[str] = None,
+    max_emojis: int = MAX_EMOJIS,
+) -> RuleCheck:
+    """Check an X post against the hard constraints and repair what is mechanical."""
+    post = _strip_wrapping(draft)
+    check = RuleCheck(post=post)
+    if post != draft.strip():
+        check.repairs.append("removed wrapping quotes/fences")
+
+    if count_emojis(post) > max_emojis:
+        post = _drop_extra_emojis(post, max_emojis)
+        check.repairs.append(f"reduced emojis to {max_emojis}")
+
+    missing_tags = [k for k in keywords if k.startswith("#") and not _contains(post, k)]
+
+    suffix = (" " + " ".join(missing_tags)) if missing_tags else ""
+    fitted = _trim_to_limit(post, suffix, word_limit)
+    if fitted is None:
+        check.violations.append(
+            f"post is {len(post + suffix)} characters; the budget is {word_limit}"
+        )
+    else:
+        if missing_tags:
+            check.repairs.append(f"appended hashtags {', '.join(missing_tags)}")
+        if len(post + suffix) > word_limit:
+            check.repairs.append(f"trimmed to {word_limit} characters")
+        post = fitted
+
+    missing_words = [k for k in keywords if not k.startswith("#") and not _contains(post, k)]
+    if missing_words:
+        check.violations.append(f"missing required keywords: {', '.join(missing_words)}")
+    if not _cta_present(post, call_to_action):
+        check.violations.append(f'call to action "{call_to_action}" is not stated')
+
+    check.post = post
+    return check
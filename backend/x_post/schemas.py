@@ -0,0 +1,100 @@
+"""Request schemas for the X post workflow (kept free of heavy imports for the router)."""
+
+from __future__ import annotations
+
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class HumanFeedback(BaseModel):
+    """Represents human feedback that can be injected into any iteration."""
+
+    author: str = Field(
+        default="strategist",
+        description="Name or role for attribution in the feedback thread.",
+    )
+    message: str = Field(..., description="Specific guidance for the optimizer.")
+    iteration: Optional[int] = Field(
+        default=None,
+        ge=1,
+        description="Target iteration. Leave empty to apply to every loop.",
+    )
+
+
+class XPostInput(BaseModel):
+    """Request body coming from the frontend."""
+
+    topic: str = Field(..., description="Main subject or hook for the post.")
+    objective: str = Field(
+        ...,
+        description="What success looks like for this post (e.g., clicks, hype).",
+    )
+    audience: str = Field(..., description="Intended audience details.")
+    tone: str = Field(default="Bold", description="Stylistic direction.")
+    brand_voice: str = Field(
+        default="Witty, high-signal startup voice",
+        description="Optional brand voice references.",
+    )
+    call_to_action: Optional[str] = Field(
+        default=None, description="CTA to highlight inside the copy."
+    )
+    product_details: Optional[str] = Field(
+        default=None, description="Feature details or proof points."
+    )
+    keywords: List[str] = Field(
+        default_factory=list, description="Terms/hashtags that must appear."
+    )
+    word_limit: int = Field(
+        default=280,
+        ge=120,
+        le=400,
+        description="Character budget for an X post.",
+    )
+    max_iterations: int = Field(
+        default=2,
+        ge=1,
+        le=5,
+        description="Number of generator/evaluator/optimizer loops to run.",
+    )
+    human_feedback: List[HumanFeedback] = Field(
+        default_factory=list,
+        description="Optional operator instructions to blend into optimization.",
+    )
+    mode: Literal["sequential", "tournament"] = Field(
+        default="sequential",
+        description=(
+            "sequential: one draft per round. tournament: generate and score several"
+            " drafts concurrently and optimize only the winner."
+        ),
+    )
+    candidates: int = Field(
+        default=3,
+        ge=2,
+        le=6,
+        description="Drafts generated per round in tournament mode.",
+    )
+    deadline_seconds: Optional[float] = Field(
+        default=None,
+        gt=0,
+        le=600,
+        description=(
+            "Wall-clock budget for the whole loop. No new iteration starts once"
+            " it is expected to overrun."
+        ),
+    )
+
+
+class XPostIdeaRequest(BaseModel):
+    """Request schema for the trending idea generator."""
+
+    keywords: List[str] = Field(
+        default_factory=list,
+        description="Optional keywords or niches to bias the trending ideas.",
+    )
+    count: int = Field(
+        default=4,
+        ge=1,
+        le=6,
+        description="How many idea cards to generate.",
+    )
@@ -1,5 +1,11 @@
-from typing import Any, Dict
+import asyncio
+from typing import Any, Dict, Optional
 from langgraph.graph import StateGraph
+
+from common.checkpoint import get_checkpointer, resolve_thread_id, run_checkpointed
+from common.deadline import DeadlineExceeded
+from common.graph import ProgressCallback
+from llm import degraded_run
 from .youtube_script_model import YoutubeScript, build_youtube_graph
 
 
@@ -13,7 +19,12 @@ class YoutubeScriptAgent:
         """Build the LangGraph workflow."""
         self.graph = build_youtube_graph()
 
-    async def ainvoke(self, input_data: Dict[str, Any], thread_id: str = None):
+    async def ainvoke(
+        self,
+        input_data: Dict[str, Any],
+        thread_id: str = None,
+        on_progress: Optional[ProgressCallback] = None,
+    ):
         print("=== ainvoke received input_data ===")
         print(input_data)
 
@@ -26,13 +37,18 @@ class YoutubeScriptAgent:
                 videoType=input_data.get("videoType", "shortform"),
                 tone=input_data.get("tone", ""),
                 audience=input_data.get("audience", ""),
-                threadId=input_data.get("threadId", "e.g. session-abc123"),
+                threadId=thread_id or resolve_thread_id(input_data),
             )
 
             # ⚙️ Build & run workflow
             graph = self.graph or build_youtube_graph()
-            app = graph.compile()
-            result = app.invoke(state)
+            app = graph.compile(checkpointer=get_checkpointer())
+            # Degraded mode (slow upstream) is decided once for the whole run
+            with degraded_run() as degraded:
+                # Off the event loop, so the server keeps serving (and noticing disconnects)
+                result = await asyncio.to_thread(
+                    run_checkpointed, app, state, state.threadId, on_progress=on_progress
+                )
 
             # 📝 Extract final script
             final_script = result.get("script_draft")
@@ -41,6 +57,7 @@ class YoutubeScriptAgent:
 
             return {
                 "status": "success",
+                "degraded": degraded,
                 "data": {
                     "script": final_script,
                     "revision_count": revision_count,
@@ -49,6 +66,8 @@ class YoutubeScriptAgent:
                 }
             }
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             print(f"Error in YoutubeScriptAgent: {e}")
             return {
@@ -1,13 +1,33 @@
 from fastapi import APIRouter, HTTPException, Request
-from .agent_youtube_script import YoutubeScriptAgent
+from api.agent_manager import AgentUnavailableError, agent_manager, retry_headers
+from common.deadline import DeadlineExceeded
+from common.threads import resolve_thread_id
+from llm import CascadeStep, all_of, degraded_run, forbid, word_range
 from pydantic import BaseModel
-import uuid
-from .youtube_script_model import generate
 
 router = APIRouter(tags=["YouTube Script"])
 
-agent = YoutubeScriptAgent()
-agent.compile()
+
+async def run_youtube_script_workflow(payload: dict, on_progress=None) -> dict:
+    """Run the YouTube script workflow for a frontend payload (shared with the job queue)."""
+    # Reusing a threadId resumes a failed run from its checkpoint
+    thread_id = resolve_thread_id(payload)
+    payload["threadId"] = thread_id
+
+    print("Payload passed to agent:", payload)
+
+    # Run agent
+    async with agent_manager.alease("youtube-script") as agent:
+        result = await agent.ainvoke(payload, thread_id=thread_id, on_progress=on_progress)
+
+    return {
+        "status": "success",
+        "threadId": thread_id,
+        "degraded": result.get("degraded", False),
+        "generated_script": result.get("data", {}).get("script", "No script generated"),
+        "revision_count": result.get("data", {}).get("revision_count", 0),
+        "received_data": payload
+    }
 
 
 @router.post("/generate-youtube-script")
@@ -17,27 +37,23 @@ async def generate_youtube_script(request: Request):
         payload = await request.json()
         print("Received payload:", payload)
 
-        # Generate thread ID
-        thread_id = str(uuid.uuid4())
-        payload["threadId"] = thread_id
-
-        print("Payload passed to agent:", payload)
-
-        # Run agent
-        result = await agent.ainvoke(payload)
-
-        return {
-            "status": "success",
-            "threadId": thread_id,
-            "generated_script": result.get("data", {}).get("script", "No script generated"),
-            "revision_count": result.get("data", {}).get("revision_count", 0),
-            "received_data": payload
-        }
+        return await run_youtube_script_workflow(payload)
 
+    except AgentUnavailableError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers=retry_headers(e))
+    except DeadlineExceeded as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         print("🔥 Error:", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+# A single paragraph of 20-160 words without meta commentary; 8B first.
+IMAGE_PROMPT_CASCADE = CascadeStep(
+    "youtube.image_prompt",
+    all_of(word_range(20, 160), forbid("prompt:", "here is", "here's")),
+)
+
+
 class ImagePromptRequest(BaseModel):
     channelDescription: str = ""
     prompt: str = ""              # Video topic
@@ -49,6 +65,8 @@ class ImagePromptRequest(BaseModel):
 @router.post("/image-prompt")
 def craft_image_prompt(payload: ImagePromptRequest):
     """Generate an SDXL-friendly thumbnail prompt for YouTube videos."""
+    from .youtube_script_model import generate_cascade
+
     try:
         template = f"""
         You are a world-class YouTube creative director who specializes in designing
@@ -77,8 +95,11 @@ def craft_image_prompt(payload: ImagePromptRequest):
         • Limit to 120 words.
         """
 
-        prompt_text = generate(template, max_tokens=256, temperature=0.7)
-        return {"image_prompt": prompt_text.strip()}
+        with degraded_run() as degraded:
+            prompt_text = generate_cascade(
+                IMAGE_PROMPT_CASCADE, template, max_tokens=256, temperature=0.7
+            )
+        return {"image_prompt": prompt_text.strip(), "degraded": degraded}
 
     except Exception as exc:
         raise HTTPException(status_code=500, detail=str(exc))
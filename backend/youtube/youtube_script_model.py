@@ -1,26 +1,56 @@
-from typing import Dict, Any
+from typing import Dict, Any, List
 from langgraph.graph import StateGraph, START, END
-from pydantic import BaseModel
-from groq import Groq
+from pydantic import BaseModel, Field
 from dotenv import load_dotenv
+from concurrent.futures import ThreadPoolExecutor
 import re
 
+from common.deadline import in_request_context
+from common.sections import (
+    Section,
+    find_flagged_sections,
+    label_sections,
+    outline,
+    revise_sections,
+    section_token_budget,
+    split_sections,
+)
+from llm import (
+    FAST_MODEL,
+    FULL_MODEL,
+    JUDGE_ROLE,
+    CascadeStep,
+    LazyClient,
+    StructuredOutputError,
+    all_of,
+    complete_json,
+    require_verdict,
+    route,
+    run_cascade,
+    skip_optional,
+    word_range,
+)
+
 load_dotenv()
 
 # -------------------------------
 # Initialize Groq client
 # -------------------------------
-client = Groq()
-research_client = Groq()
+client = LazyClient()
+research_client = LazyClient()
 
 
 # -------------------------------
 # Helper Functions
 # -------------------------------
-def generate(prompt: str, max_tokens=512, temperature=0.7) -> str:
-    """Use Groq to generate text."""
+def generate(prompt: str, max_tokens=512, temperature=0.7, critical=True) -> str:
+    """Use Groq to generate text.
+
+    Non-critical calls move to the fast model with fewer tokens in degraded mode.
+    """
+    model, max_tokens = route(FULL_MODEL, max_tokens, critical=critical)
     completion = client.chat.completions.create(
-        model="llama-3.3-70b-versatile",
+        model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=temperature,
         max_completion_tokens=max_tokens,
@@ -32,8 +62,9 @@ def generate(prompt: str, max_tokens=512, temperature=0.7) -> str:
 
 def generate_research(prompt: str, max_tokens=512, temperature=0.7) -> str:
     """Research agent using a cheaper model."""
+    model, max_tokens = route(FAST_MODEL, max_tokens)
     completion = research_client.chat.completions.create(
-        model="llama-3.1-8b-instant",
+        model=model,
         messages=[{"role": "user", "content": prompt}],
         temperature=temperature,
         max_completion_tokens=max_tokens,
@@ -43,6 +74,53 @@ def generate_research(prompt: str, max_tokens=512, temperature=0.7) -> str:
     return completion.choices[0].message.content.strip()
 
 
+def generate_cascade(step: CascadeStep, prompt: str, max_tokens=512, temperature=0.7) -> str:
+    """Fast model first; escalate to the 70B model when ``step``'s validator rejects it."""
+    return run_cascade(
+        client,
+        step,
+        [{"role": "user", "content": prompt}],
+        max_tokens=max_tokens,
+        temperature=temperature,
+    )
+
+
+# Compliance reports only need a verdict and per-section notes: 8B first.
+COMPLIANCE_CASCADE = CascadeStep(
+    "youtube.compliance_review",
+    all_of(require_verdict("APPROVED", "REVISION_NEEDED"), word_range(15, 600)),
+    models=(JUDGE_ROLE, FULL_MODEL),
+)
+
+
+class ScriptOutlinePlan(BaseModel):
+    """Schema for the longform outline; missing parts are filled in by outline_script."""
+
+    title: str = ""
+    hook: str = ""
+    intro: str = ""
+    body: List[Dict[str, Any]] = Field(default_factory=list)
+    outro: str = ""
+
+
+def generate_json(prompt: str, max_tokens=512, temperature=0.3) -> Dict[str, Any]:
+    """Fast model in JSON mode for structured planning output."""
+    model, max_tokens = route(FAST_MODEL, max_tokens)
+    try:
+        plan = complete_json(
+            research_client,
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            schema=ScriptOutlinePlan,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+    except StructuredOutputError as e:
+        print(f"Error: Failed to decode outline JSON from model response: {e}")
+        return {}
+    return plan.model_dump()
+
+
 def determine_duration(videoType: str, prompt: str) -> int:
     """Longform = 15 min. Shortform = extract seconds/minutes from prompt."""
     if videoType == "longform":
@@ -63,6 +141,35 @@ def determine_duration(videoType: str, prompt: str) -> int:
     return 1
 
 
+# Spoken-word pace used to size each longform section.
+WORDS_PER_MINUTE = 150
+LONGFORM_SECTION_WORKERS = 6
+# Completion tokens per spoken word (pacing cues and markers included).
+TOKENS_PER_WORD = 1.8
+MIN_SCRIPT_TOKENS = 1024
+MAX_SCRIPT_TOKENS = 8192
+# Body beats planned when the outline call returns none.
+FALLBACK_BEAT_MINUTES = 2.5
+
+
+def script_token_budget(words: int) -> int:
+    """``max_tokens`` for a whole script of about ``words`` words."""
+    return max(MIN_SCRIPT_TOKENS, min(MAX_SCRIPT_TOKENS, int(words * TOKENS_PER_WORD)))
+
+
+def fallback_beats(topic: str, minutes: float) -> List[Dict[str, Any]]:
+    """Evenly sized body beats for an outline the model failed to plan."""
+    count = max(1, round(minutes / FALLBACK_BEAT_MINUTES))
+    return [
+        {
+            "title": f"{topic} (part {number})" if count > 1 else topic,
+            "points": f"Cover part {number} of {count} of the topic in depth, building on the previous part.",
+            "minutes": round(minutes / count, 1),
+        }
+        for number in range(1, count + 1)
+    ]
+
+
 # -------------------------------
 # State Schema
 # -------------------------------
@@ -78,6 +185,7 @@ class YoutubeScript(BaseModel):
 
     # Workflow fields
     research_notes: str | None = None
+    script_outline: Dict[str, Any] | None = None  # longform only
     script_draft: str | None = None
     compliance_report: str | None = None
     revision_notes: str | None = None
@@ -103,8 +211,117 @@ Return:
     return {"research_notes": generate_research(prompt, 512)}
 
 
+def outline_script(state: YoutubeScript) -> Dict[str, Any]:
+    """Longform phase 1: plan HOOK, INTRO, BODY beats and OUTRO in one fast call."""
+    duration = determine_duration(state.videoType, state.prompt)
+    prompt = f"""
+You are a YouTube story editor planning a {duration}-minute long-form video.
+
+Topic:
+{state.prompt}
+
+Tone: {state.tone}
+Audience: {state.audience}
+
+Research Notes:
+{state.research_notes}
+
+Return a JSON object with this shape:
+{{
+  "title": "working title",
+  "hook": "what the first 30 seconds must deliver",
+  "intro": "how the video frames the promise",
+  "body": [
+    {{"title": "beat title", "points": "what this beat covers", "minutes": 2}}
+  ],
+  "outro": "wrap-up and call to action"
+}}
+
+Use 4-6 body beats whose minutes add up to about {max(duration - 3, 1)}.
+"""
+    plan = generate_json(prompt, 768)
+    beats = [beat for beat in plan.get("body", []) if isinstance(beat, dict)]
+    if not beats:
+        beats = fallback_beats(state.prompt, max(duration - 3, 1))
+
+    return {
+        "script_outline": {
+            "title": plan.get("title") or state.prompt,
+            "hook": plan.get("hook") or "Open with the most surprising insight.",
+            "intro": plan.get("intro") or "Set up the question the video answers.",
+            "body": beats,
+            "outro": plan.get("outro") or "Recap and ask viewers to subscribe.",
+        }
+    }
+
+
+def _outline_sections(script_outline: Dict[str, Any]) -> list[tuple[str, str, float]]:
+    """Flatten the outline into (marker, brief, minutes) tuples in script order."""
+    sections = [
+        ("[HOOK]", script_outline["hook"], 0.5),
+        ("[INTRO]", script_outline["intro"], 1.0),
+    ]
+    for number, beat in enumerate(script_outline["body"], start=1):
+        title = beat.get("title") or f"Part {number}"
+        try:
+            minutes = float(beat.get("minutes") or 2)
+        except (TypeError, ValueError):
+            minutes = 2.0
+        sections.append(
+            (f"[SCENE CHANGE] BODY {number}: {title}", beat.get("points") or title, minutes)
+        )
+    sections.append(("[OUTRO / CTA]", script_outline["outro"], 1.0))
+    return sections
+
+
+def _generate_longform_script(state: YoutubeScript) -> str:
+    """Longform phase 2: write every outline section concurrently and stitch in order."""
+    planned = _outline_sections(state.script_outline)
+    plan_summary = "\n".join(f"- {marker}: {brief}" for marker, brief, _ in planned)
+    context_header = f"""
+You are a professional YouTube scriptwriter working on one section of a long-form video.
+
+Video title: {state.script_outline["title"]}
+Tone: {state.tone}
+Audience: {state.audience}
+Channel Description: {state.channelDescription}
+Subscribers: {state.subscribers}
+
+Topic:
+{state.prompt}
+
+Research Notes:
+{state.research_notes}
+
+Full outline (other sections are written separately, do not repeat them):
+{plan_summary}
+"""
+
+    def write_section(section: tuple[str, str, float]) -> str:
+        marker, brief, minutes = section
+        words = max(60, int(minutes * WORDS_PER_MINUTE))
+        prompt = f"""{context_header}
+Write ONLY the section "{marker}" (~{words} words, about {minutes:g} minutes spoken).
+Section brief: {brief}
+
+Guidelines:
+- Start with the line {marker} exactly.
+- Add pacing markers like [CUT], [ZOOM IN] inside the section.
+- Use creator-friendly, conversational language in a structured documentary/narrative style.
+- Flow naturally from the previous section and into the next one.
+"""
+        return generate(prompt, max_tokens=script_token_budget(words))
+
+    with ThreadPoolExecutor(max_workers=min(LONGFORM_SECTION_WORKERS, len(planned))) as pool:
+        written = list(pool.map(in_request_context(write_section), planned))
+    return "\n\n".join(part.strip() for part in written)
+
+
 def generate_script(state: YoutubeScript) -> Dict[str, Any]:
     """Generate YouTube script with pacing, camera cues, structure."""
+    if state.videoType == "longform" and state.script_outline:
+        return {"script_draft": _generate_longform_script(state)}
+
     duration = determine_duration(state.videoType, state.prompt)
 
     style = (
@@ -135,11 +352,15 @@ Guidelines:
 - Use creator-friendly, conversational language.
 - {style}
 """
-    return {"script_draft": generate(prompt, 1024)}
+    return {"script_draft": generate(prompt, script_token_budget(duration * WORDS_PER_MINUTE))}
 
 
 def compliance_review(state: YoutubeScript) -> Dict[str, Any]:
     """Review script for safety, accuracy, tone, and pacing."""
+    if skip_optional("script compliance review"):
+        return {"compliance_report": None}
+
+    labelled_script = label_sections(split_sections(state.script_draft or ""))
     prompt = f"""
 You are a YouTube content compliance reviewer.
 
@@ -150,21 +371,18 @@ Review the script for:
 - Audience suitability ("{state.audience}")
 - Engagement quality
 
-Script:
-{state.script_draft}
+Script (split into labelled sections):
+{labelled_script}
 
 Return:
 - Verdict: APPROVED or REVISION_NEEDED
-- Bullet-point notes
+- Sections to revise: comma-separated section numbers (only if REVISION_NEEDED)
+- Bullet-point notes, each naming the section it applies to
 """
-    return {"compliance_report": generate(prompt, 512)}
-
+    return {"compliance_report": generate_cascade(COMPLIANCE_CASCADE, prompt, 512)}
 
-def revision_step(state: YoutubeScript) -> Dict[str, Any]:
-    """Revise script only if needed."""
-    if "APPROVED" in (state.compliance_report or "").upper():
-        return {"revision_notes": "No revision needed."}
 
+def _rewrite_full_script(state: YoutubeScript) -> str:
     prompt = f"""
 You are a YouTube script editor.
 
@@ -178,10 +396,60 @@ Original Script:
 
 Make improvements but keep the style consistent.
 """
-    new_script = generate(prompt, 1024)
+    return generate(prompt, script_token_budget(len((state.script_draft or "").split())))
+
+
+def revision_step(state: YoutubeScript) -> Dict[str, Any]:
+    """Revise script only if needed, regenerating just the flagged sections.
+
+    Longform scripts are always revised section by section; when the review
+    names no section, every section is rewritten within its own budget.
+    """
+    if state.compliance_report is None:
+        return {"revision_notes": "Compliance review skipped (degraded mode)."}
+    if "APPROVED" in state.compliance_report.upper():
+        return {"revision_notes": "No revision needed."}
+    if skip_optional("script revision"):
+        return {"revision_notes": "Revision skipped: request deadline close."}
+
+    sections = split_sections(state.script_draft or "")
+    flagged = find_flagged_sections(sections, state.compliance_report or "")
+    if not flagged and state.videoType == "longform" and len(sections) > 1:
+        # A one-call rewrite of a 15-minute script would be cut off; revise
+        # every section within its own budget instead.
+        flagged = {section.index for section in sections}
+    if not flagged:
+        return {
+            "revision_notes": "Revised based on compliance.",
+            "revision_count": state.revision_count + 1,
+            "script_draft": _rewrite_full_script(state),
+        }
+
+    script_outline = outline(sections)
+
+    def rewrite(section: Section) -> str:
+        prompt = f"""
+You are a YouTube script editor.
+
+Script outline:
+{script_outline}
+
+Section {section.index} (revise this):
+{section.text.strip()}
+
+Feedback:
+{state.compliance_report}
+
+Rewrite ONLY this section to address the feedback that applies to it.
+Keep its marker or heading, pacing cues and roughly the same length, and keep the style consistent.
+Return only the revised section, without commentary.
+"""
+        return generate(prompt, section_token_budget(section))
+
+    new_script, revised = revise_sections(sections, flagged, rewrite)
 
     return {
-        "revision_notes": "Revised based on compliance.",
+        "revision_notes": f"Revised sections {', '.join(map(str, revised))} based on compliance.",
         "revision_count": state.revision_count + 1,
         "script_draft": new_script,
     }
@@ -196,6 +464,14 @@ def finalize(state: YoutubeScript) -> Dict[str, Any]:
     }
 
 
+# -------------------------------
+# Conditional Edges
+# -------------------------------
+def route_by_video_type(state: YoutubeScript) -> str:
+    """Longform scripts are planned first and written section by section."""
+    return "outline" if state.videoType == "longform" else "draft"
+
+
 # -------------------------------
 # Build the Graph
 # -------------------------------
@@ -203,13 +479,19 @@ def build_youtube_graph() -> StateGraph:
     graph = StateGraph(YoutubeScript)
 
     graph.add_node("topic_research", topic_research)
+    graph.add_node("outline_script", outline_script)
     graph.add_node("generate_script", generate_script)
     graph.add_node("compliance_review", compliance_review)
     graph.add_node("revision_step", revision_step)
     graph.add_node("finalize", finalize)
 
     graph.add_edge(START, "topic_research")
-    graph.add_edge("topic_research", "generate_script")
+    graph.add_conditional_edges(
+        "topic_research",
+        route_by_video_type,
+        {"outline": "outline_script", "draft": "generate_script"},
+    )
+    graph.add_edge("outline_script", "generate_script")
     graph.add_edge("generate_script", "compliance_review")
     graph.add_edge("compliance_review", "revision_step")
     graph.add_edge("revision_step", "finalize")
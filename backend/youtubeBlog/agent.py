@@ -1,9 +1,8 @@
 from __future__ import annotations
 
-from typing import Any, Dict
+from typing import Any, Callable, Dict, Optional
 
-from groq import Groq
-from pydantic import BaseModel, Field, HttpUrl
+from llm import FAST_MODEL, degraded_run, get_client, route, usage_scope
 
 from .transcript_service import (
     extract_video_id,
@@ -11,43 +10,45 @@ from .transcript_service import (
     get_video_metadata,
     transcript_to_text,
 )
-
-
-class YouTubeBlogInput(BaseModel):
-    youtube_url: HttpUrl
-    prompt: str = Field(..., description="Describe the specific angle or topic you want covered.")
-    word_count: int = Field(
-        default=600,
-        ge=200,
-        le=2000,
-        description="Approximate number of words for the generated article.",
-    )
+from .schemas import YouTubeBlogInput
 
 
 class YouTubeBlogAgent:
     """Orchestrates transcript retrieval and Groq-powered writing."""
 
     def __init__(self) -> None:
-        self.client = Groq()
+        self.client = get_client()
 
-    def invoke(self, payload: YouTubeBlogInput) -> Dict[str, Any]:
+    def invoke(
+        self,
+        payload: YouTubeBlogInput,
+        on_progress: Optional[Callable[[str], None]] = None,
+    ) -> Dict[str, Any]:
+        report = on_progress or (lambda step: None)
         video_url = str(payload.youtube_url)
         video_id = extract_video_id(video_url)
 
         metadata = get_video_metadata(video_url)
+        report("video_metadata")
         transcript_segments = fetch_transcript(video_id)
         transcript_text = transcript_to_text(transcript_segments)
-
-        blog_post = self._generate_blog(
-            transcript_text=transcript_text,
-            metadata=metadata,
-            instructions=payload.prompt,
-            word_count=payload.word_count,
-        )
-        summary = self._generate_summary(blog_post, metadata)
+        report("transcript")
+
+        # Degraded mode (slow upstream) shortens the summary; the article stays on 70B
+        with degraded_run() as degraded:
+            blog_post = self._generate_blog(
+                transcript_text=transcript_text,
+                metadata=metadata,
+                instructions=payload.prompt,
+                word_count=payload.word_count,
+            )
+            report("blog_post")
+            summary = self._generate_summary(blog_post, metadata)
+            report("summary")
 
         return {
             "status": "success",
+            "degraded": degraded,
             "video_url": video_url,
             "metadata": {**metadata, "video_id": video_id},
             "word_count": payload.word_count,
@@ -89,16 +90,17 @@ Keep quotes accurate, avoid hallucinations, and ground everything in the transcr
 Transcript:
 {transcript_text}
 """
-        completion = self.client.chat.completions.create(
-            model="llama-3.3-70b-versatile",
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt},
-            ],
-            temperature=0.4,
-            max_completion_tokens=2048,
-            top_p=0.9,
-        )
+        with usage_scope(step="blog"):
+            completion = self.client.chat.completions.create(
+                model="llama-3.3-70b-versatile",
+                messages=[
+                    {"role": "system", "content": system_prompt},
+                    {"role": "user", "content": user_prompt},
+                ],
+                temperature=0.4,
+                max_completion_tokens=2048,
+                top_p=0.9,
+            )
         return completion.choices[0].message.content.strip()
 
     def _generate_summary(self, blog_post: str, metadata: Dict[str, Any]) -> str:
@@ -111,10 +113,12 @@ Mention the video title "{metadata.get('title') or 'this video'}" once.
 BLOG:
 {blog_post}
 """
-        completion = self.client.chat.completions.create(
-            model="llama-3.1-8b-instant",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_completion_tokens=512,
-        )
+        model, max_tokens = route(FAST_MODEL, 512)
+        with usage_scope(step="summary"):
+            completion = self.client.chat.completions.create(
+                model=model,
+                messages=[{"role": "user", "content": prompt}],
+                temperature=0.3,
+                max_completion_tokens=max_tokens,
+            )
         return completion.choices[0].message.content.strip()
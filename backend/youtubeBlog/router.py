@@ -1,12 +1,13 @@
 from fastapi import APIRouter, HTTPException
 
-from .agent import YouTubeBlogAgent, YouTubeBlogInput
+from api.agent_manager import AgentUnavailableError, agent_manager, retry_headers
+from common.deadline import DeadlineExceeded
+
+from .schemas import YouTubeBlogInput
 from .transcript_service import TranscriptError
 
 router = APIRouter(tags=["YouTube Blog"])
 
-agent = YouTubeBlogAgent()
-
 
 @router.post("/youtube-blog")
 def generate_youtube_blog(input_data: YouTubeBlogInput):
@@ -14,7 +15,12 @@ def generate_youtube_blog(input_data: YouTubeBlogInput):
     Generate a markdown blog post directly from a YouTube URL, desired prompt, and word count.
     """
     try:
-        return agent.invoke(input_data)
+        with agent_manager.lease("youtube-blog") as agent:
+            return agent.invoke(input_data)
+    except AgentUnavailableError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers=retry_headers(exc))
+    except DeadlineExceeded as exc:
+        raise HTTPException(status_code=504, detail=str(exc))
     except TranscriptError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     except ValueError as exc:
@@ -0,0 +1,16 @@
+"""Request schema for the YouTube-to-blog workflow."""
+
+from __future__ import annotations
+
+from pydantic import BaseModel, Field, HttpUrl
+
+
+class YouTubeBlogInput(BaseModel):
+    youtube_url: HttpUrl
+    prompt: str = Field(..., description="Describe the specific angle or topic you want covered.")
+    word_count: int = Field(
+        default=600,
+        ge=200,
+        le=2000,
+        description="Approximate number of words for the generated article.",
+    )
@@ -2,7 +2,6 @@ import re
 from typing import Any, Dict, List, Optional
 
 import requests
-import yt_dlp
 from youtube_transcript_api import (
     NoTranscriptFound,
     NotTranslatable,
@@ -10,6 +9,8 @@ from youtube_transcript_api import (
     YouTubeTranscriptApi,
 )
 
+from common.metrics import time_upstream
+
 
 VIDEO_ID_PATTERN = re.compile(r"(?:v=|youtu\.be/)([\w-]{11})")
 
@@ -33,8 +34,10 @@ def get_video_metadata(video_url: str) -> Dict[str, Any]:
         "skip_download": True,
         "no_warnings": True,
     }
+    import yt_dlp  # heavy; only loaded when a video is actually processed
+
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with time_upstream("yt-dlp", "metadata"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(video_url, download=False)
             return {
                 "title": info.get("title"),
@@ -52,7 +55,8 @@ def fetch_transcript(video_id: str) -> List[Dict[str, Any]]:
     Falls back to automatic captions/translation when needed.
     """
     try:
-        transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
+        with time_upstream("youtube-transcript", "list"):
+            transcript_list = YouTubeTranscriptApi.list_transcripts(video_id)
         try:
             transcript = transcript_list.find_transcript(["en", "en-US", "en-GB"])
         except NoTranscriptFound:
@@ -105,8 +109,10 @@ def fetch_transcript_via_ytdlp(video_id: str) -> List[Dict[str, Any]]:
         "subtitleslangs": ["en", "en-US", "en-GB"],
         "subtitlesformat": "vtt",
     }
+    import yt_dlp
+
     try:
-        with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+        with time_upstream("yt-dlp", "captions"), yt_dlp.YoutubeDL(ydl_opts) as ydl:
             info = ydl.extract_info(video_url, download=False)
     except Exception as exc:
         raise TranscriptError(f"yt-dlp could not fetch captions: {exc}") from exc